@@ -7,17 +7,17 @@ from typing import AsyncGenerator
 import orjson
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from prometheus_fastapi_instrumentator import Instrumentator
-from openai import AsyncOpenAI
-from httpx import AsyncClient
-from sentence_transformers import SentenceTransformer
 
 from app.config import settings
 from app.scanner import RouterScanner
 from app.core.middlewares import RequestLoggingMiddleware
-from app.core.database import Base, async_engine
+from app.core.artifacts import artifact_path, iter_result, result_path
+from app.core.enum import JobStatus, JobType
 from app.core.managers import async_job_manager
+from app.core.resources import close_resources, init_database, init_resources
+from app.core.retention import retention_sweeper
 
 logger = logging.getLogger(__name__)
 
@@ -29,16 +29,17 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     logger.info(f"Starting {settings.app_name} v{settings.app_version}")
 
     # 初始化数据库表
-    async with async_engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    await init_database()
+    init_resources(app.state)
 
-    app.state.openai_client = AsyncOpenAI(
-        api_key=settings.openai_api_key, base_url=settings.openai_base_url
-    )
-    app.state.httpx_client = AsyncClient()
-    app.state.sentence_transformer = SentenceTransformer(
-        settings.sentence_transformer_model
-    )
+    # 任务由 API 进程执行时启动任务调度，处理器通过 app.state 使用共享的客户端与模型；
+    # 由独立 worker 执行时 API 进程只负责入队与查询
+    if settings.job_execution == "embedded":
+        await async_job_manager.start(app.state)
+
+    # 定期清理过期的任务结果与记录，内存任务存储不落库，无需清理
+    if settings.job_store == "database":
+        await retention_sweeper.start()
 
     logger.info("Application startup completed")
 
@@ -47,9 +48,13 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     # 关闭时执行
     logger.info("Shutting down application")
 
-    await app.state.openai_client.close()
-    await app.state.httpx_client.aclose()
-    await async_engine.dispose()
+    await retention_sweeper.stop()
+
+    # 停止任务调度，运行中的任务放回队列，并写入缓存的任务进度
+    await async_job_manager.stop()
+    await async_job_manager.flush()
+
+    await close_resources(app.state)
 
     logger.info("Application shutdown completed")
 
@@ -146,15 +151,78 @@ def create_app() -> FastAPI:
             media_type="application/json",
         )
 
+    @app.get("/jobs/{job_id}/artifact", tags=["Jobs"])
+    async def download_job_artifact(job_id: str) -> Response:
+        """下载任务结果文件"""
+        job = await async_job_manager.get_async_job(job_id)
+        artifact = ((job or {}).get("result") or {}).get("artifact")
+        if artifact is None or not artifact_path(artifact).exists():
+            return Response(
+                content=orjson.dumps(
+                    {"code": 404, "message": "Artifact not found", "data": None}
+                ),
+                media_type="application/json",
+                status_code=404,
+            )
+
+        return FileResponse(
+            artifact_path(artifact),
+            media_type="application/x-ndjson",
+            filename=artifact,
+        )
+
+    @app.get("/jobs/{job_id}/result", tags=["Jobs"])
+    async def download_job_result(job_id: str) -> Response:
+        """下载完整任务结果，边读边解压"""
+        job = await async_job_manager.get_async_job(job_id)
+        result = (job or {}).get("result")
+        ref = (result or {}).get("result_ref")
+        if result is None or (ref and not result_path(ref["digest"]).exists()):
+            return Response(
+                content=orjson.dumps(
+                    {"code": 404, "message": "Result not found", "data": None}
+                ),
+                media_type="application/json",
+                status_code=404,
+            )
+
+        if ref is None:
+            # 未拆分存储的结果直接返回
+            return Response(content=orjson.dumps(result), media_type="application/json")
+
+        return StreamingResponse(
+            iter_result(ref["digest"]),
+            media_type="application/json",
+            headers={
+                "Content-Length": str(ref["size"]),
+                "Content-Disposition": f'attachment; filename="{job_id}.json"',
+            },
+        )
+
     @app.get("/jobs", tags=["Jobs"])
     async def get_async_jobs(
         page: int = 1,
         size: int = 10,
         with_result: bool = False,
+        cursor: str | None = None,
+        job_type: JobType | None = None,
+        status: JobStatus | None = None,
     ) -> Response:
-        jobs = await async_job_manager.get_async_jobs(
-            page=page, size=size, with_result=with_result
-        )
+        """任务列表，传入上一页的 next_cursor 翻页，page 偏移分页仅为兼容保留"""
+        try:
+            jobs = await async_job_manager.get_async_jobs(
+                page=page,
+                size=size,
+                with_result=with_result,
+                cursor=cursor,
+                job_type=job_type,
+                status=status,
+            )
+        except ValueError as e:
+            return JSONResponse(
+                status_code=400,
+                content={"code": 400, "message": str(e), "data": None},
+            )
         return Response(
             content=orjson.dumps({"code": 200, "message": "success", "data": jobs}),
             media_type="application/json",
@@ -55,6 +55,19 @@ class GlobalSettings(BaseSettings):
         default="https://api.moonshot.cn/v1", description="OpenAI API 基础 URL"
     )
 
+    # Batch 配置
+    batch_backend: str = Field(
+        default="openai", description="批量推理后端(openai/local)"
+    )
+    batch_dir: str = Field(default="batches", description="本地批量文件目录")
+    batch_completion_window: str = Field(default="24h", description="批量任务完成窗口")
+    batch_poll_interval: float = Field(default=30.0, description="批量任务轮询间隔(秒)")
+
+    # 任务文件配置
+    artifact_dir: str = Field(
+        default="artifacts", description="任务上传文件与结果文件目录"
+    )
+
     # Sentence Transformer 配置
     sentence_transformer_model: str = Field(
         default=".huggingface/bge-large-zh-v1.5",
@@ -66,6 +79,94 @@ class GlobalSettings(BaseSettings):
         default="sqlite+aiosqlite:///db.sqlite3",
         description="数据库 URL",
     )
+    sqlite_busy_timeout: int = Field(
+        default=5000, description="SQLite 等待写锁的超时时间(毫秒)"
+    )
+    database_pool_size: int = Field(default=10, description="数据库连接池大小")
+    database_max_overflow: int = Field(
+        default=20, description="数据库连接池允许超出的连接数"
+    )
+    database_pool_timeout: float = Field(
+        default=30.0, description="获取数据库连接的超时时间(秒)"
+    )
+    database_pool_recycle: int = Field(
+        default=1800, description="数据库连接回收时间(秒)，-1 表示不回收"
+    )
+    sqlite_incremental_vacuum_pages: int = Field(
+        default=1000,
+        description="SQLite 增量 vacuum 每次回收的页数，保留期清理后分批归还空闲页，0 表示不启用增量 vacuum",
+    )
+
+    # 任务配置
+    job_store: str = Field(
+        default="database", description="任务存储后端(database/memory)"
+    )
+    job_update_flush_interval: float = Field(
+        default=0.5, description="任务进度合并写入间隔(秒)，0 表示每次更新立即写入"
+    )
+    job_count_cache_ttl: float = Field(
+        default=10.0, description="任务列表总数缓存有效期(秒)"
+    )
+    job_default_max_concurrency: int = Field(
+        default=2, description="每种任务类型默认的最大并发任务数"
+    )
+    job_max_concurrency: dict[str, int] = Field(
+        default={},
+        description='按任务类型配置的最大并发任务数，如 {"qa_generation": 1}',
+    )
+    job_llm_concurrency: int = Field(
+        default=16, description="所有任务共享的 LLM 并发上限，按任务轮转分配"
+    )
+    job_poll_interval: float = Field(default=1.0, description="任务队列轮询间隔(秒)")
+    job_execution: str = Field(
+        default="embedded",
+        description="任务执行方式：embedded(API 进程内执行)/worker(仅由独立 worker 进程执行)",
+    )
+    job_lease_ttl: float = Field(
+        default=60.0, description="任务租约有效期(秒)，过期未续约的任务可被其他进程领取"
+    )
+    job_heartbeat_interval: float = Field(
+        default=15.0, description="运行中任务的租约续约间隔(秒)"
+    )
+    job_cancel_poll_interval: float = Field(
+        default=1.0,
+        description="执行进程轮询任务取消请求的间隔(秒)，被其他进程取消的任务在下一个 context 或问答边界停止",
+    )
+    job_shard_max_attempts: int = Field(
+        default=3, description="任务分片最多领取次数，超过后分片及所属任务失败"
+    )
+    job_shard_steal_after: float = Field(
+        default=300.0,
+        description="分片运行超过该时间(秒)时，任务协调者空闲后重复执行该分片",
+    )
+
+    # 任务保留期配置
+    job_default_result_retention_days: float = Field(
+        default=0,
+        description="终态任务结果的默认保留天数，过期后删除结果文件，任务记录只保留计数等摘要，0 表示永久保留",
+    )
+    job_result_retention_days: dict[str, float] = Field(
+        default={},
+        description='按任务类型或 任务类型:状态 配置的结果保留天数，如 {"qa_generation": 90, "qa_generation:failed": 7}',
+    )
+    job_default_retention_days: float = Field(
+        default=0,
+        description="终态任务记录的默认保留天数，过期后删除，0 表示永久保留",
+    )
+    job_retention_days: dict[str, float] = Field(
+        default={},
+        description='按任务类型或 任务类型:状态 配置的任务记录保留天数，如 {"answer_enhancement:cancelled": 7}',
+    )
+    job_retention_sweep_interval: float = Field(
+        default=3600.0, description="保留期清理间隔(秒)，0 表示不清理"
+    )
+    job_retention_batch_size: int = Field(
+        default=500, description="保留期清理每个事务处理的记录数，避免长时间持有写锁"
+    )
+    artifact_orphan_grace: float = Field(
+        default=86400.0,
+        description="未被任务引用的结果文件与上传文件在修改后保留的时间(秒)，超过后由保留期清理删除",
+    )
 
 
 settings = GlobalSettings()
@@ -0,0 +1,163 @@
+"""任务文件存储：上传文件、结果文件与压缩的任务结果"""
+
+import zlib
+import uuid
+import shutil
+import asyncio
+import hashlib
+import logging
+from collections.abc import Iterator
+from pathlib import Path
+from types import TracebackType
+from typing import BinaryIO
+
+import orjson
+from fastapi import UploadFile
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+RESULT_CHUNK_SIZE = 64 * 1024
+
+
+def artifact_path(name: str) -> Path:
+    """结果文件路径"""
+    return Path(settings.artifact_dir) / name
+
+
+def new_upload_path(suffix: str) -> Path:
+    """新的上传文件路径"""
+    path = Path(settings.artifact_dir) / "uploads" / f"{uuid.uuid4()}{suffix}"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def write_upload(content: bytes, suffix: str) -> Path:
+    """将请求体中的任务输入写入上传文件，任务参数只记录文件路径"""
+    path = new_upload_path(suffix)
+    path.write_bytes(content)
+    return path
+
+
+async def save_upload(file: UploadFile, suffix: str) -> Path:
+    """在线程中分块复制上传文件，避免整体读入内存与阻塞事件循环"""
+    path = await asyncio.to_thread(new_upload_path, suffix)
+    await file.seek(0)
+    await asyncio.to_thread(_copy_upload, file.file, path)
+    return path
+
+
+def _copy_upload(source: BinaryIO, path: Path) -> None:
+    with open(path, "wb") as f:
+        shutil.copyfileobj(source, f, UPLOAD_CHUNK_SIZE)
+
+
+class JSONLArtifactWriter:
+    """JSONL 结果文件写入器
+
+    逐行写入临时文件，正常退出时重命名为结果文件，异常退出时删除临时文件，
+    下载接口不会读到未写完的结果。
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.path = artifact_path(name)
+        self._tmp_path = self.path.with_name(f"{self.path.name}.part")
+        self._file = None
+        self.lines = 0
+
+    def __enter__(self) -> "JSONLArtifactWriter":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self._tmp_path, "wb")
+        return self
+
+    def write(self, record: dict) -> None:
+        self._file.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE))
+        self.lines += 1
+
+    def write_many(self, records: list[dict]) -> None:
+        """批量写入，可在线程中调用"""
+        self._file.write(
+            b"".join(
+                orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+                for record in records
+            )
+        )
+        self.lines += len(records)
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self._file.close()
+        if exc_type is None:
+            self._tmp_path.replace(self.path)
+        else:
+            self._tmp_path.unlink(missing_ok=True)
+            logger.warning(f"{self.__class__.__name__} discarded {self.name}")
+
+
+def result_path(digest: str) -> Path:
+    """压缩的任务结果路径，按内容摘要寻址"""
+    return Path(settings.artifact_dir) / "results" / digest[:2] / f"{digest}.json.zz"
+
+
+def store_result(result: dict) -> dict:
+    """将任务结果中的列表等大字段移出任务记录
+
+    完整结果序列化后以 zlib 压缩，按 sha256 摘要存储，相同内容只存一份。
+    返回结果中的标量字段(如各类计数)与结果引用 result_ref，没有大字段时原样返回。
+    """
+    summary = {k: v for k, v in result.items() if not isinstance(v, (list, dict))}
+    if len(summary) == len(result):
+        return result
+
+    content = orjson.dumps(result)
+    digest = hashlib.sha256(content).hexdigest()
+    path = result_path(digest)
+    if path.exists():
+        # 更新修改时间，保留期清理不会删除刚被新任务引用的结果文件
+        path.touch()
+    else:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4()}.part")
+        tmp_path.write_bytes(zlib.compress(content))
+        tmp_path.replace(path)
+
+    summary["result_ref"] = {
+        "digest": digest,
+        "size": len(content),
+        "compressed_size": path.stat().st_size,
+    }
+    return summary
+
+
+def expire_result(result: dict) -> dict | None:
+    """过期的任务结果只保留计数等标量摘要，去掉结果引用、结果文件名与内嵌的大字段
+
+    返回标记 expired 的摘要，没有可去掉的字段时返回 None
+    """
+    summary = {
+        k: v
+        for k, v in result.items()
+        if k != "artifact" and not isinstance(v, (list, dict))
+    }
+    if len(summary) == len(result):
+        return None
+    summary["expired"] = True
+    return summary
+
+
+def iter_result(digest: str) -> Iterator[bytes]:
+    """分块读取并解压任务结果"""
+    decompressor = zlib.decompressobj()
+    with open(result_path(digest), "rb") as f:
+        while chunk := f.read(RESULT_CHUNK_SIZE):
+            if data := decompressor.decompress(chunk):
+                yield data
+    if data := decompressor.flush():
+        yield data
@@ -0,0 +1,252 @@
+"""批量推理后端（OpenAI 兼容 Batch 接口）"""
+
+import uuid
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+import orjson
+from openai import AsyncOpenAI
+
+from app.core.exceptions import BatchError
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+# 批量任务终态
+BATCH_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+def build_batch_request(custom_id: str, body: dict) -> dict:
+    """构建单行批量请求"""
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": body,
+    }
+
+
+def parse_batch_output(content: bytes) -> dict[str, str | None]:
+    """解析批量输出文件，返回 custom_id -> 响应文本（失败为 None）"""
+    results = {}
+    for line in content.splitlines():
+        if not line.strip():
+            continue
+        item = orjson.loads(line)
+        response = item.get("response") or {}
+        body = response.get("body") or {}
+        if item.get("error") or response.get("status_code") != 200:
+            logger.error(
+                f"Batch request {item.get('custom_id')} failed: {item.get('error') or body}"
+            )
+            results[item["custom_id"]] = None
+            continue
+        try:
+            results[item["custom_id"]] = body["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError):
+            logger.error(
+                f"Batch request {item.get('custom_id')} has no content: {body}"
+            )
+            results[item["custom_id"]] = None
+    return results
+
+
+class BatchBackend(ABC):
+    """批量推理后端抽象基类"""
+
+    @abstractmethod
+    async def submit(self, requests: list[dict]) -> str:
+        """提交批量请求，返回 batch_id"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def status(self, batch_id: str) -> str:
+        """查询批量任务状态"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def results(self, batch_id: str) -> dict[str, str | None]:
+        """获取批量任务结果"""
+        raise NotImplementedError
+
+    async def run(
+        self, requests: list[dict], poll_interval: float
+    ) -> dict[str, str | None]:
+        """提交批量请求并轮询直至完成"""
+        if not requests:
+            return {}
+
+        batch_id = await self.submit(requests)
+        logger.info(
+            f"{self.__class__.__name__} submitted batch {batch_id} with {len(requests)} requests"
+        )
+
+        while (status := await self.status(batch_id)) not in BATCH_TERMINAL_STATUSES:
+            await asyncio.sleep(poll_interval)
+
+        if status != "completed":
+            raise BatchError(f"Batch {batch_id} finished with status: {status}")
+
+        results = await self.results(batch_id)
+        logger.info(
+            f"{self.__class__.__name__} batch {batch_id} completed with {len(results)} results"
+        )
+        return results
+
+
+class OpenAIBatchBackend(BatchBackend):
+    """OpenAI 兼容 Batch 接口后端"""
+
+    def __init__(self, openai_client: AsyncOpenAI, completion_window: str = "24h"):
+        """初始化 OpenAI 批量推理后端"""
+        self.client = openai_client
+        self.completion_window = completion_window
+
+    async def submit(self, requests: list[dict]) -> str:
+        """上传 JSONL 文件并创建批量任务"""
+        content = b"\n".join(orjson.dumps(request) for request in requests)
+        input_file = await self.client.files.create(
+            file=("batch.jsonl", content), purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    async def status(self, batch_id: str) -> str:
+        """查询批量任务状态"""
+        batch = await self.client.batches.retrieve(batch_id)
+        return batch.status
+
+    async def results(self, batch_id: str) -> dict[str, str | None]:
+        """下载输出文件与错误文件并解析"""
+        batch = await self.client.batches.retrieve(batch_id)
+        results = {}
+        for file_id in (batch.error_file_id, batch.output_file_id):
+            if not file_id:
+                continue
+            response = await self.client.files.content(file_id)
+            results.update(parse_batch_output(response.read()))
+        return results
+
+
+class LocalBatchBackend(BatchBackend):
+    """本地文件批量推理后端
+
+    以 JSONL 文件模拟批量接口：提交时写入 input.jsonl，
+    后台逐条调用 handler 执行，完成后写入 output.jsonl，无需 Batch 接口支持
+    """
+
+    def __init__(
+        self,
+        batch_dir: str | Path,
+        handler: Callable[[dict], Awaitable[dict]],
+        max_concurrency: int = 4,
+    ):
+        """初始化本地批量推理后端
+
+        Args:
+            batch_dir: 批量文件目录
+            handler: 请求处理函数，接收请求 body，返回 chat completion 响应字典
+            max_concurrency: 最大并发数
+        """
+        self.batch_dir = Path(batch_dir)
+        self.handler = handler
+        self.max_concurrency = max_concurrency
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    @classmethod
+    def from_openai_client(
+        cls, batch_dir: str | Path, openai_client: AsyncOpenAI, max_concurrency: int = 4
+    ) -> "LocalBatchBackend":
+        """使用 OpenAI 客户端逐条执行请求"""
+
+        async def handler(body: dict) -> dict:
+            response = await openai_client.chat.completions.create(**body)
+            return response.model_dump()
+
+        return cls(batch_dir, handler, max_concurrency)
+
+    async def submit(self, requests: list[dict]) -> str:
+        """写入输入文件并在后台执行"""
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        path = self.batch_dir / batch_id
+        path.mkdir(parents=True, exist_ok=True)
+        (path / "input.jsonl").write_bytes(
+            b"\n".join(orjson.dumps(request) for request in requests)
+        )
+        (path / "status").write_text("in_progress")
+
+        self._tasks[batch_id] = asyncio.create_task(self._execute(batch_id))
+        return batch_id
+
+    async def status(self, batch_id: str) -> str:
+        """读取状态文件"""
+        path = self.batch_dir / batch_id / "status"
+        if not path.exists():
+            raise BatchError(f"Batch {batch_id} not found")
+        return path.read_text().strip()
+
+    async def results(self, batch_id: str) -> dict[str, str | None]:
+        """读取输出文件"""
+        return parse_batch_output(
+            (self.batch_dir / batch_id / "output.jsonl").read_bytes()
+        )
+
+    async def _execute(self, batch_id: str) -> None:
+        """逐条执行输入文件中的请求"""
+        path = self.batch_dir / batch_id
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def _run(request: dict) -> dict:
+            async with semaphore:
+                try:
+                    body = await self.handler(request["body"])
+                    return {
+                        "id": f"req_{uuid.uuid4().hex}",
+                        "custom_id": request["custom_id"],
+                        "response": {"status_code": 200, "body": body},
+                        "error": None,
+                    }
+                except Exception as e:
+                    logger.warning(
+                        f"{self.__class__.__name__} request {request['custom_id']} failed: {e}"
+                    )
+                    return {
+                        "id": f"req_{uuid.uuid4().hex}",
+                        "custom_id": request["custom_id"],
+                        "response": None,
+                        "error": {"code": "request_failed", "message": str(e)},
+                    }
+
+        try:
+            requests = [
+                orjson.loads(line)
+                for line in (path / "input.jsonl").read_bytes().splitlines()
+                if line.strip()
+            ]
+            outputs = await asyncio.gather(*[_run(request) for request in requests])
+            (path / "output.jsonl").write_bytes(
+                b"\n".join(orjson.dumps(output) for output in outputs)
+            )
+            (path / "status").write_text("completed")
+        except Exception:
+            logger.exception("Local batch %s failed", batch_id)
+            (path / "status").write_text("failed")
+        finally:
+            self._tasks.pop(batch_id, None)
+
+
+def create_batch_backend(
+    backend: str, openai_client: AsyncOpenAI, batch_dir: str, completion_window: str
+) -> BatchBackend:
+    """根据配置创建批量推理后端"""
+    if backend == "local":
+        return LocalBatchBackend.from_openai_client(batch_dir, openai_client)
+    return OpenAIBatchBackend(openai_client, completion_window)
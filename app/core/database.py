@@ -1,17 +1,66 @@
+import logging
 from datetime import datetime
 
 import orjson
-from sqlalchemy import DateTime, JSON, TypeDecorator, inspect
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy import (
+    Connection,
+    DateTime,
+    Index,
+    JSON,
+    TypeDecorator,
+    event,
+    false,
+    inspect,
+    make_url,
+)
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 from app.config import settings
-from app.core.enum import JobStatus, JobType
+from app.core.enum import JobPriority, JobStatus, JobType
 
-async_engine = create_async_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False},
-)
+logger = logging.getLogger(__name__)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """WAL 模式下读写互不阻塞，synchronous=NORMAL 提交时不再每次 fsync
+
+    auto_vacuum=INCREMENTAL 只对新建的数据库直接生效，已存在的数据库由 app.maintenance 手动转换
+    """
+    cursor = dbapi_connection.cursor()
+    if settings.sqlite_incremental_vacuum_pages > 0:
+        cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout}")
+    cursor.close()
+
+
+def create_database_engine(database_url: str) -> AsyncEngine:
+    """按数据库类型创建引擎
+
+    SQLite 在连接时设置 WAL、synchronous=NORMAL 与 busy_timeout；
+    其他数据库(如 postgresql+asyncpg)使用连接池配置。
+    """
+    if make_url(database_url).get_backend_name() == "sqlite":
+        engine = create_async_engine(
+            database_url, connect_args={"check_same_thread": False}
+        )
+        event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
+        return engine
+
+    return create_async_engine(
+        database_url,
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        pool_timeout=settings.database_pool_timeout,
+        pool_recycle=settings.database_pool_recycle,
+        pool_pre_ping=True,
+    )
+
+
+async_engine = create_database_engine(settings.database_url)
 
 async_session = async_sessionmaker(
     async_engine,
@@ -24,9 +73,9 @@ class Base(DeclarativeBase):
 
 
 class OrJSON(TypeDecorator):
-    """ORJSON类型增强"""
+    """ORJSON类型增强，None 存为 SQL NULL"""
 
-    impl = JSON
+    impl = JSON(none_as_null=True)
     cache_ok = True
 
     def process_bind_param(self, value, dialect):
@@ -63,6 +112,20 @@ class Job(Base, LoadOnlyDictMixin):
     """异步任务模型"""
 
     __tablename__ = "jobs"
+    # 列表按 (created_at, id) 倒序翻页，可按任务类型或状态过滤；
+    # 调度时按 (priority 倒序, created_at, id) 领取待执行任务
+    __table_args__ = (
+        Index("ix_jobs_created_at_id", "created_at", "id"),
+        Index("ix_jobs_job_type_created_at_id", "job_type", "created_at", "id"),
+        Index("ix_jobs_status_created_at_id", "status", "created_at", "id"),
+        Index(
+            "ix_jobs_status_priority_created_at_id",
+            "status",
+            "priority",
+            "created_at",
+            "id",
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     job_id: Mapped[str] = mapped_column(unique=True, index=True, nullable=False)
@@ -71,7 +134,141 @@ class Job(Base, LoadOnlyDictMixin):
     progress: Mapped[int] = mapped_column(nullable=False, default=0)
     result: Mapped[dict | None] = mapped_column(OrJSON, nullable=True)
     error: Mapped[str | None] = mapped_column(nullable=True)
+    priority: Mapped[int] = mapped_column(
+        nullable=False, default=JobPriority.NORMAL, server_default="1"
+    )
+    # 任务处理器名称与参数，调度执行时传入处理器
+    payload: Mapped[dict | None] = mapped_column(OrJSON, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(LocalDatetime, default=datetime.now)
+    started_at: Mapped[datetime | None] = mapped_column(LocalDatetime, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        LocalDatetime, default=datetime.now, onupdate=datetime.now
+    )
+    # 运行中任务的租约：执行进程定期续约，过期后任务可被其他进程重新领取
+    lease_owner: Mapped[str | None] = mapped_column(nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(
+        LocalDatetime, nullable=True
+    )
+    # 运行中任务的取消请求：执行进程轮询到后在下一个 context 或问答边界停止并标记为取消
+    cancel_requested: Mapped[bool] = mapped_column(
+        nullable=False, default=False, server_default=false()
+    )
+
+
+class JobShard(Base, LoadOnlyDictMixin):
+    """任务分片模型，大任务按输入拆分的子工作单元，可由任意进程领取执行"""
+
+    __tablename__ = "job_shards"
+    # 按任务查询分片进度与结果；调度时按 (status, id) 领取待执行分片
+    __table_args__ = (
+        Index("ix_job_shards_job_id_shard_index", "job_id", "shard_index", unique=True),
+        Index("ix_job_shards_status_id", "status", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    job_id: Mapped[str] = mapped_column(nullable=False)
+    job_type: Mapped[JobType] = mapped_column(nullable=False)
+    shard_index: Mapped[int] = mapped_column(nullable=False)
+    # 分片处理器名称与输入
+    handler: Mapped[str] = mapped_column(nullable=False)
+    inputs: Mapped[list | None] = mapped_column(OrJSON, nullable=True)
+    status: Mapped[JobStatus] = mapped_column(nullable=False, default=JobStatus.PENDING)
+    result: Mapped[dict | None] = mapped_column(OrJSON, nullable=True)
+    error: Mapped[str | None] = mapped_column(nullable=True)
+    # 领取次数，执行失败或租约过期重新领取时累加
+    attempts: Mapped[int] = mapped_column(nullable=False, default=0)
+    lease_owner: Mapped[str | None] = mapped_column(nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(
+        LocalDatetime, nullable=True
+    )
+    started_at: Mapped[datetime | None] = mapped_column(LocalDatetime, nullable=True)
     created_at: Mapped[datetime] = mapped_column(LocalDatetime, default=datetime.now)
     updated_at: Mapped[datetime] = mapped_column(
         LocalDatetime, default=datetime.now, onupdate=datetime.now
     )
+
+
+class GuidanceDescription(Base, LoadOnlyDictMixin):
+    """图片/视频描述缓存模型，以答案中的媒体链接与问题主题为键"""
+
+    __tablename__ = "guidance_descriptions"
+
+    cache_key: Mapped[str] = mapped_column(primary_key=True)
+    media: Mapped[list | None] = mapped_column(OrJSON, nullable=True)
+    topic: Mapped[str] = mapped_column(nullable=False, default="")
+    description: Mapped[str] = mapped_column(nullable=False, default="")
+    created_at: Mapped[datetime] = mapped_column(LocalDatetime, default=datetime.now)
+    updated_at: Mapped[datetime] = mapped_column(
+        LocalDatetime, default=datetime.now, onupdate=datetime.now, index=True
+    )
+
+
+class QAPair(Base, LoadOnlyDictMixin):
+    """QA对模型，任务生成的QA对逐条入库，支持跨任务按意图、产品等查询"""
+
+    __tablename__ = "qa_pairs"
+    # 列表按 (created_at, id) 倒序翻页，可按意图、产品或任务过滤
+    __table_args__ = (
+        Index("ix_qa_pairs_created_at_id", "created_at", "id"),
+        Index("ix_qa_pairs_intent_created_at_id", "intent", "created_at", "id"),
+        Index(
+            "ix_qa_pairs_product_intent_created_at_id",
+            "product",
+            "intent",
+            "created_at",
+            "id",
+        ),
+        Index("ix_qa_pairs_job_id_id", "job_id", "id"),
+        Index("ix_qa_pairs_question_hash", "question_hash"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    job_id: Mapped[str] = mapped_column(nullable=False)
+    intent: Mapped[str] = mapped_column(nullable=False, default="")
+    product: Mapped[str | None] = mapped_column(nullable=True)
+    question_hash: Mapped[str] = mapped_column(nullable=False)
+    question: Mapped[str] = mapped_column(nullable=False)
+    answer: Mapped[str] = mapped_column(nullable=False)
+    enhanced_answer: Mapped[str | None] = mapped_column(nullable=True)
+    # metadata 为 DeclarativeBase 保留属性名
+    meta: Mapped[dict | None] = mapped_column("metadata", OrJSON, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(LocalDatetime, default=datetime.now)
+
+
+def create_missing_columns(connection: Connection) -> None:
+    """为已存在的表补充新增的列，新增列需可为空或带有 server_default"""
+    inspector = inspect(connection)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            # 列定义(类型、默认值、是否可为空)按数据库方言渲染，如布尔默认值 SQLite 为 0、PostgreSQL 为 false
+            column_ddl = CreateColumn(column).compile(dialect=connection.dialect)
+            table_name = connection.dialect.identifier_preparer.format_table(table)
+            connection.exec_driver_sql(
+                f"ALTER TABLE {table_name} ADD COLUMN {column_ddl}"
+            )
+
+
+def enable_incremental_vacuum(connection: Connection) -> None:
+    """将已存在的 SQLite 数据库转换为增量 vacuum 模式，需在自动提交的连接上执行
+
+    auto_vacuum 模式只在 VACUUM 重建数据库后生效，转换只需执行一次，数据库较大时耗时较长，
+    期间独占数据库，由 app.maintenance 在停止服务后执行
+    """
+    if connection.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2:
+        return
+
+    logger.info("Converting SQLite database to incremental auto vacuum")
+    connection.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+    connection.exec_driver_sql("VACUUM")
+
+
+def create_missing_indexes(connection: Connection) -> None:
+    """为已存在的表补建新增的索引，create_all 不会修改已存在的表"""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
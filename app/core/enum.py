@@ -1,4 +1,4 @@
-from enum import Enum
+from enum import Enum, IntEnum
 
 
 class JobStatus(Enum):
@@ -17,3 +17,12 @@ class JobType(Enum):
     UNKNOWN = "unknown"
     QA_GENERATION = "qa_generation"
     ANSWER_ENHANCEMENT = "answer_enhancement"
+    QA_PIPELINE = "qa_pipeline"  # QA 生成后直接答案增强
+
+
+class JobPriority(IntEnum):
+    """任务优先级，数值越大越先执行"""
+
+    LOW = 0
+    NORMAL = 1
+    HIGH = 2
@@ -0,0 +1,9 @@
+import asyncio
+
+
+class BatchError(Exception):
+    """批量推理异常"""
+
+
+class JobCancelledError(asyncio.CancelledError):
+    """任务已请求取消，继承 CancelledError 使处理器中的 except Exception 不会将其记为任务失败"""
@@ -1,17 +1,62 @@
+import os
+import time
 import uuid
+import base64
+import socket
 import asyncio
 import logging
-from collections.abc import Callable
-from typing import Any, Coroutine, Self
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+from typing import Any, Self
 
-from sqlalchemy import func, select, update
-from sqlalchemy.orm import load_only
+import orjson
+from prometheus_client import Counter, Gauge, Histogram
 
-from app.core.database import async_session, Job
-from app.core.enum import JobStatus, JobType
+from app.config import settings
+from app.core.artifacts import store_result
+from app.core.enum import JobPriority, JobStatus, JobType
+from app.core.exceptions import JobCancelledError
+from app.core.scheduler import (
+    JOB_HANDLERS,
+    SHARD_HANDLERS,
+    cancel_requested_jobs,
+    current_job_id,
+    load_job_handlers,
+    raise_if_cancelled,
+)
+from app.core.shards import ShardStore, shard_store
+from app.core.stores import TERMINAL_JOB_STATUSES, JobStore, create_job_store
 
 logger = logging.getLogger(__name__)
 
+# mode 取值 write_through(立即写入)/buffered(合并写入)
+JOB_STATE_UPDATES = Counter("job_state_updates_total", "Job state updates", ["mode"])
+JOB_STATE_COMMITS = Counter(
+    "job_state_commits_total", "Job state database commits", ["mode"]
+)
+JOB_QUEUE_DEPTH = Gauge("job_queue_depth", "Pending jobs in the queue", ["job_type"])
+JOBS_RUNNING = Gauge("jobs_running", "Jobs running in this process", ["job_type"])
+JOB_QUEUE_WAIT = Histogram(
+    "job_queue_wait_seconds",
+    "Time from job creation to start",
+    ["job_type"],
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600),
+)
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    """编码分页游标"""
+    return base64.urlsafe_b64encode(orjson.dumps([created_at.isoformat(), id])).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """解码分页游标，格式错误时抛出 ValueError"""
+    try:
+        created_at, id = orjson.loads(base64.urlsafe_b64decode(cursor))
+        return datetime.fromisoformat(created_at), int(id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
 
 class AsyncJobManager:
     """异步任务管理器"""
@@ -29,114 +74,545 @@ class AsyncJobManager:
             return
         self._initialized = True
 
+        # 任务存储后端
+        self._store: JobStore = create_job_store(settings.job_store)
+
+        # 任务分片存储，分片依赖数据库中的任务记录，内存任务存储时分片在协调者内依次执行
+        self._shards: ShardStore | None = (
+            shard_store if settings.job_store == "database" else None
+        )
+
         # 运行中的异步任务：job_id -> asyncio.Task，用于取消等操作
         self._async_tasks: dict[str, asyncio.Task] = {}
+        # 本进程调度执行的分片：(job_id, 分片 id) -> asyncio.Task
+        self._shard_tasks: dict[tuple[str, int], asyncio.Task] = {}
+
+        # 待写入的非终态更新：job_id -> 最新字段值，按间隔合并为一个事务写入
+        self._pending_updates: dict[str, dict[str, Any]] = {}
+        self._flush_interval = settings.job_update_flush_interval
+        self._flush_task: asyncio.Task | None = None
+
+        # 任务列表总数缓存：过滤条件 -> (过期时间, 总数)
+        self._count_cache: dict[tuple, tuple[float, int]] = {}
+
+        # 调度：处理器运行上下文、各类型运行中的任务数、唤醒调度的事件
+        self._context: Any = None
+        self._running: dict[JobType, int] = {}
+        self._wakeup: asyncio.Event | None = None
+        self._dispatch_task: asyncio.Task | None = None
+        self._heartbeat_task: asyncio.Task | None = None
+        self._cancel_task: asyncio.Task | None = None
+        self._stopping = False
+        self._stopped: asyncio.Event | None = None
+        # 本进程的租约持有者标识与可领取的任务类型
+        self._worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._job_types: list[JobType] = list(JobType)
 
     async def create_async_job(
         self,
         job_type: JobType,
-        coro: Callable[..., Coroutine[Any, Any, None]],
-        *args: Any,
+        handler: str,
+        priority: JobPriority = JobPriority.NORMAL,
         **kwargs: Any,
     ) -> str:
-        """创建异步任务记录"""
+        """创建异步任务并加入队列
+
+        handler 为 job_handler 注册的处理器名称，kwargs 为处理器参数，需可 JSON 序列化。
+        任务按优先级与创建顺序执行，每种任务类型的并发数受 job_max_concurrency 限制。
+        """
         job_id = str(uuid.uuid4())
+        await self._store.create(
+            job_id, job_type, {"handler": handler, "kwargs": kwargs}, priority
+        )
+        self._wake()
+        return job_id
 
-        async with async_session() as session:
-            job = Job(
-                job_id=job_id,
-                job_type=job_type,
-            )
-            session.add(job)
-            await session.commit()
+    async def start(self, context: Any, job_types: list[JobType] | None = None) -> None:
+        """启动任务调度，context 为传给处理器的运行上下文(如 app.state)
+
+        job_types 为本进程领取的任务类型，默认全部。执行中的任务定期续约，
+        进程退出或失联导致租约过期的任务由其他进程(或重启后的本进程)重新领取；
+        同时轮询执行中任务的取消请求，被其他进程取消的任务在下一个 context 或问答边界停止。
+        """
+        load_job_handlers()
+        self._context = context
+        self._job_types = job_types or list(JobType)
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._stopped = asyncio.Event()
+        self._dispatch_task = asyncio.create_task(self._dispatch_loop())
+        self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        self._cancel_task = asyncio.create_task(self._cancel_loop())
+        logger.info(
+            f"Job scheduler {self._worker_id} started for "
+            f"{[job_type.value for job_type in self._job_types]}"
+        )
+
+    @property
+    def worker_id(self) -> str:
+        """本进程的租约持有者标识"""
+        return self._worker_id
+
+    @property
+    def stopping(self) -> bool:
+        """进程是否正在停止，运行中的任务取消后放回队列"""
+        return self._stopping
+
+    async def stop(self) -> None:
+        """停止任务调度，运行中的任务与分片取消后放回队列，由其他进程或下次启动时重新执行"""
+        self._stopping = True
+        # 调度与续约循环在当前数据库操作完成后退出，避免取消时事务中断导致连接持有写锁
+        loops = [
+            t
+            for t in (self._dispatch_task, self._heartbeat_task, self._cancel_task)
+            if t is not None
+        ]
+        self._wake()
+        if self._stopped is not None:
+            self._stopped.set()
+        await asyncio.gather(*loops, return_exceptions=True)
+
+        tasks = [*self._async_tasks.values(), *self._shard_tasks.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._shards is not None and loops:
+            released = await self._shards.release(self._worker_id)
+            if released:
+                logger.info(f"Released {released} job shards")
+        self._dispatch_task = None
+        self._heartbeat_task = None
+        self._cancel_task = None
+        self._wakeup = None
+        self._stopped = None
+
+    def _wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _dispatch_loop(self) -> None:
+        # 新任务入队或任务结束时立即调度，否则按间隔轮询其他进程写入的任务
+        while not self._stopping:
+            self._wakeup.clear()
+            try:
+                await self._dispatch()
+            except Exception:
+                logger.exception("Failed to dispatch jobs")
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=settings.job_poll_interval
+                )
+            except TimeoutError:
+                pass
 
+    async def _wait_stopped(self, timeout: float) -> bool:
+        """等待调度停止，返回是否已停止"""
+        try:
+            await asyncio.wait_for(self._stopped.wait(), timeout=timeout)
+            return True
+        except TimeoutError:
+            return False
+
+    async def _heartbeat_loop(self) -> None:
+        while not await self._wait_stopped(settings.job_heartbeat_interval):
             try:
-                task = asyncio.create_task(coro(job_id, *args, **kwargs))
-                self._async_tasks[job_id] = task
-                await self.update_async_job(job_id, status=JobStatus.RUNNING)
-            except Exception as e:
-                logger.exception(
-                    "Failed to create async task for job %s", job_id, exc_info=True
+                await self._renew_leases()
+            except Exception:
+                logger.exception("Failed to renew job leases")
+
+    async def _cancel_loop(self) -> None:
+        while not await self._wait_stopped(settings.job_cancel_poll_interval):
+            try:
+                await self._poll_cancel_requests()
+            except Exception:
+                logger.exception("Failed to poll job cancel requests")
+
+    async def _poll_cancel_requests(self) -> None:
+        """查询本进程执行中的任务与分片所属任务的取消请求，任务在下一个 context 或问答边界停止"""
+        job_ids = {*self._async_tasks, *(job_id for job_id, _ in self._shard_tasks)}
+        cancel_requested_jobs.intersection_update(job_ids)
+        requested = await self._store.cancel_requested(list(job_ids))
+        for job_id in requested - cancel_requested_jobs:
+            logger.info(f"Job {job_id} cancel requested")
+        cancel_requested_jobs.update(requested)
+
+    async def _renew_leases(self) -> None:
+        """续约运行中任务与分片的租约，已被取消或被其他进程领取的任务停止执行"""
+        if self._shards is not None:
+            await self._shards.renew(self._worker_id, settings.job_lease_ttl)
+        job_ids = list(self._async_tasks)
+        renewed = await self._store.renew_leases(
+            self._worker_id, job_ids, settings.job_lease_ttl
+        )
+        for job_id in job_ids:
+            # 续约期间已结束的任务不在 _async_tasks 中
+            if job_id in renewed or job_id not in self._async_tasks:
+                continue
+            logger.warning(f"Job {job_id} lease lost, stopping execution")
+            self._pending_updates.pop(job_id, None)
+            self._async_tasks[job_id].cancel()
+
+    async def _dispatch(self) -> None:
+        """按各任务类型的并发上限领取待执行任务，有剩余名额时领取其他任务的分片"""
+        while job_types := self._available_job_types():
+            claimed = await self._store.claim(
+                job_types, self._worker_id, settings.job_lease_ttl
+            )
+            if claimed is None:
+                break
+
+            job, created_at = claimed
+            job_type = job["job_type"]
+            JOB_QUEUE_WAIT.labels(job_type.value).observe(
+                (datetime.now() - created_at).total_seconds()
+            )
+            self._acquire_slot(job_type)
+            self._async_tasks[job["job_id"]] = asyncio.create_task(self._run_job(job))
+
+        while self._shards is not None and (job_types := self._available_job_types()):
+            shard = await self._shards.claim(
+                job_types,
+                self._worker_id,
+                settings.job_lease_ttl,
+                settings.job_shard_max_attempts,
+            )
+            if shard is None:
+                break
+
+            self._acquire_slot(shard["job_type"])
+            self._shard_tasks[(shard["job_id"], shard["id"])] = asyncio.create_task(
+                self._run_shard(shard)
+            )
+
+        for job_type in self._job_types:
+            JOB_QUEUE_DEPTH.labels(job_type.value).set(
+                await self._store.count(
+                    {"status": JobStatus.PENDING, "job_type": job_type}
                 )
-                await self.update_async_job(
-                    job_id, status=JobStatus.FAILED, error=str(e)
+            )
+
+    def _available_job_types(self) -> list[JobType]:
+        if self._stopping:
+            return []
+        return [
+            job_type
+            for job_type in self._job_types
+            if self._running.get(job_type, 0) < self._max_concurrency(job_type)
+        ]
+
+    def _acquire_slot(self, job_type: JobType) -> None:
+        self._running[job_type] = self._running.get(job_type, 0) + 1
+        JOBS_RUNNING.labels(job_type.value).set(self._running[job_type])
+
+    def _release_slot(self, job_type: JobType) -> None:
+        self._running[job_type] -= 1
+        JOBS_RUNNING.labels(job_type.value).set(self._running[job_type])
+        self._wake()
+
+    @staticmethod
+    def _max_concurrency(job_type: JobType) -> int:
+        return settings.job_max_concurrency.get(
+            job_type.value, settings.job_default_max_concurrency
+        )
+
+    async def _run_job(self, job: dict) -> None:
+        """执行任务处理器，处理器内的 LLM 调用通过 llm_slot 按任务轮转共享名额"""
+        job_id, job_type = job["job_id"], job["job_type"]
+        payload = job["payload"] or {}
+        current_job_id.set(job_id)
+        try:
+            # 执行进程退出后被重新领取的任务，此前已请求取消时不再执行
+            if job.get("cancel_requested"):
+                cancel_requested_jobs.add(job_id)
+                raise_if_cancelled()
+            handler = JOB_HANDLERS.get(payload.get("handler"))
+            if handler is None:
+                raise ValueError(f"Unknown job handler: {payload.get('handler')}")
+            await handler(job_id, self._context, **payload.get("kwargs", {}))
+        except asyncio.CancelledError:
+            # JobCancelledError 经子任务传播后变为 CancelledError，按是否请求取消区分
+            if not self._stopping and job_id in cancel_requested_jobs:
+                logger.info(f"Job {job_id} cancelled")
+                await self.update_async_job(job_id, status=JobStatus.CANCELLED)
+                return
+            if self._stopping:
+                self._pending_updates.pop(job_id, None)
+                await self._store.update(
+                    job_id,
+                    {
+                        "status": JobStatus.PENDING,
+                        "progress": 0,
+                        "started_at": None,
+                        "lease_owner": None,
+                        "lease_expires_at": None,
+                    },
+                    expected_status=JobStatus.RUNNING,
                 )
-        return job_id
+            raise
+        except Exception as e:
+            logger.exception(f"Job {job_id} failed")
+            await self.update_async_job(job_id, status=JobStatus.FAILED, error=str(e))
+        finally:
+            self._async_tasks.pop(job_id, None)
+            cancel_requested_jobs.discard(job_id)
+            self._release_slot(job_type)
+
+    async def _run_shard(self, shard: dict) -> None:
+        """执行调度领取的分片，LLM 名额计入分片所属的任务"""
+        current_job_id.set(shard["job_id"])
+        try:
+            await self._execute_shard(shard)
+        finally:
+            self._shard_tasks.pop((shard["job_id"], shard["id"]), None)
+            self._release_slot(shard["job_type"])
+
+    async def _execute_shard(self, shard: dict) -> bool:
+        """执行分片并写入结果，失败时按领取次数放回队列或标记失败，返回是否成功"""
+        try:
+            handler = SHARD_HANDLERS.get(shard["handler"])
+            if handler is None:
+                raise ValueError(f"Unknown shard handler: {shard['handler']}")
+            result = await handler(self._context, shard["inputs"])
+        except asyncio.CancelledError:
+            if shard["job_id"] not in cancel_requested_jobs:
+                raise
+            # 任务已请求取消，分片由协调者删除
+            logger.info(
+                f"Shard {shard['shard_index']} of job {shard['job_id']} cancelled"
+            )
+            return False
+        except Exception as e:
+            logger.exception(
+                f"Shard {shard['shard_index']} of job {shard['job_id']} failed"
+            )
+            await self._shards.fail(
+                shard["id"], self._worker_id, str(e), settings.job_shard_max_attempts
+            )
+            return False
+
+        await self._shards.complete(shard["id"], result)
+        return True
+
+    async def run_shards(
+        self,
+        job_id: str,
+        job_type: JobType,
+        handler: str,
+        inputs: list[list],
+        on_progress: Callable[[int, int], Awaitable[None]] | None = None,
+    ) -> list[dict]:
+        """将任务输入按分片并行执行，返回按分片顺序排列的结果，结束后删除分片
+
+        由任务处理器(协调者)调用，handler 为 shard_handler 注册的分片处理器名称。分片写入数据库后，
+        各进程调度器的空闲名额领取执行；协调者同时执行本任务的分片，没有可领取的分片时重复执行
+        运行超过 job_shard_steal_after 秒的分片，直到全部分片完成。on_progress 接收 (已完成数, 分片数)。
+        分片领取 job_shard_max_attempts 次仍失败时抛出 RuntimeError。
+        未使用数据库任务存储时在协调者内依次执行。
+        """
+        if self._shards is None:
+            results = []
+            for shard_inputs in inputs:
+                results.append(
+                    await SHARD_HANDLERS[handler](self._context, shard_inputs)
+                )
+                if on_progress is not None:
+                    await on_progress(len(results), len(inputs))
+            return results
+
+        await self._shards.create(job_id, job_type, handler, inputs)
+        # 唤醒本进程调度器，空闲名额立即参与执行
+        self._wake()
+
+        # 服务停止时保留分片，任务重新领取后已完成的分片不再执行
+        try:
+            results = await self._wait_shards(job_id, job_type, on_progress)
+        except (Exception, JobCancelledError):
+            await self._shards.delete(job_id)
+            raise
+        await self._shards.delete(job_id)
+        return results
+
+    async def _wait_shards(
+        self,
+        job_id: str,
+        job_type: JobType,
+        on_progress: Callable[[int, int], Awaitable[None]] | None,
+    ) -> list[dict]:
+        completed = 0
+        while True:
+            raise_if_cancelled()
+            shard = await self._shards.claim(
+                [job_type],
+                self._worker_id,
+                settings.job_lease_ttl,
+                settings.job_shard_max_attempts,
+                job_id=job_id,
+            )
+            if shard is None:
+                shard = await self._shards.steal(job_id, settings.job_shard_steal_after)
+                if shard is not None:
+                    logger.info(f"Job {job_id} stealing shard {shard['shard_index']}")
+            executed = shard is not None and await self._execute_shard(shard)
+
+            progress = await self._shards.progress(
+                job_id, settings.job_shard_max_attempts
+            )
+            if progress["failed"]:
+                raise RuntimeError(
+                    f"{progress['failed']} shards of job {job_id} failed"
+                )
+            if progress["completed"] > completed:
+                completed = progress["completed"]
+                if on_progress is not None:
+                    await on_progress(completed, progress["total"])
+            if completed == progress["total"]:
+                return await self._shards.results(job_id)
+            if not executed:
+                # 剩余分片由其他进程执行中
+                await asyncio.sleep(settings.job_poll_interval)
 
     async def get_async_job(self, job_id: str) -> dict | None:
         """获取异步任务详情"""
-        async with async_session() as session:
-            result = await session.execute(select(Job).where(Job.job_id == job_id))
-            job = result.scalar_one_or_none()
-            if job is None:
-                return None
-
-            return job.to_dict()
+        job = await self._store.get(job_id)
+        return None if job is None else self._with_pending(job)
 
     async def get_async_jobs(
-        self, page: int, size: int, with_result: bool, **kwargs: Any
+        self,
+        page: int,
+        size: int,
+        with_result: bool,
+        cursor: str | None = None,
+        **kwargs: Any,
     ) -> dict:
         """获取异步任务详情（分页）
         with_result=True 时查询并返回 result 字段，反之不查
-        kwargs 为其他过滤条件，如 job_type、status 等
+        cursor 为上一页返回的 next_cursor，按 (created_at, id) 倒序翻页，耗时与翻页深度无关；
+        未指定时按 page 偏移分页
+        kwargs 为其他过滤条件，如 job_type、status 等，值为 None 时忽略
+        total 为缓存的总数，有效期为 job_count_cache_ttl 秒
         """
-        # 构建过滤条件
-        filters = []
-        for key, value in kwargs.items():
-            if hasattr(Job, key):
-                filters.append(getattr(Job, key) == value)
-
-        # 构建查询
-        if with_result:
-            stmt = select(Job)
+        filters = {k: v for k, v in kwargs.items() if v is not None}
+        total = await self._count(filters)
+
+        # 多查一条判断是否还有下一页
+        if cursor is not None:
+            rows = await self._store.list(
+                size + 1, with_result, filters, cursor=decode_cursor(cursor)
+            )
         else:
-            stmt = select(Job).options(
-                load_only(
-                    Job.job_id,
-                    Job.job_type,
-                    Job.status,
-                    Job.progress,
-                    Job.error,
-                    Job.created_at,
-                    Job.updated_at,
-                )
+            rows = await self._store.list(
+                size + 1, with_result, filters, offset=(page - 1) * size
             )
 
-        for f in filters:
-            stmt = stmt.where(f)
-        stmt = stmt.order_by(Job.created_at.desc())
+        next_cursor = None
+        if len(rows) > size:
+            rows = rows[:size]
+            next_cursor = encode_cursor(rows[-1][1], rows[-1][0]["id"])
 
-        async with async_session() as session:
-            count_stmt = select(func.count(Job.id))
-            for f in filters:
-                count_stmt = count_stmt.where(f)
-            count_result = await session.execute(count_stmt)
-            total = count_result.scalar() or 0
+        # 过滤与计数基于已写入的状态，返回内容包含未写入的最新进度
+        items = [self._with_pending(job) for job, _ in rows]
 
-            offset = (page - 1) * size
-            result = await session.execute(stmt.offset(offset).limit(size))
-            jobs = result.scalars().all()
+        return {
+            "items": items,
+            "total": total,
+            "page": page,
+            "size": size,
+            "next_cursor": next_cursor,
+        }
 
-        items = [job.to_dict() for job in jobs]
+    async def _count(self, filters: dict[str, Any]) -> int:
+        key = tuple(sorted(filters.items()))
+        expires_at, total = self._count_cache.get(key, (0.0, 0))
+        if expires_at > time.monotonic():
+            return total
 
-        return {"items": items, "total": total, "page": page, "size": size}
+        total = await self._store.count(filters)
+        self._count_cache[key] = (
+            time.monotonic() + settings.job_count_cache_ttl,
+            total,
+        )
+        return total
 
     async def update_async_job(self, job_id: str, **kwargs: Any) -> None:
-        """更新异步任务详情"""
-        async with async_session() as session:
-            stmt = update(Job).where(Job.job_id == job_id).values(**kwargs)
-            await session.execute(stmt)
-            await session.commit()
+        """更新异步任务详情
 
+        终态(完成/失败/取消)连同该任务未写入的更新立即写入，其余更新(如进度)缓存在内存中，
+        每隔 job_update_flush_interval 秒合并为一个事务写入。result 中的大字段存储到压缩的结果文件。
+        """
         status = kwargs.get("status")
-        if status in (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED):
+        if kwargs.get("result") is not None:
+            # 完整结果压缩存储到结果文件，任务记录只保留计数与引用
+            kwargs["result"] = await asyncio.to_thread(store_result, kwargs["result"])
+
+        if status in TERMINAL_JOB_STATUSES or self._flush_interval <= 0:
+            kwargs = {**self._pending_updates.pop(job_id, {}), **kwargs}
+            await self._store.update(job_id, kwargs)
+            JOB_STATE_UPDATES.labels("write_through").inc()
+            JOB_STATE_COMMITS.labels("write_through").inc()
+        else:
+            self._pending_updates.setdefault(job_id, {}).update(kwargs)
+            JOB_STATE_UPDATES.labels("buffered").inc()
+            self._ensure_flush_task()
+
+        if status in TERMINAL_JOB_STATUSES:
             self._async_tasks.pop(job_id, None)
 
+    async def flush(self) -> None:
+        """将缓存的更新合并为一个事务写入，已处于终态的任务不再更新"""
+        if not self._pending_updates:
+            return
+        updates, self._pending_updates = self._pending_updates, {}
+
+        try:
+            await self._store.update_many(updates)
+            JOB_STATE_COMMITS.labels("buffered").inc()
+        except Exception:
+            logger.exception(f"Failed to flush {len(updates)} job updates")
+            # 放回未写入的更新，期间产生的新值优先
+            for job_id, values in updates.items():
+                self._pending_updates[job_id] = {
+                    **values,
+                    **self._pending_updates.get(job_id, {}),
+                }
+
+    def _ensure_flush_task(self) -> None:
+        # 写入任务绑定事件循环，事件循环更换(如测试中多次 asyncio.run)时重新创建
+        if (
+            self._flush_task is None
+            or self._flush_task.done()
+            or self._flush_task.get_loop() is not asyncio.get_running_loop()
+        ):
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        # 没有待写入的更新时退出，下次缓存更新时重新启动
+        while self._pending_updates:
+            await asyncio.sleep(self._flush_interval)
+            await self.flush()
+
+    def _with_pending(self, job: dict) -> dict:
+        """合并未写入的更新"""
+        pending = self._pending_updates.get(job["job_id"], {})
+        job.update({k: v for k, v in pending.items() if k in job})
+        return job
+
     async def cancel_async_job(self, job_id: str) -> bool:
-        """取消异步任务并更新数据库状态"""
+        """取消异步任务并更新数据库状态
+
+        本进程执行的任务立即取消；尚未开始执行的任务直接标记为取消；由其他进程执行的任务记录取消请求，
+        执行进程每隔 job_cancel_poll_interval 秒轮询，在下一个 context 或问答边界停止并标记为取消。
+        """
         task = self._async_tasks.pop(job_id, None)
         if task is None:
-            return False
+            if await self._store.update(
+                job_id,
+                {"status": JobStatus.CANCELLED},
+                expected_status=JobStatus.PENDING,
+            ):
+                return True
+            return await self._store.update(
+                job_id, {"cancel_requested": True}, expected_status=JobStatus.RUNNING
+            )
 
         task.cancel()
         try:
@@ -145,6 +621,8 @@ class AsyncJobManager:
             logger.info("Async task %s cancelled", job_id)
         finally:
             await self.update_async_job(job_id, status=JobStatus.CANCELLED)
+            if self._shards is not None:
+                await self._shards.delete(job_id)
         return True
 
 
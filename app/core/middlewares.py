@@ -61,12 +61,9 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         if self.log_request_body and request.method in ["POST", "PUT", "PATCH"]:
             try:
                 body_bytes = await request.body()
+                # BaseHTTPMiddleware 会缓存已读取的 body 并转发给下游，无需重新设置 receive；
+                # 覆盖 receive 会使流式响应无法感知客户端断开
                 if body_bytes:
-                    # 将 body 重新设置到 request，因为已经读取过了
-                    async def receive():
-                        return {"type": "http.request", "body": body_bytes}
-
-                    request._receive = receive
                     # 安全地处理请求体（支持二进制数据）
                     body_info = self._process_request_body(body_bytes, request)
                     if body_info:
@@ -0,0 +1,65 @@
+"""API 进程与任务 worker 进程共享的资源初始化"""
+
+import logging
+from typing import Any
+
+from openai import AsyncOpenAI
+from httpx import AsyncClient
+from sentence_transformers import SentenceTransformer
+
+from app.config import settings
+from app.core.batch import create_batch_backend
+from app.core.database import (
+    Base,
+    async_engine,
+    create_missing_columns,
+    create_missing_indexes,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def init_database() -> None:
+    """创建数据表，为已存在的表补充新增的列与索引
+
+    不会重建数据库：未启用增量 vacuum 的已有 SQLite 数据库只记录提示，由 app.maintenance 手动转换
+    """
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(create_missing_columns)
+        await conn.run_sync(create_missing_indexes)
+
+        if (
+            async_engine.dialect.name == "sqlite"
+            and settings.sqlite_incremental_vacuum_pages > 0
+            and (await conn.exec_driver_sql("PRAGMA auto_vacuum")).scalar() != 2
+        ):
+            logger.warning(
+                "SQLite database is not in incremental auto vacuum mode, freed pages "
+                "are not returned; stop all processes and run "
+                "`python -m app.maintenance enable-incremental-vacuum` to convert it"
+            )
+
+
+def init_resources(state: Any) -> None:
+    """在 state(app.state 或 worker 的运行上下文)上创建客户端与模型"""
+    state.openai_client = AsyncOpenAI(
+        api_key=settings.openai_api_key, base_url=settings.openai_base_url
+    )
+    state.batch_backend = create_batch_backend(
+        settings.batch_backend,
+        state.openai_client,
+        settings.batch_dir,
+        settings.batch_completion_window,
+    )
+    state.httpx_client = AsyncClient()
+    state.sentence_transformer = SentenceTransformer(
+        settings.sentence_transformer_model
+    )
+
+
+async def close_resources(state: Any) -> None:
+    """关闭客户端与数据库连接"""
+    await state.openai_client.close()
+    await state.httpx_client.aclose()
+    await async_engine.dispose()
@@ -0,0 +1,320 @@
+"""任务保留期清理：过期的任务结果与记录、遗留的分片、未被引用的文件，SQLite 增量 vacuum"""
+
+import time
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from prometheus_client import Counter, Gauge
+from sqlalchemy import bindparam, delete, or_, select, text, update
+
+from app.config import settings
+from app.core.artifacts import artifact_path, expire_result, result_path
+from app.core.database import Job, JobShard, async_session
+from app.core.enum import JobStatus, JobType
+from app.core.stores import TERMINAL_JOB_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# kind 取值 results(过期结果)/jobs(任务记录)/shards(遗留分片)/files(未引用的文件)
+RETENTION_SWEPT = Counter(
+    "job_retention_swept_total", "Items removed by the retention sweeper", ["kind"]
+)
+DATABASE_SIZE = Gauge("database_size_bytes", "SQLite database size")
+
+
+def retention_days(
+    rules: dict[str, float], default: float, job_type: JobType, status: JobStatus
+) -> float:
+    """依次按 任务类型:状态、任务类型 匹配保留天数，未配置时返回默认值"""
+    return rules.get(
+        f"{job_type.value}:{status.value}", rules.get(job_type.value, default)
+    )
+
+
+class RetentionSweeper:
+    """任务保留期清理
+
+    定期按任务类型与状态清理终态任务：结果超过保留期后删除结果文件与任务参数，任务记录只保留计数等摘要；
+    记录超过保留期后删除。每个事务最多处理 job_retention_batch_size 条记录，避免长时间持有写锁。
+    此外删除已结束任务遗留的分片、未被任务引用的结果文件与上传文件，SQLite 分批归还空闲页。
+    """
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+        self._stopped: asyncio.Event | None = None
+
+    async def start(self) -> None:
+        """启动定期清理，job_retention_sweep_interval 为 0 时不清理"""
+        if settings.job_retention_sweep_interval <= 0:
+            return
+        self._stopped = asyncio.Event()
+        self._task = asyncio.create_task(self._sweep_loop())
+
+    async def stop(self) -> None:
+        """停止定期清理，当前批次完成后退出"""
+        if self._task is None:
+            return
+        self._stopped.set()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._stopped = None
+
+    async def _sweep_loop(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                await self.sweep()
+            except Exception:
+                logger.exception("Job retention sweep failed")
+            try:
+                await asyncio.wait_for(
+                    self._stopped.wait(), timeout=settings.job_retention_sweep_interval
+                )
+            except TimeoutError:
+                pass
+
+    async def sweep(self) -> dict[str, int]:
+        """执行一次清理，返回各类清理数量"""
+        started = time.perf_counter()
+        swept = {
+            "results": await self.expire_results(),
+            "jobs": await self.delete_jobs(),
+            "shards": await self.delete_orphan_shards(),
+            "files": await self.delete_orphan_files(),
+        }
+        for kind, count in swept.items():
+            RETENTION_SWEPT.labels(kind).inc(count)
+        await self.incremental_vacuum()
+        logger.info(
+            f"Job retention sweep finished in {time.perf_counter() - started:.2f}s: "
+            f"{swept}"
+        )
+        return swept
+
+    def _cutoffs(
+        self, rules: dict[str, float], default: float
+    ) -> list[tuple[JobType, JobStatus, datetime]]:
+        now = datetime.now()
+        cutoffs = []
+        for job_type in JobType:
+            for status in TERMINAL_JOB_STATUSES:
+                days = retention_days(rules, default, job_type, status)
+                if days > 0:
+                    cutoffs.append((job_type, status, now - timedelta(days=days)))
+        return cutoffs
+
+    async def expire_results(self) -> int:
+        """将超过结果保留期的任务结果替换为摘要并清空任务参数，结果文件与上传文件由未引用文件清理删除
+
+        返回替换为摘要的结果数
+        """
+        expired = 0
+        batch_size = settings.job_retention_batch_size
+        for job_type, status, cutoff in self._cutoffs(
+            settings.job_result_retention_days,
+            settings.job_default_result_retention_days,
+        ):
+            last_id = 0
+            while not self._stopping:
+                async with async_session() as session:
+                    rows = (
+                        await session.execute(
+                            select(
+                                Job.id,
+                                Job.result,
+                                Job.payload.is_not(None).label("has_payload"),
+                            )
+                            .where(
+                                Job.job_type == job_type,
+                                Job.status == status,
+                                Job.created_at < cutoff,
+                                Job.id > last_id,
+                                or_(Job.result.is_not(None), Job.payload.is_not(None)),
+                            )
+                            .order_by(Job.id)
+                            .limit(batch_size)
+                        )
+                    ).all()
+                    if not rows:
+                        break
+                    last_id = rows[-1].id
+
+                    params = []
+                    for id, result, has_payload in rows:
+                        summary = (
+                            expire_result(result) if isinstance(result, dict) else None
+                        )
+                        # 已替换为摘要且参数已清空的任务无需再次更新
+                        if summary is None and not has_payload:
+                            continue
+                        expired += summary is not None
+                        params.append({"b_id": id, "b_result": summary or result})
+                    if params:
+                        table = Job.__table__
+                        connection = await session.connection()
+                        await connection.execute(
+                            update(table)
+                            .where(table.c.id == bindparam("b_id"))
+                            .values(
+                                result=bindparam("b_result", type_=table.c.result.type),
+                                payload=None,
+                            ),
+                            params,
+                        )
+                        await session.commit()
+                await asyncio.sleep(0)
+        return expired
+
+    async def delete_jobs(self) -> int:
+        """删除超过记录保留期的任务"""
+        deleted = 0
+        batch_size = settings.job_retention_batch_size
+        for job_type, status, cutoff in self._cutoffs(
+            settings.job_retention_days, settings.job_default_retention_days
+        ):
+            while not self._stopping:
+                async with async_session() as session:
+                    result = await session.execute(
+                        delete(Job).where(
+                            Job.id.in_(
+                                select(Job.id)
+                                .where(
+                                    Job.job_type == job_type,
+                                    Job.status == status,
+                                    Job.created_at < cutoff,
+                                )
+                                .limit(batch_size)
+                            )
+                        )
+                    )
+                    await session.commit()
+                deleted += result.rowcount
+                if result.rowcount < batch_size:
+                    break
+                await asyncio.sleep(0)
+        return deleted
+
+    async def delete_orphan_shards(self) -> int:
+        """删除所属任务已结束或已删除的分片，如被取消或执行进程退出的任务遗留的分片"""
+        deleted = 0
+        batch_size = settings.job_retention_batch_size
+        active = select(Job.job_id).where(
+            Job.status.in_([JobStatus.PENDING, JobStatus.RUNNING])
+        )
+        while not self._stopping:
+            async with async_session() as session:
+                result = await session.execute(
+                    delete(JobShard).where(
+                        JobShard.id.in_(
+                            select(JobShard.id)
+                            .where(JobShard.job_id.not_in(active))
+                            .limit(batch_size)
+                        )
+                    )
+                )
+                await session.commit()
+            deleted += result.rowcount
+            if result.rowcount < batch_size:
+                break
+            await asyncio.sleep(0)
+        return deleted
+
+    async def delete_orphan_files(self) -> int:
+        """删除未被任务引用且超过 artifact_orphan_grace 未修改的结果文件与上传文件
+
+        引用包括任务结果中的 result_ref 与结果文件名、待执行与运行中任务参数中的上传文件路径
+        """
+        referenced = await self._referenced_files()
+        return await asyncio.to_thread(self._delete_unreferenced, referenced)
+
+    async def _referenced_files(self) -> set[Path]:
+        referenced = set()
+        batch_size = settings.job_retention_batch_size
+        last_id = 0
+        while True:
+            async with async_session() as session:
+                rows = (
+                    await session.execute(
+                        select(Job.id, Job.result)
+                        .where(Job.id > last_id, Job.result.is_not(None))
+                        .order_by(Job.id)
+                        .limit(batch_size)
+                    )
+                ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            for _, result in rows:
+                if not isinstance(result, dict):
+                    continue
+                if ref := result.get("result_ref"):
+                    referenced.add(result_path(ref["digest"]).resolve())
+                if artifact := result.get("artifact"):
+                    referenced.add(artifact_path(artifact).resolve())
+
+        async with async_session() as session:
+            payloads = await session.scalars(
+                select(Job.payload).where(
+                    Job.status.in_([JobStatus.PENDING, JobStatus.RUNNING])
+                )
+            )
+            for payload in payloads:
+                for value in ((payload or {}).get("kwargs") or {}).values():
+                    if isinstance(value, str):
+                        referenced.add(Path(value).resolve())
+        return referenced
+
+    @staticmethod
+    def _delete_unreferenced(referenced: set[Path]) -> int:
+        root = Path(settings.artifact_dir)
+        paths = [
+            *(root / "results").glob("*/*"),
+            *(root / "uploads").glob("*"),
+            *root.glob("*.jsonl*"),
+        ]
+        deadline = time.time() - settings.artifact_orphan_grace
+        deleted = 0
+        for path in paths:
+            try:
+                if (
+                    path.is_file()
+                    and path.resolve() not in referenced
+                    and path.stat().st_mtime < deadline
+                ):
+                    path.unlink()
+                    deleted += 1
+            except FileNotFoundError:
+                continue
+        return deleted
+
+    async def incremental_vacuum(self) -> int:
+        """SQLite 每次归还 sqlite_incremental_vacuum_pages 个空闲页，返回归还的页数"""
+        pages = settings.sqlite_incremental_vacuum_pages
+        freed = 0
+        async with async_session() as session:
+            if session.bind.dialect.name != "sqlite" or pages <= 0:
+                return 0
+            if (await session.scalar(text("PRAGMA auto_vacuum"))) != 2:
+                return 0
+
+            while not self._stopping:
+                free = await session.scalar(text("PRAGMA freelist_count"))
+                if not free:
+                    break
+                await session.execute(text(f"PRAGMA incremental_vacuum({pages})"))
+                await session.commit()
+                freed += min(free, pages)
+                await asyncio.sleep(0)
+
+            page_size = await session.scalar(text("PRAGMA page_size"))
+            page_count = await session.scalar(text("PRAGMA page_count"))
+            DATABASE_SIZE.set(page_size * page_count)
+        return freed
+
+    @property
+    def _stopping(self) -> bool:
+        return self._stopped is not None and self._stopped.is_set()
+
+
+retention_sweeper = RetentionSweeper()
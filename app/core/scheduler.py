@@ -0,0 +1,150 @@
+"""任务调度：任务与分片处理器注册、当前任务上下文与取消请求、任务间公平共享的 LLM 并发"""
+
+import asyncio
+import logging
+import importlib
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator, Callable, Coroutine
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any
+
+from app.config import settings
+from app.core.exceptions import JobCancelledError
+
+logger = logging.getLogger(__name__)
+
+# 处理器签名：(job_id, 运行上下文, **payload 参数)，运行上下文提供 openai_client 等共享资源
+JobHandler = Callable[..., Coroutine[Any, Any, None]]
+
+# 处理器名称 -> 处理器
+JOB_HANDLERS: dict[str, JobHandler] = {}
+
+# 分片处理器签名：(运行上下文, 分片输入) -> 分片结果，结果需可 JSON 序列化
+ShardHandler = Callable[..., Coroutine[Any, Any, dict]]
+
+# 分片处理器名称 -> 处理器
+SHARD_HANDLERS: dict[str, ShardHandler] = {}
+
+# 当前协程所属的任务，调度器在执行处理器前设置，处理器内创建的子任务继承该值
+current_job_id: ContextVar[str | None] = ContextVar("current_job_id", default=None)
+
+# 本进程执行中且已请求取消的任务，由任务管理器轮询取消请求后写入
+cancel_requested_jobs: set[str] = set()
+
+
+def job_handler(name: str) -> Callable[[JobHandler], JobHandler]:
+    """注册任务处理器，任务的 payload 记录处理器名称与参数"""
+
+    def decorator(handler: JobHandler) -> JobHandler:
+        JOB_HANDLERS[name] = handler
+        return handler
+
+    return decorator
+
+
+def shard_handler(name: str) -> Callable[[ShardHandler], ShardHandler]:
+    """注册分片处理器，分片记录处理器名称与输入"""
+
+    def decorator(handler: ShardHandler) -> ShardHandler:
+        SHARD_HANDLERS[name] = handler
+        return handler
+
+    return decorator
+
+
+def load_job_handlers() -> None:
+    """导入各服务的 jobs 模块以注册处理器"""
+    services_path = Path(settings.services_module.replace(".", "/"))
+    for jobs_path in sorted(services_path.glob("*/jobs.py")):
+        module_path = f"{settings.services_module}.{jobs_path.parent.name}.jobs"
+        try:
+            importlib.import_module(module_path)
+        except Exception:
+            logger.exception(f"Failed to load job handlers from {module_path}")
+
+
+class FairSemaphore:
+    """按持有者轮转分配名额的信号量
+
+    名额空闲时直接获取；名额用尽时按持有者(任务)排队，每释放一个名额交给下一个有等待项的持有者，
+    单个任务的大量等待项不会饿死其他任务。
+    """
+
+    def __init__(self, value: int):
+        self._value = value
+        # 持有者 -> 等待项，按轮转顺序排列
+        self._waiters: OrderedDict[str, deque[asyncio.Future]] = OrderedDict()
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    async def acquire(self, owner: str) -> None:
+        if self._value > 0 and not self._waiters:
+            self._value -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(owner, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 已分配名额时被取消，归还名额
+                self.release()
+            else:
+                waiters = self._waiters.get(owner)
+                if waiters is not None and future in waiters:
+                    waiters.remove(future)
+                    if not waiters:
+                        del self._waiters[owner]
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            owner, waiters = self._waiters.popitem(last=False)
+            future = waiters.popleft()
+            # 分配后移到队尾，轮到其他持有者
+            if waiters:
+                self._waiters[owner] = waiters
+            if not future.done():
+                future.set_result(None)
+                return
+        self._value += 1
+
+    @asynccontextmanager
+    async def slot(self, owner: str) -> AsyncIterator[None]:
+        await self.acquire(owner)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+llm_semaphore = FairSemaphore(settings.job_llm_concurrency)
+
+
+def raise_if_cancelled() -> None:
+    """当前任务已请求取消时抛出 JobCancelledError，任务在 context 或问答等边界调用"""
+    job_id = current_job_id.get()
+    if job_id is not None and job_id in cancel_requested_jobs:
+        raise JobCancelledError(f"Job {job_id} cancelled")
+
+
+@asynccontextmanager
+async def llm_slot() -> AsyncIterator[None]:
+    """任务内的单个 context 或问答占用一个 LLM 名额，非任务调用(如同步接口)不受限制
+
+    获取名额前后检查取消请求，已请求取消的任务不再发起新的 LLM 调用
+    """
+    job_id = current_job_id.get()
+    if job_id is None:
+        yield
+        return
+
+    raise_if_cancelled()
+    async with llm_semaphore.slot(job_id):
+        raise_if_cancelled()
+        yield
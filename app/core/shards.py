@@ -0,0 +1,259 @@
+"""任务分片存储"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import (
+    and_,
+    case,
+    delete,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    update,
+)
+
+from app.core.database import Job, JobShard, async_session
+from app.core.enum import JobStatus, JobType
+
+logger = logging.getLogger(__name__)
+
+
+class ShardStore:
+    """任务分片存储
+
+    大任务的输入拆分为分片写入 job_shards 表，任意进程的调度器都可领取执行，分片结果写回分片记录，
+    由任务的协调者(执行任务处理器的进程)汇总。分片同样以租约领取，租约过期的分片由其他进程重新领取。
+    """
+
+    async def create(
+        self, job_id: str, job_type: JobType, handler: str, inputs: list[list]
+    ) -> int:
+        """创建任务的分片，已存在时(任务被重新领取)沿用已有分片，返回分片数"""
+        async with async_session() as session:
+            existing = await session.scalar(
+                select(func.count(JobShard.id)).where(JobShard.job_id == job_id)
+            )
+            if existing:
+                return existing
+
+            await session.execute(
+                insert(JobShard),
+                [
+                    {
+                        "job_id": job_id,
+                        "job_type": job_type,
+                        "shard_index": shard_index,
+                        "handler": handler,
+                        "inputs": shard_inputs,
+                    }
+                    for shard_index, shard_inputs in enumerate(inputs)
+                ],
+            )
+            await session.commit()
+
+        logger.info(f"Created {len(inputs)} shards for job {job_id}")
+        return len(inputs)
+
+    async def claim(
+        self,
+        job_types: list[JobType],
+        owner: str,
+        lease_ttl: float,
+        max_attempts: int,
+        job_id: str | None = None,
+    ) -> dict | None:
+        """领取待执行或租约已过期的分片，只领取所属任务仍在运行、未请求取消且领取次数未超过 max_attempts 的分片
+
+        job_id 指定时只领取该任务的分片，返回包含输入的分片，没有可领取的分片时返回 None
+        """
+        if not job_types:
+            return None
+
+        now = datetime.now()
+        claimable = and_(
+            JobShard.job_type.in_(job_types),
+            JobShard.attempts < max_attempts,
+            or_(
+                JobShard.status == JobStatus.PENDING,
+                and_(
+                    JobShard.status == JobStatus.RUNNING,
+                    JobShard.lease_expires_at < now,
+                ),
+            ),
+            JobShard.job_id.in_(
+                select(Job.job_id).where(
+                    Job.status == JobStatus.RUNNING, Job.cancel_requested.is_(False)
+                )
+            ),
+        )
+        if job_id is not None:
+            claimable = and_(claimable, JobShard.job_id == job_id)
+        stmt = select(JobShard).where(claimable).order_by(JobShard.id).limit(1)
+
+        async with async_session() as session:
+            # 其他进程可能先领取同一分片，条件更新失败时重新选取
+            while shard := await session.scalar(stmt):
+                # 先结束读事务，SQLite 读事务升级为写事务时可能与其他写入方冲突而立即失败
+                await session.commit()
+                claimed = await session.execute(
+                    update(JobShard)
+                    .where(JobShard.id == shard.id, claimable)
+                    .values(
+                        status=JobStatus.RUNNING,
+                        attempts=JobShard.attempts + 1,
+                        lease_owner=owner,
+                        lease_expires_at=now + timedelta(seconds=lease_ttl),
+                        started_at=now,
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                await session.commit()
+                if claimed.rowcount == 1:
+                    await session.refresh(shard)
+                    return shard.to_dict()
+        return None
+
+    async def steal(self, job_id: str, steal_after: float) -> dict | None:
+        """选取任务中运行超过 steal_after 秒的分片重复执行，不修改租约，先完成的结果生效"""
+        async with async_session() as session:
+            shard = await session.scalar(
+                select(JobShard)
+                .where(
+                    JobShard.job_id == job_id,
+                    JobShard.status == JobStatus.RUNNING,
+                    JobShard.started_at
+                    < datetime.now() - timedelta(seconds=steal_after),
+                )
+                .order_by(JobShard.started_at, JobShard.id)
+                .limit(1)
+            )
+            return None if shard is None else shard.to_dict()
+
+    async def renew(self, owner: str, lease_ttl: float) -> None:
+        """续约 owner 持有的运行中分片"""
+        async with async_session() as session:
+            await session.execute(
+                update(JobShard)
+                .where(
+                    JobShard.lease_owner == owner,
+                    JobShard.status == JobStatus.RUNNING,
+                )
+                .values(lease_expires_at=datetime.now() + timedelta(seconds=lease_ttl))
+            )
+            await session.commit()
+
+    async def complete(self, shard_id: int, result: dict) -> bool:
+        """写入分片结果并释放输入，分片已完成(如被重复执行的另一方先完成)时返回 False"""
+        async with async_session() as session:
+            updated = await session.execute(
+                update(JobShard)
+                .where(JobShard.id == shard_id, JobShard.status != JobStatus.COMPLETED)
+                .values(
+                    status=JobStatus.COMPLETED,
+                    result=result,
+                    inputs=None,
+                    error=None,
+                    lease_owner=None,
+                    lease_expires_at=None,
+                )
+            )
+            await session.commit()
+            return updated.rowcount > 0
+
+    async def fail(
+        self, shard_id: int, owner: str, error: str, max_attempts: int
+    ) -> None:
+        """分片执行失败，领取次数未超过 max_attempts 时放回队列，否则标记为失败"""
+        async with async_session() as session:
+            await session.execute(
+                update(JobShard)
+                .where(
+                    JobShard.id == shard_id,
+                    JobShard.lease_owner == owner,
+                    JobShard.status == JobStatus.RUNNING,
+                )
+                .values(
+                    status=case(
+                        (
+                            JobShard.attempts >= max_attempts,
+                            literal(JobStatus.FAILED, JobShard.status.type),
+                        ),
+                        else_=literal(JobStatus.PENDING, JobShard.status.type),
+                    ),
+                    error=error,
+                    lease_owner=None,
+                    lease_expires_at=None,
+                )
+            )
+            await session.commit()
+
+    async def release(self, owner: str) -> int:
+        """进程退出时将持有的分片放回队列，不计入领取次数，返回分片数"""
+        async with async_session() as session:
+            result = await session.execute(
+                update(JobShard)
+                .where(
+                    JobShard.lease_owner == owner,
+                    JobShard.status == JobStatus.RUNNING,
+                )
+                .values(
+                    status=JobStatus.PENDING,
+                    attempts=JobShard.attempts - 1,
+                    lease_owner=None,
+                    lease_expires_at=None,
+                )
+            )
+            await session.commit()
+            return result.rowcount
+
+    async def progress(self, job_id: str, max_attempts: int) -> dict[str, int]:
+        """任务的分片数、已完成数与已失败数
+
+        执行失败或租约过期且领取次数已达 max_attempts 的分片计为失败
+        """
+        now = datetime.now()
+        failed = or_(
+            JobShard.status == JobStatus.FAILED,
+            and_(
+                JobShard.status == JobStatus.RUNNING,
+                JobShard.attempts >= max_attempts,
+                JobShard.lease_expires_at < now,
+            ),
+        )
+        async with async_session() as session:
+            row = (
+                await session.execute(
+                    select(
+                        func.count(JobShard.id),
+                        func.count(JobShard.id).filter(
+                            JobShard.status == JobStatus.COMPLETED
+                        ),
+                        func.count(JobShard.id).filter(failed),
+                    ).where(JobShard.job_id == job_id)
+                )
+            ).one()
+        return {"total": row[0], "completed": row[1], "failed": row[2]}
+
+    async def results(self, job_id: str) -> list[Any]:
+        """按分片顺序返回任务的分片结果"""
+        async with async_session() as session:
+            return list(
+                await session.scalars(
+                    select(JobShard.result)
+                    .where(JobShard.job_id == job_id)
+                    .order_by(JobShard.shard_index)
+                )
+            )
+
+    async def delete(self, job_id: str) -> None:
+        """删除任务的分片"""
+        async with async_session() as session:
+            await session.execute(delete(JobShard).where(JobShard.job_id == job_id))
+            await session.commit()
+
+
+shard_store = ShardStore()
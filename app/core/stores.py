@@ -0,0 +1,484 @@
+"""任务存储后端"""
+
+import copy
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import (
+    DateTime,
+    and_,
+    bindparam,
+    func,
+    or_,
+    select,
+    tuple_,
+    type_coerce,
+    update,
+)
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import defer, load_only
+
+from app.core.database import Job, async_session
+from app.core.enum import JobPriority, JobStatus, JobType
+
+# 任务终态，处于终态的任务不再接受合并写入的更新
+TERMINAL_JOB_STATUSES = (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+
+class JobStore(ABC):
+    """任务存储抽象基类
+
+    任务以字典返回，字段与 Job 模型一致，created_at、updated_at 格式化为本地时间字符串。
+    """
+
+    @abstractmethod
+    async def create(
+        self,
+        job_id: str,
+        job_type: JobType,
+        payload: dict | None = None,
+        priority: int = JobPriority.NORMAL,
+    ) -> None:
+        """创建待执行的任务记录"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get(self, job_id: str) -> dict | None:
+        """获取任务(不含 payload)，不存在时返回 None"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def claim(
+        self, job_types: list[JobType], owner: str, lease_ttl: float
+    ) -> tuple[dict, datetime] | None:
+        """领取指定类型的任务并标记为运行中，租约归 owner 所有，有效期 lease_ttl 秒
+
+        优先领取租约已过期(执行进程退出或失联)的运行中任务，其次为优先级最高、最早创建的待执行任务。
+        返回包含 payload 的任务与未格式化的 created_at，没有可领取的任务时返回 None
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def renew_leases(
+        self, owner: str, job_ids: list[str], lease_ttl: float
+    ) -> set[str]:
+        """续约 owner 仍持有的运行中任务，返回续约成功的 job_id"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def cancel_requested(self, job_ids: list[str]) -> set[str]:
+        """返回 job_ids 中已请求取消的任务"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list(
+        self,
+        size: int,
+        with_result: bool,
+        filters: dict[str, Any],
+        offset: int = 0,
+        cursor: tuple[datetime, int] | None = None,
+    ) -> list[tuple[dict, datetime]]:
+        """按 (created_at, id) 倒序列出任务
+
+        返回任务与未格式化的 created_at，cursor 为上一页最后一条的 (created_at, id)，
+        指定时忽略 offset
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def count(self, filters: dict[str, Any]) -> int:
+        """任务总数"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update(
+        self,
+        job_id: str,
+        values: dict[str, Any],
+        expected_status: JobStatus | None = None,
+    ) -> bool:
+        """更新单个任务，指定 expected_status 时仅在任务处于该状态时更新，返回是否更新"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_many(self, updates: dict[str, dict[str, Any]]) -> None:
+        """在一个事务中更新多个任务，已处于终态的任务不更新"""
+        raise NotImplementedError
+
+
+class DatabaseJobStore(JobStore):
+    """数据库任务存储(SQLite/PostgreSQL)"""
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]):
+        self.session_factory = session_factory
+
+    async def create(
+        self,
+        job_id: str,
+        job_type: JobType,
+        payload: dict | None = None,
+        priority: int = JobPriority.NORMAL,
+    ) -> None:
+        async with self.session_factory() as session:
+            session.add(
+                Job(
+                    job_id=job_id, job_type=job_type, payload=payload, priority=priority
+                )
+            )
+            await session.commit()
+
+    async def get(self, job_id: str) -> dict | None:
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(Job).options(defer(Job.payload)).where(Job.job_id == job_id)
+            )
+            job = result.scalar_one_or_none()
+            return None if job is None else job.to_dict()
+
+    async def claim(
+        self, job_types: list[JobType], owner: str, lease_ttl: float
+    ) -> tuple[dict, datetime] | None:
+        if not job_types:
+            return None
+
+        now = datetime.now()
+        # 租约为空的运行中任务来自未启用租约的旧版本，同样视为过期
+        expired = and_(
+            Job.status == JobStatus.RUNNING,
+            Job.payload.is_not(None),
+            or_(Job.lease_expires_at.is_(None), Job.lease_expires_at < now),
+        )
+        pending = Job.status == JobStatus.PENDING
+        created_at = type_coerce(Job.created_at, DateTime()).label("cursor_created_at")
+
+        async with self.session_factory() as session:
+            for condition in (expired, pending):
+                stmt = (
+                    select(Job, created_at)
+                    .where(condition, Job.job_type.in_(job_types))
+                    .order_by(Job.priority.desc(), Job.created_at, Job.id)
+                    .limit(1)
+                )
+                # 其他进程可能先领取同一任务，条件更新失败时重新选取
+                while row := (await session.execute(stmt)).first():
+                    job, job_created_at = row
+                    # 先结束读事务，SQLite 读事务升级为写事务时可能与其他写入方冲突而立即失败
+                    await session.commit()
+                    claimed = await session.execute(
+                        update(Job)
+                        .where(Job.id == job.id, condition)
+                        .values(
+                            status=JobStatus.RUNNING,
+                            progress=0,
+                            started_at=now,
+                            lease_owner=owner,
+                            lease_expires_at=now + timedelta(seconds=lease_ttl),
+                        )
+                        .execution_options(synchronize_session=False)
+                    )
+                    await session.commit()
+                    if claimed.rowcount == 1:
+                        await session.refresh(job)
+                        return job.to_dict(), job_created_at
+        return None
+
+    async def renew_leases(
+        self, owner: str, job_ids: list[str], lease_ttl: float
+    ) -> set[str]:
+        if not job_ids:
+            return set()
+
+        owned = (
+            Job.job_id.in_(job_ids),
+            Job.lease_owner == owner,
+            Job.status == JobStatus.RUNNING,
+        )
+        async with self.session_factory() as session:
+            await session.execute(
+                update(Job)
+                .where(*owned)
+                .values(lease_expires_at=datetime.now() + timedelta(seconds=lease_ttl))
+            )
+            renewed = await session.scalars(select(Job.job_id).where(*owned))
+            await session.commit()
+            return set(renewed)
+
+    async def cancel_requested(self, job_ids: list[str]) -> set[str]:
+        if not job_ids:
+            return set()
+
+        async with self.session_factory() as session:
+            return set(
+                await session.scalars(
+                    select(Job.job_id).where(
+                        Job.job_id.in_(job_ids), Job.cancel_requested.is_(True)
+                    )
+                )
+            )
+
+    async def list(
+        self,
+        size: int,
+        with_result: bool,
+        filters: dict[str, Any],
+        offset: int = 0,
+        cursor: tuple[datetime, int] | None = None,
+    ) -> list[tuple[dict, datetime]]:
+        # 额外查询未格式化的 created_at 用于生成游标
+        created_at = type_coerce(Job.created_at, DateTime()).label("cursor_created_at")
+        if with_result:
+            stmt = select(Job, created_at).options(defer(Job.payload))
+        else:
+            stmt = select(Job, created_at).options(
+                load_only(
+                    Job.job_id,
+                    Job.job_type,
+                    Job.status,
+                    Job.progress,
+                    Job.error,
+                    Job.priority,
+                    Job.created_at,
+                    Job.started_at,
+                    Job.updated_at,
+                    Job.lease_owner,
+                    Job.lease_expires_at,
+                    Job.cancel_requested,
+                )
+            )
+
+        stmt = stmt.where(*self._filters(filters)).order_by(
+            Job.created_at.desc(), Job.id.desc()
+        )
+        if cursor is not None:
+            stmt = stmt.where(tuple_(Job.created_at, Job.id) < tuple_(*cursor))
+        else:
+            stmt = stmt.offset(offset)
+
+        async with self.session_factory() as session:
+            result = await session.execute(stmt.limit(size))
+            return [(job.to_dict(), created_at) for job, created_at in result.all()]
+
+    async def count(self, filters: dict[str, Any]) -> int:
+        async with self.session_factory() as session:
+            stmt = select(func.count(Job.id)).where(*self._filters(filters))
+            return await session.scalar(stmt) or 0
+
+    async def update(
+        self,
+        job_id: str,
+        values: dict[str, Any],
+        expected_status: JobStatus | None = None,
+    ) -> bool:
+        stmt = update(Job).where(Job.job_id == job_id).values(**values)
+        if expected_status is not None:
+            stmt = stmt.where(Job.status == expected_status)
+        async with self.session_factory() as session:
+            result = await session.execute(stmt)
+            await session.commit()
+            return result.rowcount > 0
+
+    async def update_many(self, updates: dict[str, dict[str, Any]]) -> None:
+        # 按更新字段分组，每组一条 executemany 语句
+        groups: dict[tuple[str, ...], list[dict[str, Any]]] = {}
+        for job_id, values in updates.items():
+            groups.setdefault(tuple(sorted(values)), []).append(
+                {"b_job_id": job_id, **{f"b_{k}": v for k, v in values.items()}}
+            )
+
+        table = Job.__table__
+        async with self.session_factory() as session:
+            connection = await session.connection()
+            for keys, params in groups.items():
+                stmt = (
+                    update(table)
+                    .where(
+                        table.c.job_id == bindparam("b_job_id"),
+                        # executemany 不支持 IN 展开参数
+                        *(table.c.status != s for s in TERMINAL_JOB_STATUSES),
+                    )
+                    .values(
+                        {k: bindparam(f"b_{k}", type_=table.c[k].type) for k in keys}
+                    )
+                )
+                await connection.execute(stmt, params)
+            await session.commit()
+
+    @staticmethod
+    def _filters(filters: dict[str, Any]) -> list:
+        return [
+            getattr(Job, key) == value
+            for key, value in filters.items()
+            if hasattr(Job, key)
+        ]
+
+
+class MemoryJobStore(JobStore):
+    """内存任务存储，进程重启后丢失，用于测试与压测"""
+
+    def __init__(self):
+        # job_id -> 任务，按创建顺序排列，即 (created_at, id) 升序
+        self._jobs: dict[str, dict[str, Any]] = {}
+        self._next_id = 1
+
+    async def create(
+        self,
+        job_id: str,
+        job_type: JobType,
+        payload: dict | None = None,
+        priority: int = JobPriority.NORMAL,
+    ) -> None:
+        now = datetime.now()
+        self._jobs[job_id] = {
+            "id": self._next_id,
+            "job_id": job_id,
+            "job_type": job_type,
+            "status": JobStatus.PENDING,
+            "progress": 0,
+            "result": None,
+            "error": None,
+            "priority": priority,
+            "payload": copy.deepcopy(payload),
+            "created_at": now,
+            "started_at": None,
+            "updated_at": now,
+            "lease_owner": None,
+            "lease_expires_at": None,
+            "cancel_requested": False,
+        }
+        self._next_id += 1
+
+    async def get(self, job_id: str) -> dict | None:
+        job = self._jobs.get(job_id)
+        return None if job is None else self._to_dict(job, True)
+
+    async def claim(
+        self, job_types: list[JobType], owner: str, lease_ttl: float
+    ) -> tuple[dict, datetime] | None:
+        now = datetime.now()
+
+        def _expired(job: dict[str, Any]) -> bool:
+            return (
+                job["status"] == JobStatus.RUNNING
+                and job["payload"] is not None
+                and (job["lease_expires_at"] is None or job["lease_expires_at"] < now)
+            )
+
+        def _pending(job: dict[str, Any]) -> bool:
+            return job["status"] == JobStatus.PENDING
+
+        for condition in (_expired, _pending):
+            candidates = [
+                job
+                for job in self._jobs.values()
+                if condition(job) and job["job_type"] in job_types
+            ]
+            if not candidates:
+                continue
+
+            job = min(
+                candidates, key=lambda j: (-j["priority"], j["created_at"], j["id"])
+            )
+            job.update(
+                status=JobStatus.RUNNING,
+                progress=0,
+                started_at=now,
+                lease_owner=owner,
+                lease_expires_at=now + timedelta(seconds=lease_ttl),
+                updated_at=now,
+            )
+            return {
+                **self._to_dict(job, True),
+                "payload": copy.deepcopy(job["payload"]),
+            }, job["created_at"]
+        return None
+
+    async def renew_leases(
+        self, owner: str, job_ids: list[str], lease_ttl: float
+    ) -> set[str]:
+        renewed = set()
+        for job_id in job_ids:
+            job = self._jobs.get(job_id)
+            if (
+                job is not None
+                and job["lease_owner"] == owner
+                and job["status"] == JobStatus.RUNNING
+            ):
+                job["lease_expires_at"] = datetime.now() + timedelta(seconds=lease_ttl)
+                renewed.add(job_id)
+        return renewed
+
+    async def cancel_requested(self, job_ids: list[str]) -> set[str]:
+        return {
+            job_id
+            for job_id in job_ids
+            if job_id in self._jobs and self._jobs[job_id]["cancel_requested"]
+        }
+
+    async def list(
+        self,
+        size: int,
+        with_result: bool,
+        filters: dict[str, Any],
+        offset: int = 0,
+        cursor: tuple[datetime, int] | None = None,
+    ) -> list[tuple[dict, datetime]]:
+        items = []
+        skipped = 0
+        for job in reversed(self._jobs.values()):
+            if not self._match(job, filters):
+                continue
+            if cursor is not None:
+                if (job["created_at"], job["id"]) >= cursor:
+                    continue
+            elif skipped < offset:
+                skipped += 1
+                continue
+            items.append((self._to_dict(job, with_result), job["created_at"]))
+            if len(items) >= size:
+                break
+        return items
+
+    async def count(self, filters: dict[str, Any]) -> int:
+        return sum(1 for job in self._jobs.values() if self._match(job, filters))
+
+    async def update(
+        self,
+        job_id: str,
+        values: dict[str, Any],
+        expected_status: JobStatus | None = None,
+    ) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None or expected_status not in (None, job["status"]):
+            return False
+        job.update(copy.deepcopy(values), updated_at=datetime.now())
+        return True
+
+    async def update_many(self, updates: dict[str, dict[str, Any]]) -> None:
+        for job_id, values in updates.items():
+            job = self._jobs.get(job_id)
+            if job is not None and job["status"] not in TERMINAL_JOB_STATUSES:
+                await self.update(job_id, values)
+
+    @staticmethod
+    def _match(job: dict[str, Any], filters: dict[str, Any]) -> bool:
+        return all(job[k] == v for k, v in filters.items() if k in job)
+
+    @staticmethod
+    def _to_dict(job: dict[str, Any], with_result: bool) -> dict:
+        # 与 LocalDatetime 的格式一致，返回副本避免调用方修改存储的任务
+        job = {k: copy.deepcopy(v) for k, v in job.items() if k != "payload"}
+        for key in ("created_at", "started_at", "updated_at", "lease_expires_at"):
+            if job[key] is not None:
+                job[key] = job[key].strftime("%Y-%m-%d %H:%M:%S")
+        if not with_result:
+            job.pop("result")
+        return job
+
+
+def create_job_store(backend: str) -> JobStore:
+    """根据配置创建任务存储"""
+    if backend == "memory":
+        return MemoryJobStore()
+    return DatabaseJobStore(async_session)
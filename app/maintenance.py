@@ -0,0 +1,52 @@
+"""数据库维护命令
+
+耗时较长或需要独占数据库的一次性操作，在停止 API 与 worker 进程后手动执行，服务启动时不会执行。
+
+    uv run python -m app.maintenance enable-incremental-vacuum
+"""
+
+import sys
+import asyncio
+import logging
+import argparse
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.database import async_engine, enable_incremental_vacuum
+
+logger = logging.getLogger(__name__)
+
+
+async def run_enable_incremental_vacuum(engine: AsyncEngine) -> None:
+    """将已存在的 SQLite 数据库转换为增量 vacuum 模式，其他数据库无需转换"""
+    if engine.dialect.name != "sqlite":
+        logger.info(f"{engine.dialect.name} database does not need conversion")
+        return
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.run_sync(enable_incremental_vacuum)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="数据库维护命令")
+    parser.add_argument(
+        "command",
+        choices=["enable-incremental-vacuum"],
+        help="enable-incremental-vacuum: 以 VACUUM 重建 SQLite 数据库并启用增量 vacuum，"
+        "需要约一倍数据库大小的磁盘空间，执行期间独占数据库",
+    )
+    args = parser.parse_args(argv)
+
+    async def _run() -> None:
+        try:
+            if args.command == "enable-incremental-vacuum":
+                await run_enable_incremental_vacuum(async_engine)
+        finally:
+            await async_engine.dispose()
+
+    asyncio.run(_run())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
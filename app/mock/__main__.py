@@ -0,0 +1,13 @@
+"""启动模拟 LLM 服务: python -m app.mock"""
+
+import uvicorn
+
+from .config import mock_llm_settings
+from .server import create_mock_app
+
+if __name__ == "__main__":
+    uvicorn.run(
+        create_mock_app(mock_llm_settings),
+        host=mock_llm_settings.host,
+        port=mock_llm_settings.port,
+    )
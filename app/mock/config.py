@@ -0,0 +1,42 @@
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class MockLLMSettings(BaseSettings):
+    """模拟 LLM 服务配置"""
+
+    model_config = SettingsConfigDict(
+        env_prefix="MOCK_LLM_",
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=False,
+        extra="ignore",
+    )
+
+    # 服务器配置
+    host: str = Field(default="127.0.0.1", description="模拟服务主机")
+    port: int = Field(default=9000, description="模拟服务端口")
+
+    # 延迟配置
+    latency_distribution: str = Field(
+        default="constant",
+        description="延迟分布(constant/uniform/normal/lognormal/exponential)",
+    )
+    latency_mean: float = Field(default=0.0, description="平均延迟(秒)")
+    latency_std: float = Field(default=0.0, description="延迟标准差(秒)")
+    latency_min: float = Field(default=0.0, description="最小延迟(秒)")
+    latency_max: float = Field(default=60.0, description="最大延迟(秒)")
+
+    # 流式输出配置
+    stream_chunk_size: int = Field(default=4, description="流式输出每个片段的字符数")
+    stream_interval: float = Field(default=0.0, description="流式输出片段间隔(秒)")
+
+    # 故障注入配置
+    error_rate: float = Field(default=0.0, description="500 错误注入比例")
+    rate_limit_rate: float = Field(default=0.0, description="429 限流注入比例")
+    retry_after: float = Field(default=1.0, description="429 响应的 Retry-After(秒)")
+
+    seed: int | None = Field(default=None, description="随机种子，固定后结果可复现")
+
+
+mock_llm_settings = MockLLMSettings()
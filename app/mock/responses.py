@@ -0,0 +1,173 @@
+"""模拟 LLM 的固定响应，按系统提示词识别请求类型并返回符合解析格式的内容"""
+
+import re
+import zlib
+from enum import Enum
+
+import orjson
+
+from app.services.answer_enhancement.checkers import LLMBatchChecker, LLMChecker
+from app.services.answer_enhancement.enhancers import LLMEnhancer, LLMFusedEnhancer
+from app.services.answer_enhancement.extractors import LLMExtractor
+from app.services.qa_generation.enum import Intent, ProductType
+from app.services.qa_generation.filters import LLMFilter
+from app.services.qa_generation.generators import LLMQAGenerator
+
+VISUAL_PATTERN = re.compile(r"拍照|外观|颜色|配色|设计|屏幕|尺寸|厚度")
+MEDIA_PATTERN = re.compile(r"https?://\S+|\[[^\]]*(图|视频)[^\]]*\]")
+
+
+class PromptType(Enum):
+    """请求类型"""
+
+    GENERATOR = "generator"
+    FILTER = "filter"
+    CHECKER = "checker"
+    BATCH_CHECKER = "batch_checker"
+    ENHANCER = "enhancer"
+    EXTRACTOR = "extractor"
+    FUSED = "fused"
+    UNKNOWN = "unknown"
+
+
+SYSTEM_PROMPTS = {
+    LLMQAGenerator.system_prompt: PromptType.GENERATOR,
+    LLMFilter.system_prompt: PromptType.FILTER,
+    LLMChecker.system_prompt: PromptType.CHECKER,
+    LLMBatchChecker.system_prompt: PromptType.BATCH_CHECKER,
+    LLMEnhancer.system_prompt: PromptType.ENHANCER,
+    LLMExtractor.system_prompt: PromptType.EXTRACTOR,
+    LLMFusedEnhancer.system_prompt: PromptType.FUSED,
+}
+
+
+def detect_prompt_type(messages: list[dict]) -> PromptType:
+    """根据系统提示词识别请求类型"""
+    for message in messages:
+        if message.get("role") == "system":
+            return SYSTEM_PROMPTS.get(message.get("content"), PromptType.UNKNOWN)
+    return PromptType.UNKNOWN
+
+
+def count_tokens(text: str) -> int:
+    """粗略估算 token 数：中文按字计，其余按 4 字符计"""
+    cjk = len(re.findall(r"[一-鿿]", text))
+    return max(1, cjk + (len(text) - cjk) // 4)
+
+
+def _hash(text: str) -> int:
+    return zlib.crc32(text.encode("utf-8"))
+
+
+def _field(content: str, name: str) -> str:
+    """从用户提示词中提取字段值"""
+    match = re.search(rf"- {name}: (.*?)\n\s*(?:- |</input>)", content, re.S)
+    return match.group(1).strip() if match else ""
+
+
+def _product(text: str) -> str:
+    products = ProductType.get_product_types_values()
+    return products[_hash(text) % len(products)]
+
+
+def _generate(content: str) -> str:
+    """从对话中按 客户-客服 轮次构造QA对"""
+    turns = re.findall(r"\d+\. ([^:\n]*): (.*)$", content, re.M)
+    qas = []
+    for (sender, question), (next_sender, answer) in zip(turns, turns[1:]):
+        if "客服" in sender or "客服" not in next_sender:
+            continue
+        qas.append(
+            {
+                "question": f"{_product(question)}{question}",
+                "answer": answer,
+                "intent": Intent.PRODUCT_FUNCTION.value,
+            }
+        )
+        if len(qas) == 3:
+            break
+    return orjson.dumps(qas).decode("utf-8")
+
+
+def _filter(content: str) -> str:
+    keep = _hash(content) % 10 != 0
+    return orjson.dumps(
+        {"keep": keep, "reason": "问答提到的产品在列表中" if keep else "产品不在列表中"}
+    ).decode("utf-8")
+
+
+def _check(content: str) -> str:
+    question, answer = _field(content, "用户问题"), _field(content, "原始答案")
+    if MEDIA_PATTERN.search(answer) or VISUAL_PATTERN.search(question):
+        strategy, reason = "GUIDANCE", "视觉类问题适合补充图片"
+    elif len(answer) < 15 or _hash(content) % 2:
+        strategy, reason = "ENHANCE", "表达需要优化"
+    else:
+        strategy, reason = "DIRECT", "答案完整且表达优秀"
+    return orjson.dumps({"strategy": strategy, "reason": reason}).decode("utf-8")
+
+
+def _batch_check(content: str) -> str:
+    """逐条判断带序号的条目"""
+    results = []
+    for index, item in re.findall(r'<item index="(\d+)">(.*?)</item>', content, re.S):
+        results.append({"index": int(index), **orjson.loads(_check(f"{item}</input>"))})
+    return orjson.dumps(results).decode("utf-8")
+
+
+def _enhance(content: str) -> str:
+    return _enhanced_answer(_field(content, "策略类型"), _field(content, "原始答案"))
+
+
+def _enhanced_answer(strategy: str, answer: str) -> str:
+    if strategy.upper() == "GUIDANCE":
+        return f"{answer}给您看看实拍图"
+    if strategy.upper() == "ENHANCE":
+        return f"{answer},体验很不错。"
+    return answer
+
+
+def _extract(content: str) -> str:
+    question = _field(content, "用户问题")
+    if VISUAL_PATTERN.search(question):
+        result = {"description": f"{_product(question)}实拍图", "reason": "视觉类问题"}
+    else:
+        result = {"description": None, "reason": "文字说明已足够"}
+    return orjson.dumps(result).decode("utf-8")
+
+
+def _fused(content: str) -> str:
+    """组合策略判断、增强与提取的响应"""
+    strategy = orjson.loads(_check(content))["strategy"]
+    answer = _enhanced_answer(strategy, _field(content, "原始答案"))
+    description = orjson.loads(_extract(content))["description"]
+    return orjson.dumps(
+        {
+            "strategy": strategy,
+            "answer": answer,
+            "description": description if strategy == "GUIDANCE" else None,
+        }
+    ).decode("utf-8")
+
+
+RESPONDERS = {
+    PromptType.GENERATOR: _generate,
+    PromptType.FILTER: _filter,
+    PromptType.CHECKER: _check,
+    PromptType.BATCH_CHECKER: _batch_check,
+    PromptType.ENHANCER: _enhance,
+    PromptType.EXTRACTOR: _extract,
+    PromptType.FUSED: _fused,
+}
+
+
+def render_response(messages: list[dict]) -> tuple[PromptType, str]:
+    """返回请求类型与响应内容"""
+    prompt_type = detect_prompt_type(messages)
+    content = "\n".join(
+        message.get("content") or ""
+        for message in messages
+        if message.get("role") == "user"
+    )
+    responder = RESPONDERS.get(prompt_type)
+    return prompt_type, responder(content) if responder else "ok"
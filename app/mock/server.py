@@ -0,0 +1,267 @@
+"""OpenAI 兼容的模拟 LLM 服务，用于可复现的性能测试"""
+
+import math
+import time
+import uuid
+import random
+import asyncio
+import logging
+from collections import defaultdict
+
+import orjson
+from fastapi import FastAPI, Request, UploadFile, Form
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+from .config import MockLLMSettings, mock_llm_settings
+from .responses import count_tokens, detect_prompt_type, render_response
+
+logger = logging.getLogger(__name__)
+
+
+class LatencySampler:
+    """延迟采样器"""
+
+    def __init__(self, settings: MockLLMSettings, rng: random.Random):
+        self.settings = settings
+        self.rng = rng
+
+    def sample(self) -> float:
+        """按配置的分布采样延迟(秒)"""
+        s = self.settings
+        match s.latency_distribution:
+            case "uniform":
+                latency = self.rng.uniform(s.latency_min, s.latency_max)
+            case "normal":
+                latency = self.rng.gauss(s.latency_mean, s.latency_std)
+            case "lognormal":
+                # 以均值和标准差换算对数正态分布参数
+                if s.latency_mean <= 0:
+                    latency = 0.0
+                else:
+                    sigma2 = math.log1p(s.latency_std**2 / s.latency_mean**2)
+                    mu = math.log(s.latency_mean) - sigma2 / 2
+                    latency = self.rng.lognormvariate(mu, sigma2**0.5)
+            case "exponential":
+                latency = (
+                    self.rng.expovariate(1 / s.latency_mean)
+                    if s.latency_mean > 0
+                    else 0.0
+                )
+            case _:
+                latency = s.latency_mean
+        return min(max(latency, s.latency_min), s.latency_max)
+
+
+class MockLLMState:
+    """模拟服务运行状态：统计、文件与批量任务"""
+
+    def __init__(self, settings: MockLLMSettings):
+        self.settings = settings
+        self.rng = random.Random(settings.seed)
+        self.latency = LatencySampler(settings, self.rng)
+        self.stats: dict[str, dict[str, int]] = defaultdict(
+            lambda: {
+                "requests": 0,
+                "errors": 0,
+                "rate_limited": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+            }
+        )
+        self.files: dict[str, bytes] = {}
+        self.batches: dict[str, dict] = {}
+
+    def complete(self, body: dict) -> tuple[str, dict]:
+        """生成 chat completion 响应"""
+        messages = body.get("messages", [])
+        prompt_type, content = render_response(messages)
+        prompt_tokens = sum(count_tokens(m.get("content") or "") for m in messages)
+        completion_tokens = count_tokens(content)
+
+        stats = self.stats[prompt_type.value]
+        stats["requests"] += 1
+        stats["prompt_tokens"] += prompt_tokens
+        stats["completion_tokens"] += completion_tokens
+
+        return prompt_type.value, {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+
+def _error(status_code: int, message: str, error_type: str, **headers) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={"error": {"message": message, "type": error_type, "code": None}},
+        headers=headers or None,
+    )
+
+
+async def _stream_chunks(completion: dict, settings: MockLLMSettings):
+    """将完整响应拆分为 chat.completion.chunk 流"""
+    content = completion["choices"][0]["message"]["content"]
+    size = max(1, settings.stream_chunk_size)
+
+    def _chunk(delta: dict, finish_reason: str | None) -> bytes:
+        chunk = {
+            "id": completion["id"],
+            "object": "chat.completion.chunk",
+            "created": completion["created"],
+            "model": completion["model"],
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return b"data: " + orjson.dumps(chunk) + b"\n\n"
+
+    yield _chunk({"role": "assistant", "content": ""}, None)
+    for start in range(0, len(content), size):
+        if settings.stream_interval > 0:
+            await asyncio.sleep(settings.stream_interval)
+        yield _chunk({"content": content[start : start + size]}, None)
+    yield _chunk({}, "stop")
+    yield b"data: [DONE]\n\n"
+
+
+def create_mock_app(settings: MockLLMSettings | None = None) -> FastAPI:
+    """创建模拟 LLM 应用"""
+    settings = settings or mock_llm_settings
+    state = MockLLMState(settings)
+
+    app = FastAPI(title="Mock LLM", docs_url=None, redoc_url=None)
+    app.state.mock = state
+
+    @app.get("/v1/models")
+    async def list_models() -> dict:
+        return {
+            "object": "list",
+            "data": [{"id": "mock", "object": "model", "owned_by": "mock"}],
+        }
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request) -> Response:
+        body = orjson.loads(await request.body())
+
+        latency = state.latency.sample()
+        if latency > 0:
+            await asyncio.sleep(latency)
+
+        stats = state.stats[detect_prompt_type(body.get("messages", [])).value]
+        dice = state.rng.random()
+        if dice < settings.rate_limit_rate:
+            stats["rate_limited"] += 1
+            return _error(
+                429,
+                "Rate limit reached",
+                "rate_limit_error",
+                **{"retry-after": str(settings.retry_after)},
+            )
+        if dice < settings.rate_limit_rate + settings.error_rate:
+            stats["errors"] += 1
+            return _error(500, "Injected server error", "server_error")
+
+        _, completion = state.complete(body)
+        if body.get("stream"):
+            return StreamingResponse(
+                _stream_chunks(completion, settings), media_type="text/event-stream"
+            )
+        return Response(content=orjson.dumps(completion), media_type="application/json")
+
+    @app.post("/v1/files")
+    async def create_file(file: UploadFile, purpose: str = Form(...)) -> dict:
+        content = await file.read()
+        file_id = f"file-{uuid.uuid4().hex}"
+        state.files[file_id] = content
+        return _file_object(file_id, len(content), file.filename, purpose)
+
+    @app.get("/v1/files/{file_id}/content")
+    async def file_content(file_id: str) -> Response:
+        if file_id not in state.files:
+            return _error(404, "File not found", "invalid_request_error")
+        return Response(
+            content=state.files[file_id], media_type="application/octet-stream"
+        )
+
+    @app.post("/v1/batches")
+    async def create_batch(request: Request) -> Response:
+        body = orjson.loads(await request.body())
+        input_file_id = body["input_file_id"]
+        if input_file_id not in state.files:
+            return _error(404, "File not found", "invalid_request_error")
+
+        outputs = []
+        for line in state.files[input_file_id].splitlines():
+            if not line.strip():
+                continue
+            item = orjson.loads(line)
+            _, completion = state.complete(item["body"])
+            outputs.append(
+                {
+                    "id": f"batch_req_{uuid.uuid4().hex}",
+                    "custom_id": item["custom_id"],
+                    "response": {"status_code": 200, "body": completion},
+                    "error": None,
+                }
+            )
+        output_file_id = f"file-{uuid.uuid4().hex}"
+        state.files[output_file_id] = b"\n".join(orjson.dumps(o) for o in outputs)
+
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        state.batches[batch_id] = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": body["endpoint"],
+            "input_file_id": input_file_id,
+            "output_file_id": output_file_id,
+            "error_file_id": None,
+            "completion_window": body.get("completion_window", "24h"),
+            "status": "completed",
+            "created_at": int(time.time()),
+            "request_counts": {
+                "total": len(outputs),
+                "completed": len(outputs),
+                "failed": 0,
+            },
+        }
+        return JSONResponse(content=state.batches[batch_id])
+
+    @app.get("/v1/batches/{batch_id}")
+    async def retrieve_batch(batch_id: str) -> Response:
+        if batch_id not in state.batches:
+            return _error(404, "Batch not found", "invalid_request_error")
+        return JSONResponse(content=state.batches[batch_id])
+
+    @app.get("/mock/stats")
+    async def get_stats() -> dict:
+        return dict(state.stats)
+
+    @app.post("/mock/stats/reset")
+    async def reset_stats() -> dict:
+        state.stats.clear()
+        return {}
+
+    return app
+
+
+def _file_object(file_id: str, size: int, filename: str | None, purpose: str) -> dict:
+    return {
+        "id": file_id,
+        "object": "file",
+        "bytes": size,
+        "created_at": int(time.time()),
+        "filename": filename or "file",
+        "purpose": purpose,
+        "status": "processed",
+    }
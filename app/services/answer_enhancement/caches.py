@@ -0,0 +1,250 @@
+import re
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+
+import numpy as np
+from prometheus_client import Counter, Gauge
+from sentence_transformers import SentenceTransformer
+from sqlalchemy import select
+
+from app.core.database import GuidanceDescription, async_session
+
+logger = logging.getLogger(__name__)
+
+SEMANTIC_CACHE_LOOKUPS = Counter(
+    "answer_enhancement_semantic_cache_lookups_total",
+    "Answer enhancement semantic cache lookups",
+    ["result"],
+)
+SEMANTIC_CACHE_EVICTIONS = Counter(
+    "answer_enhancement_semantic_cache_evictions_total",
+    "Answer enhancement semantic cache evictions",
+    ["reason"],
+)
+SEMANTIC_CACHE_SIZE = Gauge(
+    "answer_enhancement_semantic_cache_size",
+    "Answer enhancement semantic cache entries",
+)
+GUIDANCE_CACHE_LOOKUPS = Counter(
+    "answer_enhancement_guidance_cache_lookups_total",
+    "Answer enhancement guidance description cache lookups",
+    ["result"],
+)
+
+# 答案中的图片/视频链接或占位符，如 https://.../a.jpg、[QuantumFlip实拍图]
+MEDIA_PATTERN = re.compile(r"https?://[^\s\]\)]+|\[[^\]]*(?:图|视频)[^\]]*\]")
+
+
+class SemanticCache:
+    """语义缓存
+
+    以问答对的归一化向量为键缓存增强结果，查询时取相似度不低于阈值且原始答案完全一致的最近邻。
+    向量存放在预分配的矩阵中，条目数超过上限时按 LRU 淘汰，过期条目在查询时忽略、写入时回收。
+    """
+
+    def __init__(
+        self,
+        sentence_transformer: SentenceTransformer,
+        threshold: float,
+        max_size: int,
+        ttl: float,
+    ):
+        """初始化语义缓存
+
+        Args:
+            sentence_transformer: 向量模型
+            threshold: 相似度阈值
+            max_size: 最大条目数
+            ttl: 条目有效期(秒)
+        """
+        self.sentence_transformer = sentence_transformer
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self.embeddings: np.ndarray | None = None
+        self.expires_at = np.zeros(max_size, dtype=np.float64)
+        self.answers: list[str | None] = [None] * max_size
+        self.values: list[str | None] = [None] * max_size
+        # 已占用槽位，按访问顺序排列，最久未访问的在前
+        self.lru: OrderedDict[int, None] = OrderedDict()
+        self.free_slots = list(range(max_size - 1, -1, -1))
+
+    def __len__(self) -> int:
+        return len(self.lru)
+
+    async def embed(self, question: str, answer: str) -> np.ndarray:
+        """问答对向量，编码在线程中执行，避免阻塞事件循环"""
+        return await asyncio.to_thread(self._embed, question, answer)
+
+    def _embed(self, question: str, answer: str) -> np.ndarray:
+        embedding = self.sentence_transformer.encode(
+            [f"{question}\n{answer}"], convert_to_numpy=True
+        )[0].astype(np.float32)
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm else embedding
+
+    def get(self, embedding: np.ndarray, answer: str) -> str | None:
+        """查询缓存，未命中时返回 None"""
+        value = self._lookup(embedding, answer)
+        SEMANTIC_CACHE_LOOKUPS.labels("miss" if value is None else "hit").inc()
+        return value
+
+    def _lookup(self, embedding: np.ndarray, answer: str) -> str | None:
+        if not self.lru:
+            return None
+
+        similarities = self.embeddings @ embedding
+        similarities[self.expires_at <= time.monotonic()] = -np.inf
+        candidates = np.flatnonzero(similarities >= self.threshold)
+        for slot in candidates[np.argsort(-similarities[candidates])]:
+            if self.answers[slot] == answer:
+                self.lru.move_to_end(int(slot))
+                return self.values[slot]
+        return None
+
+    def put(self, embedding: np.ndarray, answer: str, value: str) -> None:
+        """写入缓存"""
+        if self.embeddings is None:
+            self.embeddings = np.zeros(
+                (self.max_size, embedding.shape[0]), dtype=np.float32
+            )
+
+        if not self.free_slots:
+            self._evict()
+
+        slot = self.free_slots.pop()
+        self.embeddings[slot] = embedding
+        self.expires_at[slot] = time.monotonic() + self.ttl
+        self.answers[slot] = answer
+        self.values[slot] = value
+        self.lru[slot] = None
+        SEMANTIC_CACHE_SIZE.set(len(self.lru))
+
+    def _evict(self) -> None:
+        """回收过期条目，没有过期条目时淘汰最久未访问的条目"""
+        # 调用时已无空闲槽位，过期的槽位均为已占用槽位
+        expired = np.flatnonzero(self.expires_at <= time.monotonic()).tolist()
+        if expired:
+            for slot in expired:
+                self._release(slot)
+            SEMANTIC_CACHE_EVICTIONS.labels("ttl").inc(len(expired))
+        else:
+            self._release(next(iter(self.lru)))
+            SEMANTIC_CACHE_EVICTIONS.labels("lru").inc()
+
+    def _release(self, slot: int) -> None:
+        del self.lru[slot]
+        self.expires_at[slot] = 0
+        self.answers[slot] = None
+        self.values[slot] = None
+        self.free_slots.append(slot)
+
+
+class GuidanceCache:
+    """图片/视频描述缓存
+
+    以答案中的媒体链接集合与问题主题为键缓存 LLMExtractor 的结果，内存中按 LRU 保留热点条目，
+    并持久化到数据库，内存未命中时回查数据库。首次查询前从数据库预热最近更新的条目。
+    """
+
+    def __init__(self, topics: dict[str, str], max_size: int, warm_up_size: int):
+        """初始化描述缓存
+
+        Args:
+            topics: 主题名称 -> 问题匹配正则
+            max_size: 内存最大条目数
+            warm_up_size: 预热条目数
+        """
+        self.topics = [
+            (topic, re.compile(pattern, re.I)) for topic, pattern in topics.items()
+        ]
+        self.max_size = max_size
+        self.warm_up_size = warm_up_size
+        self.entries: OrderedDict[str, str] = OrderedDict()
+        self._warmed = False
+        self._warm_up_lock = asyncio.Lock()
+
+    def topic(self, question: str) -> str:
+        """问题主题，未匹配任何主题时为 general"""
+        for topic, pattern in self.topics:
+            if pattern.search(question):
+                return topic
+        return "general"
+
+    def key(self, question: str, answer: str) -> tuple[str, list[str], str] | None:
+        """缓存键，答案中没有媒体链接时返回 None"""
+        media = sorted(set(MEDIA_PATTERN.findall(answer)))
+        if not media:
+            return None
+        topic = self.topic(question)
+        digest = hashlib.sha1("\n".join([topic, *media]).encode("utf-8")).hexdigest()
+        return digest, media, topic
+
+    async def warm_up(self) -> None:
+        """从数据库加载最近更新的条目"""
+        async with self._warm_up_lock:
+            if self._warmed:
+                return
+            async with async_session() as session:
+                result = await session.execute(
+                    select(
+                        GuidanceDescription.cache_key, GuidanceDescription.description
+                    )
+                    .where(GuidanceDescription.description != "")
+                    .order_by(GuidanceDescription.updated_at.desc())
+                    .limit(min(self.warm_up_size, self.max_size))
+                )
+                rows = result.all()
+            # 按更新时间从旧到新写入，使最近更新的条目最后被淘汰
+            for cache_key, description in reversed(rows):
+                self._set(cache_key, description)
+            self._warmed = True
+            logger.info(f"{self.__class__.__name__} warmed up with {len(rows)} entries")
+
+    async def get(self, cache_key: str) -> str | None:
+        """查询缓存，未命中时返回 None，空描述视为未命中"""
+        if not self._warmed:
+            await self.warm_up()
+
+        description = self.entries.get(cache_key)
+        if description is not None:
+            self.entries.move_to_end(cache_key)
+        else:
+            async with async_session() as session:
+                description = await session.scalar(
+                    select(GuidanceDescription.description).where(
+                        GuidanceDescription.cache_key == cache_key,
+                        GuidanceDescription.description != "",
+                    )
+                )
+            if description is not None:
+                self._set(cache_key, description)
+
+        GUIDANCE_CACHE_LOOKUPS.labels("miss" if description is None else "hit").inc()
+        return description
+
+    async def put(
+        self, cache_key: str, media: list[str], topic: str, description: str
+    ) -> None:
+        """写入缓存并持久化"""
+        self._set(cache_key, description)
+        async with async_session() as session:
+            await session.merge(
+                GuidanceDescription(
+                    cache_key=cache_key,
+                    media=media,
+                    topic=topic,
+                    description=description,
+                )
+            )
+            await session.commit()
+
+    def _set(self, cache_key: str, description: str) -> None:
+        self.entries[cache_key] = description
+        self.entries.move_to_end(cache_key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
@@ -1,12 +1,31 @@
+import re
 import json
+import atexit
+import asyncio
 import logging
 from abc import ABC, abstractmethod
-from typing import Any
+from datetime import datetime
+from pathlib import Path
 
+import orjson
 from openai import AsyncOpenAI
+from prometheus_client import Counter, Histogram
+from sentence_transformers import SentenceTransformer
+
+from .classifiers import LogisticRegressionClassifier, build_features
 
 logger = logging.getLogger(__name__)
 
+CHECKER_BATCH_SIZE = Histogram(
+    "answer_enhancement_checker_batch_size",
+    "Answer enhancement batched checker call size",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+CHECKER_BATCH_FALLBACKS = Counter(
+    "answer_enhancement_checker_batch_fallbacks_total",
+    "Answer enhancement batched checker items falling back to single calls",
+)
+
 
 class Checker(ABC):
     """检查器抽象基类"""
@@ -18,27 +37,83 @@ class Checker(ABC):
 
 
 class RuleChecker(Checker):
-    """规则检查器"""
+    """规则检查器
+
+    按顺序匹配规则，命中第一条规则时返回其策略，均未命中时返回空字符串交由后续检查器判断。
+    规则字段:
+        strategy: 命中时返回的策略
+        question_condition: 问题需匹配的正则
+        answer_condition: 答案需匹配的正则
+        answer_exclude_condition: 答案不能匹配的正则
+    """
 
-    def __init__(self, rules: list[str]):
-        """初始化规则检查器"""
-        self.rules = rules
+    def __init__(self, rules: list[dict]):
+        """初始化规则检查器，预编译规则正则"""
+        self.rules = [
+            (
+                rule["strategy"],
+                [
+                    (key, re.compile(rule[key], re.I))
+                    for key in (
+                        "question_condition",
+                        "answer_condition",
+                        "answer_exclude_condition",
+                    )
+                    if rule.get(key)
+                ],
+            )
+            for rule in rules
+        ]
 
-    def check(self, question: str, answer: str) -> str:
+    async def check(self, question: str, answer: str) -> str:
         """策略判断"""
+        for strategy, conditions in self.rules:
+            if conditions and all(
+                self._match(key, pattern, question, answer)
+                for key, pattern in conditions
+            ):
+                return strategy
         return ""
 
+    @staticmethod
+    def _match(key: str, pattern: re.Pattern, question: str, answer: str) -> bool:
+        if key == "question_condition":
+            return pattern.search(question) is not None
+        if key == "answer_condition":
+            return pattern.search(answer) is not None
+        return pattern.search(answer) is None
+
 
 class MLChecker(Checker):
-    """机器学习模型检查器"""
+    """机器学习模型检查器
+
+    使用由 LLMChecker 判断结果训练的分类器，置信度低于阈值时返回空字符串交由后续检查器判断。
+    """
 
-    def __init__(self, model: Any):
+    def __init__(
+        self,
+        sentence_transformer: SentenceTransformer,
+        classifier: LogisticRegressionClassifier,
+        threshold: float,
+    ):
         """初始化机器学习模型检查器"""
-        self.model = model
+        self.sentence_transformer = sentence_transformer
+        self.classifier = classifier
+        self.threshold = threshold
 
-    def check(self, question: str, answer: str) -> str:
+    async def check(self, question: str, answer: str) -> str:
         """策略判断"""
-        return ""
+        # 向量编码在线程中执行，避免阻塞事件循环
+        features = await asyncio.to_thread(
+            build_features, self.sentence_transformer, [question], [answer]
+        )
+        strategy, confidence = self.classifier.predict(features)[0]
+        logger.debug(
+            f"{self.__class__.__name__} predicted {strategy} with confidence {confidence:.3f}"
+        )
+        if confidence < self.threshold:
+            return ""
+        return strategy
 
 
 class LLMChecker(Checker):
@@ -215,3 +290,228 @@ class LLMChecker(Checker):
             return ""
 
         return check_result.get("strategy", "")
+
+
+class LLMBatchChecker(Checker):
+    """LLM批量检查器
+
+    跨请求收集时间窗口内的检查请求，以带序号的条目合并为一次LLM调用，再将各条目的判断结果返回给对应请求。
+    批量输出缺失或解析失败的条目逐条回退到 LLMChecker。实例需在请求间共享。
+    """
+
+    system_prompt: str = (
+        LLMChecker.system_prompt
+        + """
+    <batch_output_format>
+    输入包含多个带序号的条目,需逐条独立判断,忽略上文的单条输出格式。
+    输出JSON数组,每个条目一个元素,包含序号、策略名称和决策理由:
+    [
+    {"index": 0, "strategy": "策略名称", "reason": "简要决策原因"}
+    ]
+    不要遗漏条目,不要输出任何JSON之外的内容。
+    </batch_output_format>
+    """
+    )
+    item_prompt: str = """
+    <item index="{index}">
+    - 用户问题: {question}
+    - 原始答案: {answer}
+    </item>
+    """
+
+    def __init__(
+        self,
+        openai_client: AsyncOpenAI,
+        llm_model: str,
+        temperature: float = 0.01,
+        window: float = 0.01,
+        max_batch_size: int = 16,
+    ):
+        """初始化LLM批量检查器
+
+        Args:
+            window: 收集请求的时间窗口(秒)
+            max_batch_size: 单次调用的最大条目数，达到时立即发送
+        """
+        self.client = openai_client
+        self.llm_model = llm_model
+        self.temperature = temperature
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.fallback = LLMChecker(openai_client, llm_model, temperature)
+
+        self._pending: list[tuple[str, str, asyncio.Future]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def check(self, question: str, answer: str) -> str:
+        """策略判断，等待所在批次返回"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((question, answer, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        """发送当前批次"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.create_task(self._dispatch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: list[tuple[str, str, asyncio.Future]]) -> None:
+        CHECKER_BATCH_SIZE.observe(len(batch))
+        strategies = {}
+        if len(batch) > 1:
+            try:
+                strategies = await self.check_batch(
+                    [(question, answer) for question, answer, _ in batch]
+                )
+            except Exception:
+                logger.exception(f"{self.__class__.__name__} batch call failed")
+
+        async def _resolve(
+            index: int, question: str, answer: str, future: asyncio.Future
+        ) -> None:
+            if future.done():
+                return
+            strategy = strategies.get(index)
+            if strategy is None:
+                if len(batch) > 1:
+                    CHECKER_BATCH_FALLBACKS.inc()
+                try:
+                    strategy = await self.fallback.check(question, answer)
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                    return
+            if not future.done():
+                future.set_result(strategy)
+
+        await asyncio.gather(
+            *[
+                _resolve(index, question, answer, future)
+                for index, (question, answer, future) in enumerate(batch)
+            ]
+        )
+
+    async def check_batch(self, items: list[tuple[str, str]]) -> dict[int, str]:
+        """一次调用判断多个条目，返回 序号 -> 策略，缺失或无效的条目不包含在结果中"""
+        response = await self.client.chat.completions.create(
+            model=self.llm_model,
+            messages=[
+                {"role": "system", "content": self.system_prompt},
+                {
+                    "role": "user",
+                    "content": "".join(
+                        self.item_prompt.format(
+                            index=index, question=question, answer=answer
+                        )
+                        for index, (question, answer) in enumerate(items)
+                    ),
+                },
+            ],
+            temperature=self.temperature,
+        )
+        content = response.choices[0].message.content.strip()
+        logger.debug(f"{self.__class__.__name__} response content: {content}")
+
+        return self.parse_response(content, len(items))
+
+    def parse_response(self, content: str, size: int) -> dict[int, str]:
+        """解析批量响应"""
+        try:
+            results = json.loads(content)
+        except json.JSONDecodeError:
+            logger.error(
+                f"{self.__class__.__name__} response content is not a valid JSON: {content}"
+            )
+            return {}
+        if not isinstance(results, list):
+            return {}
+
+        strategies = {}
+        for result in results:
+            if not isinstance(result, dict):
+                continue
+            index, strategy = result.get("index"), result.get("strategy")
+            if (
+                isinstance(index, int)
+                and 0 <= index < size
+                and isinstance(strategy, str)
+            ):
+                strategies[index] = strategy
+        return strategies
+
+
+class CheckerDecisionLogger:
+    """检查器判断日志，以 JSONL 追加记录输入与判断结果，用于训练 MLChecker
+
+    判断记录缓存在内存中，每隔 flush_interval 秒在线程中合并追加到文件，进程退出时写入剩余记录。
+    """
+
+    def __init__(self, path: str | Path, flush_interval: float = 1.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self._pending: list[bytes] = []
+        self._flush_task: asyncio.Task | None = None
+        atexit.register(self._write_pending)
+
+    def record(self, question: str, answer: str, checker: str, strategy: str) -> None:
+        self._pending.append(
+            orjson.dumps(
+                {
+                    "question": question,
+                    "answer": answer,
+                    "checker": checker,
+                    "strategy": strategy,
+                    "created_at": datetime.now().isoformat(),
+                }
+            )
+        )
+        self._ensure_flush_task()
+
+    async def flush(self) -> None:
+        """在线程中写入缓存的判断记录"""
+        if self._pending:
+            await asyncio.to_thread(self._write_pending)
+
+    def _write_pending(self) -> None:
+        lines, self._pending = self._pending, []
+        if not lines:
+            return
+        try:
+            with open(self.path, "ab") as f:
+                f.write(b"\n".join(lines) + b"\n")
+        except OSError:
+            logger.exception(f"Failed to write {len(lines)} checker decisions")
+
+    def _ensure_flush_task(self) -> None:
+        # 写入任务绑定事件循环，事件循环更换(如测试中多次 asyncio.run)时重新创建
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 不在事件循环中(如训练脚本)时直接写入
+            self._write_pending()
+            return
+        if (
+            self._flush_task is None
+            or self._flush_task.done()
+            or self._flush_task.get_loop() is not loop
+        ):
+            self._flush_task = loop.create_task(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        # 没有待写入的记录时退出，下次记录时重新启动
+        while self._pending:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
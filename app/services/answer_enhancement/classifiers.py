@@ -0,0 +1,102 @@
+import logging
+from pathlib import Path
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+logger = logging.getLogger(__name__)
+
+
+def build_features(
+    sentence_transformer: SentenceTransformer,
+    questions: list[str],
+    answers: list[str],
+) -> np.ndarray:
+    """拼接问题与答案的归一化向量作为特征"""
+    embeddings = sentence_transformer.encode(
+        questions + answers, convert_to_numpy=True
+    ).astype(np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    embeddings = embeddings / np.where(norms == 0, 1, norms)
+    return np.hstack([embeddings[: len(questions)], embeddings[len(questions) :]])
+
+
+class LogisticRegressionClassifier:
+    """多分类逻辑回归(softmax)，使用批量梯度下降训练"""
+
+    def __init__(self, labels: list[str], weights: np.ndarray, bias: np.ndarray):
+        self.labels = labels
+        self.weights = weights
+        self.bias = bias
+
+    @classmethod
+    def fit(
+        cls,
+        features: np.ndarray,
+        targets: list[str],
+        epochs: int = 300,
+        learning_rate: float = 1.0,
+        l2: float = 1e-4,
+    ) -> "LogisticRegressionClassifier":
+        """训练分类器
+
+        Args:
+            features: 特征矩阵 (样本数, 特征维度)
+            targets: 标签列表
+            epochs: 迭代次数
+            learning_rate: 学习率
+            l2: L2 正则系数
+        """
+        labels = sorted(set(targets))
+        label_indices = {label: idx for idx, label in enumerate(labels)}
+        one_hot = np.zeros((len(targets), len(labels)), dtype=np.float32)
+        one_hot[np.arange(len(targets)), [label_indices[t] for t in targets]] = 1
+
+        classifier = cls(
+            labels,
+            np.zeros((features.shape[1], len(labels)), dtype=np.float32),
+            np.zeros(len(labels), dtype=np.float32),
+        )
+        for _ in range(epochs):
+            gradient = (classifier.predict_proba(features) - one_hot) / len(targets)
+            classifier.weights -= learning_rate * (
+                features.T @ gradient + l2 * classifier.weights
+            )
+            classifier.bias -= learning_rate * gradient.sum(axis=0)
+
+        return classifier
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        """预测各标签概率"""
+        logits = features @ self.weights + self.bias
+        logits -= logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        return probabilities / probabilities.sum(axis=1, keepdims=True)
+
+    def predict(self, features: np.ndarray) -> list[tuple[str, float]]:
+        """预测标签及置信度"""
+        probabilities = self.predict_proba(features)
+        indices = probabilities.argmax(axis=1)
+        return [
+            (self.labels[idx], float(probabilities[row, idx]))
+            for row, idx in enumerate(indices)
+        ]
+
+    def save(self, path: str | Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(
+                f, labels=np.array(self.labels), weights=self.weights, bias=self.bias
+            )
+
+    @classmethod
+    def load(cls, path: str | Path) -> "LogisticRegressionClassifier":
+        with np.load(path) as data:
+            classifier = cls(
+                [str(label) for label in data["labels"]],
+                data["weights"],
+                data["bias"],
+            )
+        logger.info(f"{cls.__name__} loaded from {path}, labels: {classifier.labels}")
+        return classifier
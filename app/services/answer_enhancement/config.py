@@ -18,5 +18,85 @@ class AnswerEnhancementSettings(BaseSettings):
     enhancer_temperature: float = Field(default=0.3, description="增强器温度")
     extractor_temperature: float = Field(default=0.01, description="提取器温度")
 
+    # 规则检查器配置，命中时跳过LLM检查器
+    checker_rules: list[dict] = Field(
+        default=[
+            {
+                "strategy": "guidance",
+                "answer_condition": r"https?://\S+|\[[^\]]*(图|视频)[^\]]*\]",
+                "answer_exclude_condition": r"给您(发|看|展示)|我(给您|再)发|这是(实物|产品)?(图|视频)",
+            },
+            {
+                "strategy": "guidance",
+                "question_condition": r"拍照|外观|颜色|配色|设计|屏幕|尺寸",
+            },
+        ],
+        description="规则检查器规则",
+    )
+
+    # 机器学习检查器配置，模型由 training 模块训练
+    ml_checker_model_path: str = Field(
+        default="", description="策略分类器路径，为空时不启用MLChecker"
+    )
+    ml_checker_threshold: float = Field(default=0.9, description="MLChecker置信度阈值")
+    decision_log_path: str = Field(
+        default="", description="检查器判断日志路径，为空时不记录"
+    )
+
+    # 语义缓存配置
+    semantic_cache_enabled: bool = Field(default=False, description="是否启用语义缓存")
+    semantic_cache_threshold: float = Field(
+        default=0.97, description="语义缓存相似度阈值"
+    )
+    semantic_cache_max_size: int = Field(
+        default=10000, description="语义缓存最大条目数"
+    )
+    semantic_cache_ttl: float = Field(default=86400, description="语义缓存有效期(秒)")
+
+    # 图片/视频描述缓存配置
+    guidance_cache_enabled: bool = Field(
+        default=False, description="是否启用图片/视频描述缓存"
+    )
+    guidance_cache_max_size: int = Field(
+        default=10000, description="描述缓存内存最大条目数"
+    )
+    guidance_cache_warm_up_size: int = Field(
+        default=10000, description="描述缓存预热条目数"
+    )
+    guidance_topics: dict[str, str] = Field(
+        default={
+            "photo": r"拍照|相机|摄像|镜头|样张",
+            "appearance": r"外观|设计|颜色|配色|材质",
+            "screen": r"屏幕|显示",
+            "size": r"尺寸|厚度|重量|大小",
+            "unboxing": r"开箱|包装|配件",
+        },
+        description="描述缓存问题主题",
+    )
+
+    # 批量检查器配置，合并时间窗口内的检查请求为一次LLM调用
+    checker_batch_enabled: bool = Field(default=False, description="是否启用批量检查器")
+    checker_batch_window: float = Field(
+        default=0.01, description="批量检查时间窗口(秒)"
+    )
+    checker_batch_max_size: int = Field(default=16, description="批量检查最大条目数")
+
+    # 并发配置
+    max_concurrency_per_request: int = Field(
+        default=8, description="单个请求内列表项的最大并发数"
+    )
+    max_concurrency: int = Field(default=32, description="全局列表项的最大并发数")
+
+    # 执行模式: staged 分步调用, fused 单次调用完成判断与增强
+    pipeline_mode: str = Field(default="staged", description="执行模式")
+
+    # 推测执行配置
+    speculative: bool = Field(
+        default=False, description="是否在策略判断的同时按预测策略启动增强"
+    )
+    speculative_strategy: str = Field(
+        default="enhance", description="推测执行的预测策略"
+    )
+
 
 enhancement_service_settings = AnswerEnhancementSettings()
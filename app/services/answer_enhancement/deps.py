@@ -1,14 +1,98 @@
+import asyncio
+from functools import lru_cache
+from typing import Any
+
 from fastapi import Request
+from openai import AsyncOpenAI
+from sentence_transformers import SentenceTransformer
 
+from .caches import GuidanceCache, SemanticCache
+from .checkers import CheckerDecisionLogger, LLMBatchChecker
+from .classifiers import LogisticRegressionClassifier
 from .service import AnswerEnhancementService
 from .config import enhancement_service_settings
 
+# 跨请求共享的列表项并发限制
+enhancement_semaphore = asyncio.Semaphore(enhancement_service_settings.max_concurrency)
 
-def get_answer_enhancement_service(request: Request) -> AnswerEnhancementService:
+
+@lru_cache
+def get_strategy_classifier() -> LogisticRegressionClassifier | None:
+    if not enhancement_service_settings.ml_checker_model_path:
+        return None
+    return LogisticRegressionClassifier.load(
+        enhancement_service_settings.ml_checker_model_path
+    )
+
+
+@lru_cache
+def get_decision_logger() -> CheckerDecisionLogger | None:
+    if not enhancement_service_settings.decision_log_path:
+        return None
+    return CheckerDecisionLogger(enhancement_service_settings.decision_log_path)
+
+
+@lru_cache
+def get_semantic_cache(
+    sentence_transformer: SentenceTransformer,
+) -> SemanticCache | None:
+    if not enhancement_service_settings.semantic_cache_enabled:
+        return None
+    return SemanticCache(
+        sentence_transformer,
+        enhancement_service_settings.semantic_cache_threshold,
+        enhancement_service_settings.semantic_cache_max_size,
+        enhancement_service_settings.semantic_cache_ttl,
+    )
+
+
+@lru_cache
+def get_guidance_cache() -> GuidanceCache | None:
+    if not enhancement_service_settings.guidance_cache_enabled:
+        return None
+    return GuidanceCache(
+        enhancement_service_settings.guidance_topics,
+        enhancement_service_settings.guidance_cache_max_size,
+        enhancement_service_settings.guidance_cache_warm_up_size,
+    )
+
+
+@lru_cache
+def get_batch_checker(openai_client: AsyncOpenAI) -> LLMBatchChecker | None:
+    if not enhancement_service_settings.checker_batch_enabled:
+        return None
+    return LLMBatchChecker(
+        openai_client,
+        enhancement_service_settings.llm_model,
+        enhancement_service_settings.checker_temperature,
+        enhancement_service_settings.checker_batch_window,
+        enhancement_service_settings.checker_batch_max_size,
+    )
+
+
+def build_answer_enhancement_service(state: Any) -> AnswerEnhancementService:
+    """由共享资源(app.state 或任务运行上下文)构建服务"""
     return AnswerEnhancementService(
-        request.app.state.openai_client,
+        state.openai_client,
         enhancement_service_settings.llm_model,
         enhancement_service_settings.checker_temperature,
         enhancement_service_settings.enhancer_temperature,
         enhancement_service_settings.extractor_temperature,
+        enhancement_service_settings.max_concurrency_per_request,
+        enhancement_semaphore,
+        enhancement_service_settings.speculative,
+        enhancement_service_settings.speculative_strategy,
+        enhancement_service_settings.checker_rules,
+        state.sentence_transformer,
+        get_strategy_classifier(),
+        enhancement_service_settings.ml_checker_threshold,
+        get_decision_logger(),
+        enhancement_service_settings.pipeline_mode,
+        get_semantic_cache(state.sentence_transformer),
+        get_guidance_cache(),
+        get_batch_checker(state.openai_client),
     )
+
+
+def get_answer_enhancement_service(request: Request) -> AnswerEnhancementService:
+    return build_answer_enhancement_service(request.app.state)
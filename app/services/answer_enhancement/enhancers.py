@@ -1,8 +1,12 @@
+import json
 import logging
 from abc import ABC, abstractmethod
+from typing import AsyncIterator
 
 from openai import AsyncOpenAI
 
+from .enum import EnhancementStrategy
+
 logger = logging.getLogger(__name__)
 
 
@@ -195,3 +199,165 @@ class LLMEnhancer(Enhancer):
         logger.debug(f"{self.__class__.__name__} response content: {content}")
 
         return content
+
+    async def enhance_stream(
+        self, question: str, answer: str, strategy: str
+    ) -> AsyncIterator[str]:
+        """流式增强答案，逐段返回生成的文本"""
+        stream = await self.client.chat.completions.create(
+            model=self.llm_model,
+            messages=[
+                {"role": "system", "content": self.system_prompt},
+                {
+                    "role": "user",
+                    "content": self.user_prompt.format(
+                        question=question, answer=answer, strategy=strategy
+                    ),
+                },
+            ],
+            temperature=self.temperature,
+            stream=True,
+        )
+        # 提前结束迭代(如客户端断开)时关闭连接
+        async with stream:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+
+class LLMFusedEnhancer:
+    """LLM融合增强器，一次调用完成策略判断、答案增强与图片/视频描述生成"""
+
+    system_prompt: str = """
+    <role>
+    你是一位专业、亲切的客服人员,负责为用户提供产品咨询服务。
+    你需要先为原始答案选择最佳的回复策略,再按策略优化客服回复。
+    </role>
+
+    <strategies>
+    1. DIRECT: 原始答案完整、优秀,可直接使用
+    2. GUIDANCE: 需要为图片/视频添加引导语(原始答案包含链接但缺引导语,或问题为拍照、外观、颜色、设计、屏幕、尺寸等视觉类问题)
+    3. ENHANCE: 原始答案内容正确但表达生硬、啰嗦、过于简略或专业术语过多,需要优化改写
+    </strategies>
+
+    <execution_rules>
+    - DIRECT: answer 为原始答案,不做任何修改
+    - GUIDANCE: 保留原始答案内容与链接,在链接前或末尾添加自然的引导语,如"我给您发几张实拍图吧"、"给您看看外观图"
+    - ENHANCE: 保留核心信息与事实,简化术语,突出用户利益点,语气自然亲切
+    - GUIDANCE 时生成图片/视频描述 description(产品名称+资源类型,20字以内),如"QuantumFlip实拍样张";
+      答案已包含图片/视频链接或其他策略时 description 为 null
+    </execution_rules>
+
+    <constraints>
+    1. 总回答不超过3句话(不包含引导语),每句话不超过20字
+    2. 不添加多余的客套话或冗余信息,不改变事实
+    </constraints>
+
+    <output_format>
+    输出JSON格式:
+    {
+    "strategy": "DIRECT/GUIDANCE/ENHANCE",
+    "answer": "最终答案",
+    "description": "图片/视频描述文本或null"
+    }
+    不要输出任何JSON之外的内容。
+    </output_format>
+
+    <examples>
+    <example>
+    用户问题: 有什么颜色?
+    原始答案: 提供曜石黑、冰川银、星云蓝三种配色
+    输出: {"strategy": "GUIDANCE", "answer": "提供曜石黑、冰川银、星云蓝三种配色。给您看看外观图", "description": "QuantumFlip三色外观图"}
+    </example>
+
+    <example>
+    用户问题: 拍照怎么样?
+    原始答案: [QuantumFlip实拍图]
+    输出: {"strategy": "GUIDANCE", "answer": "我给您发几张实拍图吧[QuantumFlip实拍图]", "description": null}
+    </example>
+
+    <example>
+    用户问题: 价格多少?
+    原始答案: 7999元起
+    输出: {"strategy": "ENHANCE", "answer": "这款售价7999元起,性价比很高。", "description": null}
+    </example>
+
+    <example>
+    用户问题: 苹果耳机跟你们音质最好的耳机对比哪个好?
+    原始答案: 作为音质巅峰,VERTU耳机融入伦敦交响乐团专属调校。其具备Hi-Fi级解码与3D环绕音效,还原现场听感。
+    输出: {"strategy": "DIRECT", "answer": "作为音质巅峰,VERTU耳机融入伦敦交响乐团专属调校。其具备Hi-Fi级解码与3D环绕音效,还原现场听感。", "description": null}
+    </example>
+    </examples>
+    """
+    user_prompt: str = """
+    <input>
+    - 用户问题: {question}
+    - 原始答案: {answer}
+    </input>
+    """
+
+    def __init__(
+        self, openai_client: AsyncOpenAI, llm_model: str, temperature: float = 0.3
+    ):
+        """初始化LLM融合增强器"""
+        self.client = openai_client
+        self.llm_model = llm_model
+        self.temperature = temperature
+
+    async def check_and_enhance(self, question: str, answer: str) -> dict | None:
+        """策略判断并增强答案
+
+        Returns:
+            {"strategy": 策略, "answer": 增强后的答案, "description": 描述或None}，
+            响应未通过校验时返回 None
+        """
+        response = await self.client.chat.completions.create(
+            model=self.llm_model,
+            messages=[
+                {"role": "system", "content": self.system_prompt},
+                {
+                    "role": "user",
+                    "content": self.user_prompt.format(
+                        question=question, answer=answer
+                    ),
+                },
+            ],
+            temperature=self.temperature,
+        )
+        content = response.choices[0].message.content.strip()
+        logger.debug(f"{self.__class__.__name__} response content: {content}")
+
+        return self.parse_response(content)
+
+    def parse_response(self, content: str) -> dict | None:
+        """解析并校验响应"""
+        try:
+            result = json.loads(content)
+        except json.JSONDecodeError:
+            logger.error(
+                f"{self.__class__.__name__} response content is not a valid JSON: {content}"
+            )
+            return None
+
+        if not isinstance(result, dict):
+            return None
+        strategy = result.get("strategy")
+        enhanced_answer = result.get("answer")
+        description = result.get("description")
+        if (
+            not isinstance(strategy, str)
+            or strategy.lower() not in EnhancementStrategy.get_strategies_values()
+            or not isinstance(enhanced_answer, str)
+            or not enhanced_answer.strip()
+            or not isinstance(description, str | None)
+        ):
+            logger.error(
+                f"{self.__class__.__name__} response content failed validation: {content}"
+            )
+            return None
+
+        return {
+            "strategy": strategy.lower(),
+            "answer": enhanced_answer.strip(),
+            "description": description,
+        }
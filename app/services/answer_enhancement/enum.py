@@ -17,3 +17,22 @@ class EnhancementStrategy(Enum):
     def get_strategies_values(cls) -> list[str]:
         """获取增强策略值"""
         return [strategy.value for strategy in cls]
+
+
+class PipelineMode(Enum):
+    """执行模式"""
+
+    STAGED = "staged"  # 策略判断、增强、提取分步调用
+    FUSED = "fused"  # 一次调用完成判断与增强，失败时回退到分步模式
+
+
+class FileFormat(Enum):
+    """批量增强上传文件格式"""
+
+    JSONL = "jsonl"
+    CSV = "csv"
+
+    @classmethod
+    def from_filename(cls, filename: str) -> "FileFormat":
+        """根据文件扩展名获取格式"""
+        return cls(filename.rsplit(".", 1)[-1].lower())
@@ -1,12 +1,26 @@
+import asyncio
 import logging
+import itertools
+from collections import defaultdict, deque
+from collections.abc import AsyncIterator, Iterator
+from pathlib import Path
+from typing import Any, BinaryIO
 
+from app.core.artifacts import JSONLArtifactWriter
 from app.core.managers import async_job_manager
 from app.core.enum import JobStatus
+from app.core.scheduler import job_handler
+from .deps import build_answer_enhancement_service
+from .enum import FileFormat
 from .service import AnswerEnhancementService
 from .models import AnswerEnhancementBody
+from .utils import iter_file_items
 
 logger = logging.getLogger(__name__)
 
+# 文件任务每次在线程中读取解析、写入结果的行数
+FILE_BATCH_SIZE = 100
+
 
 async def enhance_answer(
     job_id: str,
@@ -16,40 +30,181 @@ async def enhance_answer(
     """答案增强任务"""
     try:
         enhanced_answers = []
+        errors = []
 
         if isinstance(body, list):
-            total = len(body)
             progress = 0
-            for idx, item in enumerate(body):
-                enhanced_answer = await service.execute(
-                    question=item.question, answer=item.answer
-                )
-                enhanced_answers.append(enhanced_answer)
-                _progress = int((idx + 1) / total * 100)
-                if _progress > progress:
+
+            async def _on_progress(completed: int, total: int) -> None:
+                nonlocal progress
+                _progress = int(completed / total * 100)
+                # 完成前不报告100，完成状态与结果一同写入
+                if progress < _progress < 100:
                     progress = _progress
                     await async_job_manager.update_async_job(
                         job_id,
                         progress=progress,
                     )
+
+            enhanced_answers, errors = await service.execute_many(
+                [(item.question, item.answer) for item in body],
+                on_progress=_on_progress,
+            )
         else:
             enhanced_answer = await service.execute(
                 question=body.question, answer=body.answer
             )
             enhanced_answers.append(enhanced_answer)
-            progress = 100
-            await async_job_manager.update_async_job(
-                job_id,
-                status=JobStatus.COMPLETED,
-                progress=progress,
-                result={
-                    "total": len(enhanced_answers),
-                    "enhanced_answers": enhanced_answers,
-                },
+
+        await async_job_manager.update_async_job(
+            job_id,
+            status=JobStatus.COMPLETED,
+            progress=100,
+            result={
+                "total": len(enhanced_answers),
+                "enhanced_answers": enhanced_answers,
+                "errors": errors,
+            },
+        )
+
+    except Exception as e:
+        logger.exception("Answer enhancement job %s failed", job_id, exc_info=True)
+        await async_job_manager.update_async_job(
+            job_id, status=JobStatus.FAILED, error=str(e)
+        )
+
+
+async def enhance_answer_from_file(
+    job_id: str,
+    upload_path: Path,
+    file_format: FileFormat,
+    service: AnswerEnhancementService,
+) -> None:
+    """文件批量答案增强任务
+
+    逐行解析上传文件，结果按输入顺序逐行写入 JSONL 结果文件，任务结果只记录统计与结果文件名。
+    格式错误的行在结果文件中记录错误信息后继续处理，计入失败数。上传文件的读取解析与结果文件的写入
+    均分批在线程中执行，不阻塞同一调度器中的其他任务。
+    任务完成或失败后删除上传文件；被中断的任务保留上传文件，重新执行时使用。
+    """
+    try:
+        total = failed = progress = parsed = 0
+        # 格式错误的行按其之前已解析的行数分组，写入该位置的结果前先写入，保持输入顺序
+        parse_errors: defaultdict[int, list[str]] = defaultdict(list)
+        records: list[dict] = []
+        # 各项解析完成时上传文件的读取位置，与产出顺序一致，用于估算进度
+        positions: deque[int] = deque()
+
+        def _on_error(e: ValueError) -> None:
+            parse_errors[parsed].append(str(e))
+
+        def _items() -> Iterator[tuple[str, str]]:
+            # 在线程中执行，记录已解析的行数与上传文件的读取位置
+            nonlocal parsed
+            for item in iter_file_items(f, file_format, on_error=_on_error):
+                parsed += 1
+                positions.append(f.tell())
+                yield item
+
+        async def _read(
+            items: Iterator[tuple[str, str]],
+        ) -> AsyncIterator[tuple[str, str]]:
+            while batch := await asyncio.to_thread(
+                list, itertools.islice(items, FILE_BATCH_SIZE)
+            ):
+                for item in batch:
+                    yield item
+
+        def _append(
+            question: str | None,
+            answer: str | None,
+            enhanced_answer: str | None,
+            error: str | None,
+        ) -> None:
+            nonlocal total, failed
+            records.append(
+                {
+                    "index": total,
+                    "question": question,
+                    "answer": answer,
+                    "enhanced_answer": enhanced_answer,
+                    "error": error,
+                }
             )
+            total += 1
+            failed += error is not None
+
+        async def _flush() -> None:
+            nonlocal records
+            if records:
+                batch, records = records, []
+                await asyncio.to_thread(writer.write_many, batch)
+
+        f, size = await asyncio.to_thread(_open_upload, upload_path)
+        try:
+            with JSONLArtifactWriter(f"{job_id}.jsonl") as writer:
+                written = 0
+                async for item in service.execute_iter(_read(_items())):
+                    for error in parse_errors.pop(written, []):
+                        _append(None, None, None, error)
+                    _append(*item)
+                    written += 1
+                    if len(records) >= FILE_BATCH_SIZE:
+                        await _flush()
+
+                    # 总数未知，按上传文件的读取位置估算进度
+                    _progress = int(positions.popleft() / size * 100)
+                    if progress < _progress < 100:
+                        progress = _progress
+                        await async_job_manager.update_async_job(
+                            job_id, progress=progress
+                        )
+                for error in parse_errors.pop(written, []):
+                    _append(None, None, None, error)
+                await _flush()
+        finally:
+            f.close()
+
+        await async_job_manager.update_async_job(
+            job_id,
+            status=JobStatus.COMPLETED,
+            progress=100,
+            result={"total": total, "failed": failed, "artifact": writer.name},
+        )
+        await asyncio.to_thread(upload_path.unlink, missing_ok=True)
 
     except Exception as e:
         logger.exception("Answer enhancement job %s failed", job_id, exc_info=True)
         await async_job_manager.update_async_job(
             job_id, status=JobStatus.FAILED, error=str(e)
         )
+        await asyncio.to_thread(upload_path.unlink, missing_ok=True)
+
+
+def _open_upload(upload_path: Path) -> tuple[BinaryIO, int]:
+    return open(upload_path, "rb"), upload_path.stat().st_size or 1
+
+
+@job_handler("answer_enhancement.enhance_answer")
+async def run_enhance_answer(
+    job_id: str, context: Any, body: dict | list[dict]
+) -> None:
+    """答案增强任务处理器"""
+    if isinstance(body, list):
+        body = [AnswerEnhancementBody(**item) for item in body]
+    else:
+        body = AnswerEnhancementBody(**body)
+    await enhance_answer(job_id, body, build_answer_enhancement_service(context))
+
+
+@job_handler("answer_enhancement.enhance_answer_from_file")
+async def run_enhance_answer_from_file(
+    job_id: str, context: Any, upload_path: str, file_format: str
+) -> None:
+    """文件批量答案增强任务处理器"""
+    await enhance_answer_from_file(
+        job_id,
+        Path(upload_path),
+        FileFormat(file_format),
+        build_answer_enhancement_service(context),
+    )
@@ -1,18 +1,24 @@
 """答案增强服务路由"""
 
-import orjson
+import asyncio
+import logging
 from datetime import datetime
+from typing import AsyncIterator
 
-from fastapi import APIRouter, Depends, Query
-from fastapi.responses import Response
+import orjson
+from fastapi import APIRouter, Depends, Query, UploadFile
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
+from app.core.artifacts import save_upload
 from app.core.managers import async_job_manager
-from app.core.enum import JobType
-from .jobs import enhance_answer
+from app.core.enum import JobPriority, JobType
+from .enum import FileFormat
 from .models import AnswerEnhancementBody
 from .service import AnswerEnhancementService
 from .deps import get_answer_enhancement_service
 
+logger = logging.getLogger(__name__)
+
 # 创建路由器 - 支持 API 版本化
 router = APIRouter(
     prefix="/api/v1/answer",
@@ -30,13 +36,12 @@ async def answer_enhancement(
 ) -> Response:
     """答案增强"""
     enhanced_answers = []
+    errors = []
 
     if isinstance(body, list):
-        for item in body:
-            enhanced_answer = await answer_enhancement_service.execute(
-                question=item.question, answer=item.answer
-            )
-            enhanced_answers.append(enhanced_answer)
+        enhanced_answers, errors = await answer_enhancement_service.execute_many(
+            [(item.question, item.answer) for item in body]
+        )
     else:
         enhanced_answer = await answer_enhancement_service.execute(
             question=body.question, answer=body.answer
@@ -50,6 +55,7 @@ async def answer_enhancement(
             "data": {
                 "total": len(enhanced_answers),
                 "enhanced_answers": enhanced_answers,
+                "errors": errors,
             },
         }
     )
@@ -65,16 +71,98 @@ async def answer_enhancement(
         return Response(content=content, media_type="application/json")
 
 
+@router.post("/sync/enhance_stream")
+async def answer_enhancement_stream(
+    body: AnswerEnhancementBody,
+    answer_enhancement_service: AnswerEnhancementService = Depends(
+        get_answer_enhancement_service
+    ),
+) -> StreamingResponse:
+    """答案增强流式输出(Server-Sent Events)
+
+    事件: strategy(策略)、delta(答案片段)、done(完整答案)、error(错误信息)
+    """
+
+    async def event_stream() -> AsyncIterator[bytes]:
+        try:
+            async for event, data in answer_enhancement_service.execute_stream(
+                question=body.question, answer=body.answer
+            ):
+                yield _sse(event, data)
+        except asyncio.CancelledError:
+            # 客户端断开时响应被取消，增强器连接与描述提取任务随生成器关闭
+            logger.info("Answer enhancement stream cancelled by client disconnect")
+            raise
+        except Exception as e:
+            logger.exception("Answer enhancement stream failed")
+            yield _sse("error", str(e))
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse(event: str, data: str) -> bytes:
+    return b"event: %s\ndata: %s\n\n" % (
+        event.encode("utf-8"),
+        orjson.dumps({"content": data}),
+    )
+
+
 @router.post("/async/enhance")
 async def answer_enhancement_async(
     body: AnswerEnhancementBody | list[AnswerEnhancementBody],
-    answer_enhancement_service: AnswerEnhancementService = Depends(
-        get_answer_enhancement_service
+    priority: JobPriority = Query(
+        default=JobPriority.NORMAL, description="任务优先级(0 低/1 普通/2 高)"
     ),
 ) -> dict:
     """答案增强异步"""
+    if isinstance(body, list):
+        payload = [item.model_dump() for item in body]
+    else:
+        payload = body.model_dump()
+    job_id = await async_job_manager.create_async_job(
+        JobType.ANSWER_ENHANCEMENT,
+        "answer_enhancement.enhance_answer",
+        priority,
+        body=payload,
+    )
+    return {
+        "code": 200,
+        "message": "success",
+        "data": {"job_id": job_id},
+    }
+
+
+@router.post("/async/enhance_from_file", response_model=None)
+async def answer_enhancement_from_file_async(
+    file: UploadFile,
+    priority: JobPriority = Query(
+        default=JobPriority.NORMAL, description="任务优先级(0 低/1 普通/2 高)"
+    ),
+) -> dict | JSONResponse:
+    """从 JSONL/CSV 文件异步批量增强答案，结果文件通过 /jobs/{job_id}/artifact 下载"""
+    try:
+        file_format = FileFormat.from_filename(file.filename or "")
+    except ValueError:
+        return JSONResponse(
+            status_code=400,
+            content={
+                "code": 400,
+                "message": "Unsupported file format, expected .jsonl or .csv",
+                "data": None,
+            },
+        )
+
+    upload_path = await save_upload(file, f".{file_format.value}")
     job_id = await async_job_manager.create_async_job(
-        JobType.ANSWER_ENHANCEMENT, enhance_answer, body, answer_enhancement_service
+        JobType.ANSWER_ENHANCEMENT,
+        "answer_enhancement.enhance_answer_from_file",
+        priority,
+        upload_path=str(upload_path),
+        file_format=file_format.value,
     )
     return {
         "code": 200,
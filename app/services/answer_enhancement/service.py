@@ -1,14 +1,36 @@
+import asyncio
 import logging
+from collections import deque
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable
 
 from openai import AsyncOpenAI
+from prometheus_client import Counter
 
-from .checkers import LLMChecker
-from .enhancers import LLMEnhancer
+from sentence_transformers import SentenceTransformer
+
+from app.core.scheduler import llm_slot
+from .caches import GuidanceCache, SemanticCache
+from .checkers import (
+    CheckerDecisionLogger,
+    LLMBatchChecker,
+    LLMChecker,
+    MLChecker,
+    RuleChecker,
+)
+from .classifiers import LogisticRegressionClassifier
+from .enhancers import LLMEnhancer, LLMFusedEnhancer
 from .extractors import LLMExtractor
-from .enum import EnhancementStrategy
+from .enum import EnhancementStrategy, PipelineMode
 
 logger = logging.getLogger(__name__)
 
+# 各检查器的判断结果计数，result 取值 hit/abstain/invalid，可据此计算规则检查器命中率
+CHECKER_DECISIONS = Counter(
+    "answer_enhancement_checker_decisions_total",
+    "Answer enhancement checker decisions",
+    ["checker", "result"],
+)
+
 
 class AnswerEnhancementService:
     """答案增强服务"""
@@ -20,28 +42,88 @@ class AnswerEnhancementService:
         checker_temperature: float,
         enhancer_temperature: float,
         extractor_temperature: float,
+        max_concurrency: int = 8,
+        global_semaphore: asyncio.Semaphore | None = None,
+        speculative: bool = False,
+        speculative_strategy: str = EnhancementStrategy.ENHANCE.value,
+        checker_rules: list[dict] | None = None,
+        sentence_transformer: SentenceTransformer | None = None,
+        strategy_classifier: LogisticRegressionClassifier | None = None,
+        ml_checker_threshold: float = 0.9,
+        decision_logger: CheckerDecisionLogger | None = None,
+        pipeline_mode: str = PipelineMode.STAGED.value,
+        semantic_cache: SemanticCache | None = None,
+        guidance_cache: GuidanceCache | None = None,
+        batch_checker: LLMBatchChecker | None = None,
     ):
-        """初始化答案增强服务"""
-        self.check_pipeline = [
-            LLMChecker(openai_client, llm_model, checker_temperature)
-        ]
+        """初始化答案增强服务
+
+        Args:
+            max_concurrency: 单次批量处理的最大并发数
+            global_semaphore: 跨请求共享的并发限制
+            speculative: 是否在策略判断的同时按预测策略启动增强
+            speculative_strategy: 预测策略
+            checker_rules: 规则检查器规则
+            sentence_transformer: 向量模型，与策略分类器同时提供时启用 MLChecker
+            strategy_classifier: 策略分类器
+            ml_checker_threshold: MLChecker 置信度阈值
+            decision_logger: 检查器判断日志
+            pipeline_mode: 执行模式
+            semantic_cache: 跨请求共享的语义缓存
+            guidance_cache: 跨请求共享的图片/视频描述缓存
+            batch_checker: 跨请求共享的批量检查器，提供时代替 LLMChecker
+        """
+        self.semantic_cache = semantic_cache
+        self.guidance_cache = guidance_cache
+        self.pipeline_mode = PipelineMode(pipeline_mode)
+        self.max_concurrency = max_concurrency
+        self.global_semaphore = global_semaphore
+        self.speculative = speculative
+        self.speculative_strategy = EnhancementStrategy.get_strategy(
+            speculative_strategy
+        )
+        self.decision_logger = decision_logger
+        self.check_pipeline = [RuleChecker(checker_rules or [])]
+        if sentence_transformer is not None and strategy_classifier is not None:
+            self.check_pipeline.append(
+                MLChecker(
+                    sentence_transformer, strategy_classifier, ml_checker_threshold
+                )
+            )
+        self.check_pipeline.append(
+            batch_checker or LLMChecker(openai_client, llm_model, checker_temperature)
+        )
         self.enhance_pipeline = [
             LLMEnhancer(openai_client, llm_model, enhancer_temperature)
         ]
         self.extract_pipeline = [
             LLMExtractor(openai_client, llm_model, extractor_temperature)
         ]
+        self.fused_pipeline = [
+            LLMFusedEnhancer(openai_client, llm_model, enhancer_temperature)
+        ]
 
     async def _check(self, question: str, answer: str) -> EnhancementStrategy:
         """策略判断"""
         for checker in self.check_pipeline:
+            checker_name = checker.__class__.__name__
             strategy = await checker.check(question, answer)
+            if not strategy:
+                # 检查器弃权，交由下一个检查器判断
+                CHECKER_DECISIONS.labels(checker_name, "abstain").inc()
+                continue
             try:
                 strategy = EnhancementStrategy.get_strategy(strategy)
+                CHECKER_DECISIONS.labels(checker_name, "hit").inc()
+                if self.decision_logger is not None:
+                    self.decision_logger.record(
+                        question, answer, checker_name, strategy.value
+                    )
                 return strategy
             except ValueError:
+                CHECKER_DECISIONS.labels(checker_name, "invalid").inc()
                 logger.error(
-                    f"{checker.__class__.__name__} strategy is not a valid strategy: {strategy}"
+                    f"{checker_name} strategy is not a valid strategy: {strategy}"
                 )
 
         return EnhancementStrategy.DIRECT
@@ -55,19 +137,277 @@ class AnswerEnhancementService:
         return answer
 
     async def _extract(self, question: str, answer: str) -> str:
-        """提取图片/视频描述文本"""
+        """提取图片/视频描述文本，答案包含已知媒体链接时使用缓存"""
+        cache_key = None
+        if self.guidance_cache is not None:
+            cache_key = self.guidance_cache.key(question, answer)
+        if cache_key is None:
+            return await self._extract_uncached(question, answer)
+
+        digest, media, topic = cache_key
+        description = await self.guidance_cache.get(digest)
+        if description is None:
+            description = await self._extract_uncached(question, answer)
+            # 提取器全部失败时返回空描述，不写入缓存，下次请求重新提取
+            if description:
+                await self.guidance_cache.put(digest, media, topic, description)
+        return description
+
+    async def _extract_uncached(self, question: str, answer: str) -> str:
+        """调用提取器生成图片/视频描述文本"""
         for extractor in self.extract_pipeline:
             extracted_answer = await extractor.extract(question, answer)
             if extracted_answer:
                 return extracted_answer
         return ""
 
+    async def _fused(self, question: str, answer: str) -> str | None:
+        """单次调用完成策略判断与增强，结果未通过校验时返回 None"""
+        for enhancer in self.fused_pipeline:
+            result = await enhancer.check_and_enhance(question, answer)
+            if result is None:
+                continue
+            strategy = EnhancementStrategy.get_strategy(result["strategy"])
+            if strategy == EnhancementStrategy.DIRECT:
+                return answer
+            if strategy == EnhancementStrategy.GUIDANCE:
+                return f"{result['answer']}[{result['description'] or ''}]"
+            return result["answer"]
+
+        logger.warning("Fused pipeline failed validation, falling back to staged")
+        return None
+
     async def execute(self, question: str, answer: str) -> str:
-        """策略判断并增强答案"""
-        strategy = await self._check(question, answer)
-        enhanced_answer = await self._enhance(question, answer, strategy.value)
+        """策略判断并增强答案，优先查询语义缓存"""
+        if self.semantic_cache is None:
+            return await self._execute(question, answer)
+
+        embedding = await self.semantic_cache.embed(question, answer)
+        enhanced_answer = self.semantic_cache.get(embedding, answer)
+        if enhanced_answer is None:
+            enhanced_answer = await self._execute(question, answer)
+            self.semantic_cache.put(embedding, answer, enhanced_answer)
+        return enhanced_answer
+
+    async def _execute(self, question: str, answer: str) -> str:
+        """策略判断并增强答案，融合模式失败时回退到分步执行"""
+        if self.pipeline_mode == PipelineMode.FUSED:
+            enhanced_answer = await self._fused(question, answer)
+            if enhanced_answer is not None:
+                return enhanced_answer
+
+        return await self._staged(question, answer)
+
+    async def _staged(self, question: str, answer: str) -> str:
+        """分步执行策略判断与增强
+
+        依赖关系: check -> enhance / extract，enhance 与 extract 互不依赖
+
+        - DIRECT: 直接返回原始答案，不调用增强器
+        - GUIDANCE: 增强与提取并发执行
+        - 推测模式: 增强与策略判断同时启动，预测失败时丢弃推测结果
+        """
+        speculative_task = None
+        if self.speculative:
+            speculative_task = asyncio.create_task(
+                self._enhance(question, answer, self.speculative_strategy.value)
+            )
+
+        try:
+            strategy = await self._check(question, answer)
+        except BaseException:
+            await self._discard(speculative_task)
+            raise
+
+        if strategy == EnhancementStrategy.DIRECT:
+            await self._discard(speculative_task)
+            return answer
+
+        if speculative_task is not None and strategy == self.speculative_strategy:
+            enhance_task = speculative_task
+        else:
+            await self._discard(speculative_task)
+            enhance_task = asyncio.create_task(
+                self._enhance(question, answer, strategy.value)
+            )
+
         if strategy == EnhancementStrategy.GUIDANCE:
-            guidance_answer = await self._extract(question, answer)
+            try:
+                enhanced_answer, guidance_answer = await asyncio.gather(
+                    enhance_task, self._extract(question, answer)
+                )
+            except BaseException:
+                await self._discard(enhance_task)
+                raise
             return f"{enhanced_answer}[{guidance_answer}]"
 
-        return enhanced_answer
+        return await enhance_task
+
+    async def execute_stream(
+        self, question: str, answer: str
+    ) -> AsyncIterator[tuple[str, str]]:
+        """流式策略判断并增强答案
+
+        依次产出 ("strategy", 策略)、若干 ("delta", 文本片段)、("done", 完整答案)。
+        策略判断完成后即开始转发增强器输出，GUIDANCE 的图片/视频描述与增强并发生成，在末尾追加。
+        命中语义缓存时缓存中不含策略，不产出 ("strategy", 策略)，直接产出完整答案。
+        """
+        if self.semantic_cache is not None:
+            embedding = await self.semantic_cache.embed(question, answer)
+            enhanced_answer = self.semantic_cache.get(embedding, answer)
+            if enhanced_answer is not None:
+                yield "delta", enhanced_answer
+                yield "done", enhanced_answer
+                return
+
+        strategy = await self._check(question, answer)
+        yield "strategy", strategy.value
+
+        if strategy == EnhancementStrategy.DIRECT:
+            chunks = [answer]
+            yield "delta", answer
+        else:
+            extract_task = None
+            if strategy == EnhancementStrategy.GUIDANCE:
+                extract_task = asyncio.create_task(self._extract(question, answer))
+            try:
+                chunks = []
+                async for chunk in self._enhance_stream(
+                    question, answer, strategy.value
+                ):
+                    chunks.append(chunk)
+                    yield "delta", chunk
+                if not chunks:
+                    chunks.append(answer)
+                    yield "delta", answer
+                if extract_task is not None:
+                    suffix = f"[{await extract_task}]"
+                    chunks.append(suffix)
+                    yield "delta", suffix
+            finally:
+                await self._discard(extract_task)
+
+        enhanced_answer = "".join(chunks)
+        if self.semantic_cache is not None:
+            self.semantic_cache.put(embedding, answer, enhanced_answer)
+        yield "done", enhanced_answer
+
+    async def _enhance_stream(
+        self, question: str, answer: str, strategy: str
+    ) -> AsyncIterator[str]:
+        """流式增强，使用第一个产出内容的增强器"""
+        for enhancer in self.enhance_pipeline:
+            produced = False
+            async for chunk in enhancer.enhance_stream(question, answer, strategy):
+                produced = True
+                yield chunk
+            if produced:
+                return
+
+    @staticmethod
+    async def _discard(task: asyncio.Task | None) -> None:
+        """取消并回收任务，忽略其结果与异常"""
+        if task is None:
+            return
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    async def execute_many(
+        self,
+        items: list[tuple[str, str]],
+        on_progress: Callable[[int, int], Awaitable[None]] | None = None,
+    ) -> tuple[list[str], list[dict]]:
+        """并发处理多个问答，结果顺序与输入一致
+
+        单项失败不影响其他项，失败项保留原始答案并记录错误。
+
+        Args:
+            items: (问题, 答案) 列表
+            on_progress: 每完成一项时回调 (已完成数, 总数)
+
+        Returns:
+            增强后的答案列表与错误列表 [{"index": 序号, "error": 错误信息}]
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        enhanced_answers = [answer for _, answer in items]
+        errors = []
+        completed = 0
+
+        async def _run(idx: int, question: str, answer: str) -> None:
+            nonlocal completed
+            try:
+                enhanced_answers[idx] = await self._execute_limited(
+                    semaphore, question, answer
+                )
+            except Exception as e:
+                logger.exception(f"Answer enhancement item {idx} failed")
+                errors.append({"index": idx, "error": str(e)})
+
+            completed += 1
+            if on_progress is not None:
+                await on_progress(completed, len(items))
+
+        await asyncio.gather(
+            *[
+                _run(idx, question, answer)
+                for idx, (question, answer) in enumerate(items)
+            ]
+        )
+        errors.sort(key=lambda error: error["index"])
+        return enhanced_answers, errors
+
+    async def execute_iter(
+        self, items: Iterable[tuple[str, str]] | AsyncIterable[tuple[str, str]]
+    ) -> AsyncIterator[tuple[str, str, str, str | None]]:
+        """逐项读取并并发处理问答，按输入顺序产出 (问题, 答案, 增强后的答案, 错误信息)
+
+        已读取未产出的项数不超过并发上限的两倍，内存占用与输入规模无关。输入可以是上游流水线的
+        异步输出，每读取一项即产出已完成的队首项。单项失败时保留原始答案，生成器提前关闭时取消未完成的项。
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        window = self.max_concurrency * 2
+        pending: deque[tuple[str, str, asyncio.Task]] = deque()
+
+        async def _run(question: str, answer: str) -> tuple[str, str | None]:
+            try:
+                return await self._execute_limited(semaphore, question, answer), None
+            except Exception as e:
+                logger.exception("Answer enhancement item failed")
+                return answer, str(e)
+
+        try:
+            async for question, answer in _aiter(items):
+                pending.append(
+                    (question, answer, asyncio.create_task(_run(question, answer)))
+                )
+                # 队首完成前后续项可继续执行，窗口满时等待队首
+                while pending and (len(pending) >= window or pending[0][2].done()):
+                    question, answer, task = pending.popleft()
+                    yield question, answer, *await task
+            while pending:
+                question, answer, task = pending.popleft()
+                yield question, answer, *await task
+        finally:
+            for _, _, task in pending:
+                await self._discard(task)
+
+    async def _execute_limited(
+        self, semaphore: asyncio.Semaphore, question: str, answer: str
+    ) -> str:
+        # 先占用请求内名额再占用全局名额，避免单个请求的等待项占满全局名额；
+        # 任务内的每项再按任务轮转占用 LLM 名额
+        async with semaphore:
+            if self.global_semaphore is None:
+                async with llm_slot():
+                    return await self.execute(question, answer)
+            async with self.global_semaphore, llm_slot():
+                return await self.execute(question, answer)
+
+
+async def _aiter(items: Iterable | AsyncIterable) -> AsyncIterator:
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
@@ -0,0 +1,133 @@
+"""策略分类器离线训练
+
+从检查器判断日志中读取 LLMChecker 的判断结果作为标签，训练 MLChecker 使用的分类器。
+
+    uv run python -m app.services.answer_enhancement.training \
+        --log logs/checker_decisions.jsonl --output models/strategy_classifier.npz
+"""
+
+import sys
+import random
+import argparse
+from pathlib import Path
+
+import orjson
+from sentence_transformers import SentenceTransformer
+
+from app.config import settings
+from .classifiers import LogisticRegressionClassifier, build_features
+
+
+def load_decisions(
+    path: str | Path, checkers: tuple[str, ...] = ("LLMChecker", "LLMBatchChecker")
+) -> list[dict]:
+    """读取指定检查器的判断日志，同一问答保留最后一次判断"""
+    decisions = {}
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = orjson.loads(line)
+            if record.get("checker") in checkers and record.get("strategy"):
+                decisions[(record["question"], record["answer"])] = record
+    return list(decisions.values())
+
+
+def train(
+    decisions: list[dict],
+    sentence_transformer: SentenceTransformer,
+    threshold: float,
+    test_size: float = 0.2,
+    epochs: int = 300,
+    learning_rate: float = 1.0,
+    seed: int = 0,
+) -> tuple[LogisticRegressionClassifier, dict]:
+    """训练分类器并在留出集上评估
+
+    Returns:
+        使用全部数据训练的分类器与评估报告，报告中 coverage 为置信度超过阈值的样本比例，
+        covered_accuracy 为这部分样本与 LLMChecker 判断一致的比例
+    """
+    decisions = decisions[:]
+    random.Random(seed).shuffle(decisions)
+    split = int(len(decisions) * (1 - test_size))
+
+    features = build_features(
+        sentence_transformer,
+        [d["question"] for d in decisions],
+        [d["answer"] for d in decisions],
+    )
+    targets = [d["strategy"].lower() for d in decisions]
+
+    report = {"samples": len(decisions), "threshold": threshold}
+    if 0 < split < len(decisions):
+        classifier = LogisticRegressionClassifier.fit(
+            features[:split], targets[:split], epochs, learning_rate
+        )
+        predictions = classifier.predict(features[split:])
+        correct = [p == t for (p, _), t in zip(predictions, targets[split:])]
+        covered = [
+            c
+            for (_, confidence), c in zip(predictions, correct)
+            if confidence >= threshold
+        ]
+        report.update(
+            {
+                "test_samples": len(predictions),
+                "accuracy": sum(correct) / len(correct),
+                "coverage": len(covered) / len(correct),
+                "covered_accuracy": sum(covered) / len(covered) if covered else None,
+            }
+        )
+
+    classifier = LogisticRegressionClassifier.fit(
+        features, targets, epochs, learning_rate
+    )
+    return classifier, report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="训练策略分类器")
+    parser.add_argument("--log", type=Path, required=True, help="检查器判断日志")
+    parser.add_argument("--output", type=Path, required=True, help="模型输出路径")
+    parser.add_argument(
+        "--model",
+        default=settings.sentence_transformer_model,
+        help="Sentence Transformer 模型",
+    )
+    parser.add_argument(
+        "--checkers",
+        nargs="+",
+        default=["LLMChecker", "LLMBatchChecker"],
+        help="作为标签来源的检查器",
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=0.9, help="评估使用的置信度阈值"
+    )
+    parser.add_argument("--test-size", type=float, default=0.2, help="留出集比例")
+    parser.add_argument("--epochs", type=int, default=300)
+    parser.add_argument("--learning-rate", type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    decisions = load_decisions(args.log, tuple(args.checkers))
+    if not decisions:
+        print(f"No {', '.join(args.checkers)} decisions found in {args.log}")
+        return 1
+
+    classifier, report = train(
+        decisions,
+        SentenceTransformer(args.model),
+        args.threshold,
+        args.test_size,
+        args.epochs,
+        args.learning_rate,
+    )
+    classifier.save(args.output)
+
+    print(orjson.dumps(report, option=orjson.OPT_INDENT_2).decode("utf-8"))
+    print(f"Classifier saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+import csv
+from typing import BinaryIO, Callable, Iterator
+
+import orjson
+from pydantic import ValidationError
+
+from .enum import FileFormat
+from .models import AnswerEnhancementBody
+
+
+def iter_file_items(
+    f: BinaryIO,
+    file_format: FileFormat,
+    on_error: Callable[[ValueError], None] | None = None,
+) -> Iterator[tuple[str, str]]:
+    """逐行解析上传文件，产出 (问题, 答案)
+
+    JSONL 每行为 {"question": ..., "answer": ...}，CSV 首行为表头，需包含 question 与 answer 列。
+    格式错误的行生成带行号的 ValueError，指定 on_error 时交由其处理并跳过该行，否则抛出；
+    CSV 表头缺少所需列时总是抛出。
+    """
+
+    def _error(e: ValueError) -> None:
+        if on_error is None:
+            raise e
+        on_error(e)
+
+    lines = _decode_lines(f, _error)
+    if file_format is FileFormat.JSONL:
+        for lineno, line in lines:
+            if not line.strip():
+                continue
+            try:
+                item = _parse_item(orjson.loads(line))
+            except ValueError as e:
+                _error(ValueError(f"Line {lineno}: {e}"))
+                continue
+            yield item
+    else:
+        reader = csv.DictReader(line for _, line in lines)
+        if not {"question", "answer"} <= set(reader.fieldnames or []):
+            raise ValueError("CSV header must contain question and answer columns")
+        for row in reader:
+            try:
+                item = _parse_item(row)
+            except ValueError as e:
+                _error(ValueError(f"Line {reader.line_num}: {e}"))
+                continue
+            yield item
+
+
+def _decode_lines(
+    f: BinaryIO, on_error: Callable[[ValueError], None]
+) -> Iterator[tuple[int, str]]:
+    for lineno, line in enumerate(f, 1):
+        try:
+            # 兼容 Excel 导出文件的 BOM
+            yield lineno, line.decode("utf-8-sig" if lineno == 1 else "utf-8")
+        except UnicodeDecodeError:
+            on_error(ValueError(f"Line {lineno}: file must be UTF-8 encoded"))
+
+
+def _parse_item(record: dict) -> tuple[str, str]:
+    try:
+        item = AnswerEnhancementBody.model_validate(record)
+    except ValidationError as e:
+        error = e.errors()[0]
+        field = ".".join(str(loc) for loc in error["loc"]) or "item"
+        raise ValueError(f"{field}: {error['msg']}") from e
+    return item.question, item.answer
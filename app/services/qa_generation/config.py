@@ -37,6 +37,10 @@ class QAGenerationServiceSettings(BaseSettings):
         description="过滤规则",
     )
     max_context_length: int = Field(default=32 * 1024, description="最大上下文长度")
+    shard_size: int = Field(
+        default=200,
+        description="异步任务每个分片的上下文数，超过时拆分为分片由多个进程并行处理，0 表示不拆分",
+    )
 
 
 qa_generation_service_settings = QAGenerationServiceSettings()
@@ -1,16 +1,28 @@
+from typing import Any
+
 from fastapi import Request
 
+from app.core.batch import BatchBackend
 from .service import QAGenerationService
 from .config import qa_generation_service_settings
 
 
-def get_qa_generation_service(request: Request) -> QAGenerationService:
+def build_qa_generation_service(state: Any) -> QAGenerationService:
+    """由共享资源(app.state 或任务运行上下文)构建服务"""
     return QAGenerationService(
-        request.app.state.openai_client,
-        request.app.state.sentence_transformer,
+        state.openai_client,
+        state.sentence_transformer,
         qa_generation_service_settings.llm_model,
         qa_generation_service_settings.generator_temperature,
         qa_generation_service_settings.filter_temperature,
         qa_generation_service_settings.semantic_threshold,
         qa_generation_service_settings.filter_rules,
     )
+
+
+def get_qa_generation_service(request: Request) -> QAGenerationService:
+    return build_qa_generation_service(request.app.state)
+
+
+def get_batch_backend(request: Request) -> BatchBackend:
+    return request.app.state.batch_backend
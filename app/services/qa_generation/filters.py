@@ -119,17 +119,27 @@ class LLMFilter(Filter):
         self.llm_model = llm_model
         self.temperature = temperature
 
-    async def filter(self, qa_pair: dict) -> bool:
-        """过滤QA对"""
-        response = await self.client.chat.completions.create(
-            model=self.llm_model,
-            messages=[
+    def build_request(self, qa_pair: dict) -> dict:
+        """构建请求参数"""
+        return {
+            "model": self.llm_model,
+            "messages": [
                 {"role": "system", "content": self.system_prompt},
                 {"role": "user", "content": self.user_prompt.format(qa_pair=qa_pair)},
             ],
-            temperature=self.temperature,
+            "temperature": self.temperature,
+        }
+
+    async def filter(self, qa_pair: dict) -> bool:
+        """过滤QA对"""
+        response = await self.client.chat.completions.create(
+            **self.build_request(qa_pair)
         )
-        content = response.choices[0].message.content.strip()
+        return self.parse_response(response.choices[0].message.content)
+
+    def parse_response(self, content: str) -> bool:
+        """解析响应内容"""
+        content = content.strip()
         logger.debug(f"{self.__class__.__name__} response content: {content}")
 
         try:
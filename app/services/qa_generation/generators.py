@@ -237,17 +237,27 @@ class LLMQAGenerator(QAGenerator):
         self.llm_model = llm_model
         self.temperature = temperature
 
-    async def generate(self, context: str) -> list[dict]:
-        """生成QA对"""
-        response = await self.client.chat.completions.create(
-            model=self.llm_model,
-            messages=[
+    def build_request(self, context: str) -> dict:
+        """构建请求参数"""
+        return {
+            "model": self.llm_model,
+            "messages": [
                 {"role": "system", "content": self.system_prompt},
                 {"role": "user", "content": self.user_prompt.format(context=context)},
             ],
-            temperature=self.temperature,
+            "temperature": self.temperature,
+        }
+
+    async def generate(self, context: str) -> list[dict]:
+        """生成QA对"""
+        response = await self.client.chat.completions.create(
+            **self.build_request(context)
         )
-        content = response.choices[0].message.content.strip()
+        return self.parse_response(response.choices[0].message.content)
+
+    def parse_response(self, content: str) -> list[dict]:
+        """解析响应内容"""
+        content = content.strip()
         logger.debug(f"{self.__class__.__name__} response content: {content}")
 
         try:
@@ -1,13 +1,34 @@
+import asyncio
 import logging
+from pathlib import Path
+from typing import Any
 
+from app.config import settings
+from app.core.batch import BatchBackend
 from app.core.managers import async_job_manager
-from app.core.enum import JobStatus
+from app.core.enum import JobStatus, JobType
+from app.core.scheduler import job_handler, llm_slot, shard_handler
+from .config import qa_generation_service_settings
+from .deps import build_qa_generation_service
 from .service import QAGenerationService
-from .utils import build_contexts
+from .stores import qa_pair_store
+from .utils import build_contexts, load_records
 
 logger = logging.getLogger(__name__)
 
 
+async def _generate_and_filter(
+    service: QAGenerationService, context: str
+) -> tuple[int, list[dict]]:
+    """生成并过滤单个上下文的QA对，返回生成数与过滤后的QA对"""
+    async with llm_slot():
+        qa_pairs = await service._generate(context)
+        filtered_qas = [
+            qa_pair for qa_pair in qa_pairs if await service._filter(qa_pair)
+        ]
+    return len(qa_pairs), filtered_qas
+
+
 async def generate_qa(
     job_id: str,
     records: list[dict],
@@ -22,35 +43,167 @@ async def generate_qa(
         progress = 0
 
         for idx, context in enumerate(contexts):
-            qa_pairs = await service._generate(context)
-            generated_count += len(qa_pairs)
-            for qa_pair in qa_pairs:
-                if await service._filter(qa_pair):
-                    filtered_qas.append(qa_pair)
+            count, qa_pairs = await _generate_and_filter(service, context)
+            generated_count += count
+            filtered_qas.extend(qa_pairs)
 
             _progress = int((idx + 1) / len(contexts) * 100)
             if _progress > progress:
                 progress = _progress
                 await async_job_manager.update_async_job(job_id, progress=progress)
 
-        post_processed_qas = await service._post_process(filtered_qas)
+        await _complete(job_id, metadata, service, generated_count, filtered_qas)
+    except Exception as e:
+        logger.exception("QA generation job %s failed", job_id, exc_info=True)
+        await async_job_manager.update_async_job(
+            job_id, status=JobStatus.FAILED, error=str(e)
+        )
 
-        for qa_pair in post_processed_qas:
-            qa_pair["metadata"] = metadata
 
-        qas_result = {
-            "generated_count": generated_count,
-            "filtered_count": len(filtered_qas),
-            "post_processed_count": len(post_processed_qas),
-            "total": len(post_processed_qas),
-            "qas": post_processed_qas,
-        }
+async def _complete(
+    job_id: str,
+    metadata: dict,
+    service: QAGenerationService,
+    generated_count: int,
+    filtered_qas: list[dict],
+) -> None:
+    """语义去重等后处理，保存QA对并完成任务"""
+    post_processed_qas = await service._post_process(filtered_qas)
 
-        await async_job_manager.update_async_job(
-            job_id, status=JobStatus.COMPLETED, result=qas_result
+    for qa_pair in post_processed_qas:
+        qa_pair["metadata"] = metadata
+
+    qas_result = {
+        "generated_count": generated_count,
+        "filtered_count": len(filtered_qas),
+        "post_processed_count": len(post_processed_qas),
+        "total": len(post_processed_qas),
+        "qas": post_processed_qas,
+    }
+
+    await qa_pair_store.save(job_id, post_processed_qas)
+    await async_job_manager.update_async_job(
+        job_id, status=JobStatus.COMPLETED, progress=100, result=qas_result
+    )
+
+
+async def generate_qa_sharded(
+    job_id: str,
+    contexts: list[str],
+    metadata: dict,
+    service: QAGenerationService,
+    shard_size: int,
+) -> None:
+    """QA 生成任务（分片模式）
+
+    上下文按 shard_size 拆分为分片，生成与过滤由各进程并行执行，
+    全部分片完成后在协调者内汇总并对所有分片的QA对做语义去重。
+    """
+    try:
+
+        async def _on_progress(completed: int, total: int) -> None:
+            # 汇总与去重占最后 10%
+            await async_job_manager.update_async_job(
+                job_id, progress=int(completed / total * 90)
+            )
+
+        results = await async_job_manager.run_shards(
+            job_id,
+            JobType.QA_GENERATION,
+            "qa_generation.generate_shard",
+            [
+                contexts[start : start + shard_size]
+                for start in range(0, len(contexts), shard_size)
+            ],
+            _on_progress,
+        )
+        await _complete(
+            job_id,
+            metadata,
+            service,
+            sum(result["generated_count"] for result in results),
+            [qa_pair for result in results for qa_pair in result["qas"]],
         )
     except Exception as e:
         logger.exception("QA generation job %s failed", job_id, exc_info=True)
         await async_job_manager.update_async_job(
             job_id, status=JobStatus.FAILED, error=str(e)
         )
+
+
+async def generate_qa_batch(
+    job_id: str,
+    records: list[dict],
+    metadata: dict,
+    service: QAGenerationService,
+    batch_backend: BatchBackend,
+) -> None:
+    """QA 生成任务（批量推理模式）"""
+    try:
+        contexts = build_contexts(records)
+
+        # 生成阶段：所有 context 合并为一个批量任务
+        generated_qas = [
+            qa_pair
+            for qa_pairs in await service._generate_batch(
+                contexts, batch_backend, settings.batch_poll_interval
+            )
+            for qa_pair in qa_pairs
+        ]
+        await async_job_manager.update_async_job(job_id, progress=50)
+
+        # 过滤阶段：LLM 过滤请求合并为一个批量任务
+        filtered_qas = await service._filter_batch(
+            generated_qas, batch_backend, settings.batch_poll_interval
+        )
+        await async_job_manager.update_async_job(job_id, progress=90)
+
+        await _complete(job_id, metadata, service, len(generated_qas), filtered_qas)
+    except Exception as e:
+        logger.exception("QA generation batch job %s failed", job_id, exc_info=True)
+        await async_job_manager.update_async_job(
+            job_id, status=JobStatus.FAILED, error=str(e)
+        )
+
+
+@job_handler("qa_generation.generate_qa")
+async def run_generate_qa(
+    job_id: str,
+    context: Any,
+    metadata: dict,
+    records_path: str | None = None,
+    batch: bool = False,
+    records: list[dict] | None = None,
+) -> None:
+    """QA 生成任务处理器"""
+    try:
+        # 升级前入队的任务在参数中直接携带 records
+        if records is None:
+            records = await asyncio.to_thread(load_records, records_path)
+        service = build_qa_generation_service(context)
+        shard_size = qa_generation_service_settings.shard_size
+        if batch:
+            await generate_qa_batch(
+                job_id, records, metadata, service, context.batch_backend
+            )
+        elif shard_size > 0 and len(contexts := build_contexts(records)) > shard_size:
+            await generate_qa_sharded(job_id, contexts, metadata, service, shard_size)
+        else:
+            await generate_qa(job_id, records, metadata, service)
+    finally:
+        # 进程停止时任务放回队列，保留上传文件供重新执行
+        if records_path is not None and not async_job_manager.stopping:
+            await asyncio.to_thread(Path(records_path).unlink, missing_ok=True)
+
+
+@shard_handler("qa_generation.generate_shard")
+async def run_generate_shard(context: Any, inputs: list[str]) -> dict:
+    """QA 生成分片处理器，返回分片的生成数与过滤后的QA对"""
+    service = build_qa_generation_service(context)
+    generated_count = 0
+    filtered_qas = []
+    for shard_context in inputs:
+        count, qa_pairs = await _generate_and_filter(service, shard_context)
+        generated_count += count
+        filtered_qas.extend(qa_pairs)
+    return {"generated_count": generated_count, "qas": filtered_qas}
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from abc import ABC, abstractmethod
 
@@ -15,6 +16,11 @@ class Processor(ABC):
         """处理QA对"""
         raise NotImplementedError
 
+    @abstractmethod
+    def incremental(self) -> "Processor":
+        """创建增量处理器，逐批处理时结果与一次性处理一致"""
+        raise NotImplementedError
+
 
 class SemanticProcessor(Processor):
     """语义处理器"""
@@ -27,41 +33,72 @@ class SemanticProcessor(Processor):
 
     async def process(self, qas: list[dict]) -> list[dict]:
         """处理QA对，移除相似度大于阈值的重复问答对"""
-        if not qas:
-            return qas
+        return await self.incremental().process(qas)
 
-        # 提取所有问题
-        questions = [qa["question"] for qa in qas]
+    def incremental(self) -> "SemanticDeduplicator":
+        """创建增量去重器"""
+        return SemanticDeduplicator(self.sentence_transformer, self.semantic_threshold)
 
-        # 对问题进行编码
-        embeddings = self.sentence_transformer.encode(questions, convert_to_numpy=True)
 
-        # 用于存储需要保留的索引
-        keep_indices = []
+class SemanticDeduplicator(Processor):
+    """增量语义去重器
 
-        removed_qas = []
+    保留已通过的问答对的问题向量，新的问答对与全部已保留问答对比较，保留结果与一次性去重一致，
+    通过的问答对即为最终结果，可立即交给下游处理。
+    """
 
-        # 遍历每个问答对
-        for i in range(len(qas)):
-            should_keep = True
+    def __init__(
+        self, sentence_transformer: SentenceTransformer, semantic_threshold: float
+    ):
+        self.sentence_transformer = sentence_transformer
+        self.semantic_threshold = semantic_threshold
+        # 已保留问答对的问题向量，容量按倍数扩展
+        self._embeddings: np.ndarray | None = None
+        self._size = 0
 
-            # 与之前保留的问答对比较相似度
-            for j in keep_indices:
-                # 计算余弦相似度
-                similarity = np.dot(embeddings[i], embeddings[j]) / (
-                    np.linalg.norm(embeddings[i]) * np.linalg.norm(embeddings[j])
-                )
+    async def process(self, qas: list[dict]) -> list[dict]:
+        """返回与已保留问答对及本批内先出现的问答对均不重复的问答对"""
+        if not qas:
+            return qas
 
-                # 如果相似度大于阈值，则跳过当前问答对
-                if similarity > self.semantic_threshold:
-                    should_keep = False
-                    removed_qas.append(qas[i])
-                    break
+        embeddings = await asyncio.to_thread(
+            self._embed, [qa["question"] for qa in qas]
+        )
 
-            # 如果应该保留，添加到保留列表
-            if should_keep:
-                keep_indices.append(i)
+        kept = []
+        removed_qas = []
+        for qa, embedding in zip(qas, embeddings):
+            if (
+                self._size
+                and (self._embeddings[: self._size] @ embedding).max()
+                > self.semantic_threshold
+            ):
+                removed_qas.append(qa)
+                continue
+            kept.append(qa)
+            self._append(embedding)
 
         logger.debug(f"{self.__class__.__name__} removed qas: {removed_qas}")
-        # 返回保留的问答对
-        return [qas[i] for i in keep_indices]
+        return kept
+
+    def _embed(self, questions: list[str]) -> np.ndarray:
+        """对问题进行编码并归一化，点积即余弦相似度；在线程中执行，避免阻塞事件循环"""
+        embeddings = self.sentence_transformer.encode(
+            questions, convert_to_numpy=True
+        ).astype(np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.where(norms == 0, 1, norms)
+
+    def _append(self, embedding: np.ndarray) -> None:
+        if self._embeddings is None:
+            self._embeddings = np.empty((16, embedding.shape[0]), dtype=np.float32)
+        elif self._size == len(self._embeddings):
+            self._embeddings = np.concatenate(
+                [self._embeddings, np.empty_like(self._embeddings)]
+            )
+        self._embeddings[self._size] = embedding
+        self._size += 1
+
+    def incremental(self) -> "SemanticDeduplicator":
+        """创建不含已保留问答对的新去重器"""
+        return SemanticDeduplicator(self.sentence_transformer, self.semantic_threshold)
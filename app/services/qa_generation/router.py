@@ -1,14 +1,18 @@
 import orjson
+import asyncio
 from datetime import datetime
+from pathlib import Path
 
 from fastapi import APIRouter, Depends, UploadFile, Query
-from fastapi.responses import Response
+from fastapi.responses import JSONResponse, Response
 
+from app.core.artifacts import save_upload, write_upload
 from app.core.managers import async_job_manager
-from app.core.enum import JobType
-from .jobs import generate_qa
+from app.core.enum import JobPriority, JobType
 from .service import QAGenerationService
 from .deps import get_qa_generation_service
+from .enum import Intent, ProductType
+from .stores import qa_pair_store
 from .models import QAGenerationBody
 from .utils import build_contexts
 
@@ -100,10 +104,31 @@ async def generate_qa_from_file(
         return Response(content=content, media_type="application/json")
 
 
+async def _create_job(
+    records_path: Path, metadata: dict, batch: bool, priority: JobPriority
+) -> dict:
+    job_id = await async_job_manager.create_async_job(
+        JobType.QA_GENERATION,
+        "qa_generation.generate_qa",
+        priority,
+        records_path=str(records_path),
+        metadata=metadata,
+        batch=batch,
+    )
+    return {
+        "code": 200,
+        "message": "success",
+        "data": {"job_id": job_id},
+    }
+
+
 @router.post("/async/generate_from_body")
 async def generate_qa_from_body_async(
     body: QAGenerationBody,
-    qa_generation_service: QAGenerationService = Depends(get_qa_generation_service),
+    batch: bool = Query(default=False, description="是否使用批量推理模式"),
+    priority: JobPriority = Query(
+        default=JobPriority.NORMAL, description="任务优先级(0 低/1 普通/2 高)"
+    ),
 ) -> dict:
     """从Body异步生成QA"""
     records = body.data.get("RECORDS", [])
@@ -114,35 +139,59 @@ async def generate_qa_from_body_async(
             "datetime": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         }
 
-    job_id = await async_job_manager.create_async_job(
-        JobType.QA_GENERATION, generate_qa, records, metadata, qa_generation_service
+    records_path = await asyncio.to_thread(
+        write_upload, orjson.dumps({"RECORDS": records}), ".json"
     )
-
-    return {
-        "code": 200,
-        "message": "success",
-        "data": {"job_id": job_id},
-    }
+    return await _create_job(records_path, metadata, batch, priority)
 
 
 @router.post("/async/generate_from_file")
 async def generate_qa_from_file_async(
     file: UploadFile,
-    qa_generation_service: QAGenerationService = Depends(get_qa_generation_service),
+    batch: bool = Query(default=False, description="是否使用批量推理模式"),
+    priority: JobPriority = Query(
+        default=JobPriority.NORMAL, description="任务优先级(0 低/1 普通/2 高)"
+    ),
 ) -> dict:
     """从文件异步生成QA"""
-    records = orjson.loads(await file.read()).get("RECORDS", [])
+    records_path = await save_upload(file, ".json")
     metadata = {
         "source": file.filename,
         "datetime": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
     }
 
-    job_id = await async_job_manager.create_async_job(
-        JobType.QA_GENERATION, generate_qa, records, metadata, qa_generation_service
-    )
+    return await _create_job(records_path, metadata, batch, priority)
 
-    return {
-        "code": 200,
-        "message": "success",
-        "data": {"job_id": job_id},
-    }
+
+@router.get("/pairs", response_model=None)
+async def get_qa_pairs(
+    intent: Intent | None = Query(default=None, description="意图分类"),
+    product: ProductType | None = Query(default=None, description="产品类型"),
+    job_id: str | None = Query(default=None, description="任务ID"),
+    question: str | None = Query(default=None, description="问题，精确匹配"),
+    created_after: datetime | None = Query(default=None, description="起始时间"),
+    created_before: datetime | None = Query(default=None, description="截止时间"),
+    size: int = Query(default=20, ge=1, le=1000),
+    cursor: str | None = Query(default=None, description="上一页返回的 next_cursor"),
+) -> Response:
+    """跨任务查询已生成的QA对，按创建时间倒序游标分页"""
+    try:
+        qa_pairs = await qa_pair_store.query(
+            size,
+            cursor=cursor,
+            question=question,
+            created_after=created_after,
+            created_before=created_before,
+            intent=intent.value if intent else None,
+            product=product.value if product else None,
+            job_id=job_id,
+        )
+    except ValueError as e:
+        return JSONResponse(
+            status_code=400,
+            content={"code": 400, "message": str(e), "data": None},
+        )
+    return Response(
+        content=orjson.dumps({"code": 200, "message": "success", "data": qa_pairs}),
+        media_type="application/json",
+    )
@@ -1,8 +1,11 @@
 import logging
+from typing import AsyncIterator
 
 from sentence_transformers import SentenceTransformer
 from openai import AsyncOpenAI
 
+from app.core.batch import BatchBackend, build_batch_request
+from app.core.scheduler import llm_slot
 from .generators import LLMQAGenerator
 from .filters import RuleFilter, LLMFilter
 from .processors import SemanticProcessor
@@ -50,12 +53,91 @@ class QAGenerationService:
                 return False
         return True
 
+    async def _generate_batch(
+        self, contexts: list[str], batch_backend: BatchBackend, poll_interval: float
+    ) -> list[list[dict]]:
+        """批量生成QA对，按 context 顺序返回，保持生成器管线的回退语义"""
+        results = [[] for _ in contexts]
+        pending = list(range(len(contexts)))
+        for generator in self.generator_pipeline:
+            if not pending:
+                break
+            if isinstance(generator, LLMQAGenerator):
+                outputs = await batch_backend.run(
+                    [
+                        build_batch_request(
+                            f"generate-{idx}", generator.build_request(contexts[idx])
+                        )
+                        for idx in pending
+                    ],
+                    poll_interval,
+                )
+                for idx in pending:
+                    content = outputs.get(f"generate-{idx}")
+                    results[idx] = generator.parse_response(content) if content else []
+            else:
+                for idx in pending:
+                    results[idx] = await generator.generate(contexts[idx])
+            pending = [idx for idx in pending if not results[idx]]
+        return results
+
+    async def _filter_batch(
+        self, qas: list[dict], batch_backend: BatchBackend, poll_interval: float
+    ) -> list[dict]:
+        """批量过滤QA对，规则过滤器本地执行，LLM过滤器批量执行"""
+        kept = list(range(len(qas)))
+        for filter in self.filter_pipeline:
+            if not kept:
+                break
+            if isinstance(filter, LLMFilter):
+                outputs = await batch_backend.run(
+                    [
+                        build_batch_request(
+                            f"filter-{idx}", filter.build_request(qas[idx])
+                        )
+                        for idx in kept
+                    ],
+                    poll_interval,
+                )
+                # 请求失败时与 LLMFilter 解析失败一致，默认保留
+                kept = [
+                    idx
+                    for idx in kept
+                    if (content := outputs.get(f"filter-{idx}")) is None
+                    or filter.parse_response(content)
+                ]
+            else:
+                kept = [idx for idx in kept if await filter.filter(qas[idx])]
+        return [qas[idx] for idx in kept]
+
     async def _post_process(self, qas: list[dict]) -> list[dict]:
         """后处理QA对"""
         for processor in self.post_process_pipeline:
             qas = await processor.process(qas)
         return qas
 
+    async def generate_qa_iter(
+        self, contexts: list[str]
+    ) -> AsyncIterator[tuple[list[dict], list[dict], list[dict]]]:
+        """逐个 context 生成、过滤并增量后处理QA对
+
+        每处理完一个 context 产出 (生成的, 过滤后的, 后处理后的) QA对，
+        后处理后的QA对不会被后续 context 的结果去重，可直接交给下游处理。
+        """
+        processors = [
+            processor.incremental() for processor in self.post_process_pipeline
+        ]
+        for context in contexts:
+            async with llm_slot():
+                generated_qas = await self._generate(context)
+                filtered_qas = [
+                    qa_pair for qa_pair in generated_qas if await self._filter(qa_pair)
+                ]
+            post_processed_qas = filtered_qas
+            for processor in processors:
+                post_processed_qas = await processor.process(post_processed_qas)
+            yield generated_qas, filtered_qas, post_processed_qas
+
     async def generate_qa(self, contexts: list[str]) -> list[dict]:
         """生成并处理QA对"""
         generated_qas = []
@@ -0,0 +1,133 @@
+import re
+import hashlib
+import logging
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import DateTime, delete, insert, select, tuple_, type_coerce
+
+from app.core.database import QAPair, async_session
+from app.core.managers import decode_cursor, encode_cursor
+from .enum import ProductType
+
+logger = logging.getLogger(__name__)
+
+# 问题中提及的产品，名称较长的优先匹配，如 METAVERTU 2 优先于 METAVERTU
+PRODUCT_PATTERN = re.compile(
+    "|".join(
+        re.escape(product)
+        for product in sorted(
+            ProductType.get_product_types_values(), key=len, reverse=True
+        )
+    ),
+    re.I,
+)
+PRODUCTS = {
+    product.lower(): product for product in ProductType.get_product_types_values()
+}
+
+
+def extract_product(question: str) -> str | None:
+    """问题中第一个提及的产品，未提及时返回 None"""
+    match = PRODUCT_PATTERN.search(question)
+    return PRODUCTS[match.group(0).lower()] if match else None
+
+
+def question_hash(question: str) -> str:
+    """忽略大小写与空白差异的问题摘要，用于按问题精确查找"""
+    normalized = " ".join(question.split()).lower()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+class QAPairStore:
+    """QA对存储
+
+    任务完成时将最终的QA对批量写入 qa_pairs 表，意图、产品、问题摘要单独成列并建有索引，
+    跨任务查询无需反序列化每个任务的结果。
+    """
+
+    async def save(self, job_id: str, qas: list[dict]) -> int:
+        """批量写入任务的QA对，返回写入条数
+
+        同一事务内先删除该任务已写入的QA对，任务被中断后重新执行时不会重复写入
+        """
+        created_at = datetime.now()
+        rows = [
+            {
+                "job_id": job_id,
+                "intent": qa_pair.get("intent") or "",
+                "product": extract_product(qa_pair["question"]),
+                "question_hash": question_hash(qa_pair["question"]),
+                "question": qa_pair["question"],
+                "answer": qa_pair["answer"],
+                "enhanced_answer": qa_pair.get("enhanced_answer"),
+                "meta": qa_pair.get("metadata"),
+                "created_at": created_at,
+            }
+            for qa_pair in qas
+        ]
+        async with async_session() as session:
+            await session.execute(delete(QAPair).where(QAPair.job_id == job_id))
+            if rows:
+                # 多行参数的 insert 以 executemany 执行
+                await session.execute(insert(QAPair), rows)
+            await session.commit()
+
+        logger.info(f"{self.__class__.__name__} saved {len(rows)} qa pairs of {job_id}")
+        return len(rows)
+
+    async def query(
+        self,
+        size: int,
+        cursor: str | None = None,
+        question: str | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+        **kwargs: Any,
+    ) -> dict:
+        """查询QA对，按 (created_at, id) 倒序游标分页
+
+        cursor 为上一页返回的 next_cursor，格式错误时抛出 ValueError
+        question 按问题摘要精确匹配
+        kwargs 为其他过滤条件，如 intent、product、job_id 等，值为 None 时忽略
+        """
+        created_at = type_coerce(QAPair.created_at, DateTime())
+        stmt = select(QAPair, created_at.label("cursor_created_at"))
+
+        for key, value in kwargs.items():
+            if value is not None and hasattr(QAPair, key):
+                stmt = stmt.where(getattr(QAPair, key) == value)
+        if question is not None:
+            stmt = stmt.where(QAPair.question_hash == question_hash(question))
+        if created_after is not None:
+            stmt = stmt.where(created_at >= created_after)
+        if created_before is not None:
+            stmt = stmt.where(created_at < created_before)
+        if cursor is not None:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+            stmt = stmt.where(
+                tuple_(QAPair.created_at, QAPair.id)
+                < tuple_(cursor_created_at, cursor_id)
+            )
+        stmt = stmt.order_by(QAPair.created_at.desc(), QAPair.id.desc())
+
+        async with async_session() as session:
+            # 多查一条判断是否还有下一页
+            result = await session.execute(stmt.limit(size + 1))
+            rows = result.all()
+
+        next_cursor = None
+        if len(rows) > size:
+            rows = rows[:size]
+            next_cursor = encode_cursor(rows[-1][1], rows[-1][0].id)
+
+        items = []
+        for qa_pair, _ in rows:
+            item = qa_pair.to_dict()
+            item["metadata"] = item.pop("meta")
+            items.append(item)
+
+        return {"items": items, "size": size, "next_cursor": next_cursor}
+
+
+qa_pair_store = QAPairStore()
@@ -1,6 +1,16 @@
+from pathlib import Path
+
+import orjson
+
 from .config import qa_generation_service_settings
 
 
+def load_records(path: str | Path) -> list[dict]:
+    """读取上传文件中的 RECORDS"""
+    with open(path, "rb") as f:
+        return orjson.loads(f.read()).get("RECORDS", [])
+
+
 def build_contexts(records: list[dict]) -> list[str]:
     """从 records 构建 context 列表"""
     contexts = []
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any
+
+from app.core.managers import async_job_manager
+from app.core.enum import JobStatus
+from app.core.scheduler import job_handler
+from app.services.answer_enhancement.deps import build_answer_enhancement_service
+from app.services.answer_enhancement.service import AnswerEnhancementService
+from app.services.qa_generation.deps import build_qa_generation_service
+from app.services.qa_generation.service import QAGenerationService
+from app.services.qa_generation.stores import qa_pair_store
+from app.services.qa_generation.utils import build_contexts, load_records
+
+logger = logging.getLogger(__name__)
+
+
+async def generate_and_enhance_qa(
+    job_id: str,
+    records: list[dict],
+    metadata: dict,
+    qa_generation_service: QAGenerationService,
+    answer_enhancement_service: AnswerEnhancementService,
+) -> None:
+    """QA 生成与答案增强流水线任务
+
+    QA对通过过滤与增量去重后立即进入答案增强，两个阶段重叠执行，结果只写入一次。
+    进度中生成与增强各占一半，增强进度按已确定的QA对计算。
+    """
+    try:
+        contexts = build_contexts(records)
+        qas = []
+        errors = []
+        generated_count = filtered_count = 0
+        generated_contexts = enhanced_count = progress = 0
+
+        async def _report_progress() -> None:
+            nonlocal progress
+            generation = generated_contexts / (len(contexts) or 1)
+            enhancement = enhanced_count / (len(qas) or 1)
+            _progress = int(50 * generation + 50 * generation * enhancement)
+            # 完成前不报告100，完成状态与结果一同写入
+            if progress < _progress < 100:
+                progress = _progress
+                await async_job_manager.update_async_job(job_id, progress=progress)
+
+        async def _final_qas():
+            nonlocal generated_count, filtered_count, generated_contexts
+            async for (
+                generated_qas,
+                filtered_qas,
+                post_processed_qas,
+            ) in qa_generation_service.generate_qa_iter(contexts):
+                generated_count += len(generated_qas)
+                filtered_count += len(filtered_qas)
+                generated_contexts += 1
+                for qa_pair in post_processed_qas:
+                    qa_pair["metadata"] = metadata
+                    qas.append(qa_pair)
+                    yield qa_pair["question"], qa_pair["answer"]
+                await _report_progress()
+
+        # 增强结果按输入顺序产出，与 qas 一一对应
+        async for (
+            _,
+            _,
+            enhanced_answer,
+            error,
+        ) in answer_enhancement_service.execute_iter(_final_qas()):
+            qas[enhanced_count]["enhanced_answer"] = enhanced_answer
+            if error is not None:
+                errors.append({"index": enhanced_count, "error": error})
+            enhanced_count += 1
+            await _report_progress()
+
+        await qa_pair_store.save(job_id, qas)
+        await async_job_manager.update_async_job(
+            job_id,
+            status=JobStatus.COMPLETED,
+            progress=100,
+            result={
+                "generated_count": generated_count,
+                "filtered_count": filtered_count,
+                "post_processed_count": len(qas),
+                "total": len(qas),
+                "qas": qas,
+                "errors": errors,
+            },
+        )
+    except Exception as e:
+        logger.exception("QA pipeline job %s failed", job_id, exc_info=True)
+        await async_job_manager.update_async_job(
+            job_id, status=JobStatus.FAILED, error=str(e)
+        )
+
+
+@job_handler("qa_pipeline.generate_and_enhance_qa")
+async def run_generate_and_enhance_qa(
+    job_id: str,
+    context: Any,
+    metadata: dict,
+    records_path: str | None = None,
+    records: list[dict] | None = None,
+) -> None:
+    """QA 生成与答案增强流水线任务处理器"""
+    try:
+        # 升级前入队的任务在参数中直接携带 records
+        if records is None:
+            records = await asyncio.to_thread(load_records, records_path)
+        await generate_and_enhance_qa(
+            job_id,
+            records,
+            metadata,
+            build_qa_generation_service(context),
+            build_answer_enhancement_service(context),
+        )
+    finally:
+        # 进程停止时任务放回队列，保留上传文件供重新执行
+        if records_path is not None and not async_job_manager.stopping:
+            await asyncio.to_thread(Path(records_path).unlink, missing_ok=True)
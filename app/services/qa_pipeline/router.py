@@ -0,0 +1,74 @@
+"""QA 生成与答案增强流水线路由"""
+
+import orjson
+import asyncio
+from datetime import datetime
+from pathlib import Path
+
+from fastapi import APIRouter, Query, UploadFile
+
+from app.core.artifacts import save_upload, write_upload
+from app.core.managers import async_job_manager
+from app.core.enum import JobPriority, JobType
+from app.services.qa_generation.models import QAGenerationBody
+
+router = APIRouter(
+    prefix="/api/v1/qa_pipeline",
+    tags=["QA Pipeline"],
+)
+
+
+async def _create_job(
+    records_path: Path, metadata: dict, priority: JobPriority
+) -> dict:
+    job_id = await async_job_manager.create_async_job(
+        JobType.QA_PIPELINE,
+        "qa_pipeline.generate_and_enhance_qa",
+        priority,
+        records_path=str(records_path),
+        metadata=metadata,
+    )
+    return {
+        "code": 200,
+        "message": "success",
+        "data": {"job_id": job_id},
+    }
+
+
+@router.post("/async/generate_from_body")
+async def generate_and_enhance_qa_from_body_async(
+    body: QAGenerationBody,
+    priority: JobPriority = Query(
+        default=JobPriority.NORMAL, description="任务优先级(0 低/1 普通/2 高)"
+    ),
+) -> dict:
+    """从Body异步生成QA并增强答案"""
+    records = body.data.get("RECORDS", [])
+    metadata = body.metadata
+    if not metadata:
+        metadata = {
+            "source": "http request",
+            "datetime": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+    records_path = await asyncio.to_thread(
+        write_upload, orjson.dumps({"RECORDS": records}), ".json"
+    )
+    return await _create_job(records_path, metadata, priority)
+
+
+@router.post("/async/generate_from_file")
+async def generate_and_enhance_qa_from_file_async(
+    file: UploadFile,
+    priority: JobPriority = Query(
+        default=JobPriority.NORMAL, description="任务优先级(0 低/1 普通/2 高)"
+    ),
+) -> dict:
+    """从文件异步生成QA并增强答案"""
+    records_path = await save_upload(file, ".json")
+    metadata = {
+        "source": file.filename,
+        "datetime": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+    return await _create_job(records_path, metadata, priority)
@@ -0,0 +1,73 @@
+"""独立的任务 worker 进程
+
+从共享的任务表领取任务并执行，API 进程设置 JOB_EXECUTION=worker 后只负责入队与查询，
+API 与 worker 可分别扩展，embedding、去重等 CPU 密集阶段不再影响接口延迟。
+
+    uv run python -m app.worker
+    uv run python -m app.worker --job-type qa_generation --job-type qa_pipeline --metrics-port 9101
+"""
+
+import sys
+import signal
+import asyncio
+import logging
+import argparse
+from types import SimpleNamespace
+
+from prometheus_client import start_http_server
+
+from app.core.enum import JobType
+from app.core.managers import async_job_manager
+from app.core.resources import close_resources, init_database, init_resources
+
+logger = logging.getLogger(__name__)
+
+
+async def run_worker(job_types: list[JobType] | None = None) -> None:
+    """执行任务直到收到 SIGINT/SIGTERM，退出时运行中的任务放回队列"""
+    await init_database()
+    context = SimpleNamespace()
+    init_resources(context)
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    await async_job_manager.start(context, job_types)
+    try:
+        await stop_event.wait()
+    finally:
+        logger.info("Stopping job worker")
+        await async_job_manager.stop()
+        await async_job_manager.flush()
+        await close_resources(context)
+    logger.info("Job worker stopped")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="任务 worker")
+    parser.add_argument(
+        "--job-type",
+        action="append",
+        choices=[job_type.value for job_type in JobType],
+        default=None,
+        help="领取的任务类型，可重复指定，默认全部",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Prometheus 指标端口，未指定时不暴露",
+    )
+    args = parser.parse_args(argv)
+
+    if args.metrics_port is not None:
+        start_http_server(args.metrics_port)
+    job_types = [JobType(job_type) for job_type in args.job_type or []]
+    asyncio.run(run_worker(job_types or None))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
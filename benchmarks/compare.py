@@ -0,0 +1,114 @@
+"""基准测试结果对比
+
+对比 pytest-benchmark 输出的 JSON 与基线，任一用例退化超过阈值时以非零状态退出。
+
+    uv run pytest benchmarks --benchmark-json=.benchmarks/current.json
+    uv run python -m benchmarks.compare .benchmarks/current.json --threshold 10
+    uv run python -m benchmarks.compare .benchmarks/current.json --save
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+import orjson
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "baseline.json"
+
+
+def load_stats(path: Path, stat: str) -> dict[str, float]:
+    """读取各用例的统计值"""
+    data = orjson.loads(path.read_bytes())
+    return {
+        benchmark["fullname"]: benchmark["stats"][stat]
+        for benchmark in data.get("benchmarks", [])
+    }
+
+
+def compare(
+    baseline: dict[str, float], current: dict[str, float], threshold: float
+) -> list[tuple[str, float | None, float, float | None, bool]]:
+    """逐用例对比，返回 (用例, 基线, 当前, 变化百分比, 是否退化)"""
+    rows = []
+    for name, value in sorted(current.items()):
+        base = baseline.get(name)
+        if base is None or base <= 0:
+            rows.append((name, base, value, None, False))
+            continue
+        change = (value - base) / base * 100
+        rows.append((name, base, value, change, change > threshold))
+    return rows
+
+
+def save_baseline(current: Path, baseline: Path) -> None:
+    """保存基线，仅保留对比所需字段"""
+    data = orjson.loads(current.read_bytes())
+    baseline.parent.mkdir(parents=True, exist_ok=True)
+    baseline.write_bytes(
+        orjson.dumps(
+            {
+                "machine_info": data.get("machine_info"),
+                "commit_info": data.get("commit_info"),
+                "datetime": data.get("datetime"),
+                "benchmarks": [
+                    {"fullname": b["fullname"], "stats": b["stats"]}
+                    for b in data.get("benchmarks", [])
+                ],
+            },
+            option=orjson.OPT_INDENT_2,
+        )
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="对比基准测试结果与基线")
+    parser.add_argument("current", type=Path, help="pytest-benchmark 输出的 JSON")
+    parser.add_argument(
+        "--baseline", type=Path, default=DEFAULT_BASELINE, help="基线 JSON 路径"
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=10.0, help="允许的退化百分比"
+    )
+    parser.add_argument(
+        "--stat",
+        default="median",
+        choices=["min", "max", "mean", "median"],
+        help="对比的统计值",
+    )
+    parser.add_argument("--save", action="store_true", help="将当前结果保存为基线")
+    args = parser.parse_args(argv)
+
+    if args.save:
+        save_baseline(args.current, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"Baseline {args.baseline} not found, run with --save first")
+        return 2
+
+    rows = compare(
+        load_stats(args.baseline, args.stat),
+        load_stats(args.current, args.stat),
+        args.threshold,
+    )
+
+    regressions = 0
+    for name, base, value, change, regressed in rows:
+        if change is None:
+            print(f"NEW   {name}: {value * 1000:.3f}ms")
+            continue
+        flag = "FAIL" if regressed else "OK"
+        print(
+            f"{flag:<5} {name}: {base * 1000:.3f}ms -> {value * 1000:.3f}ms ({change:+.1f}%)"
+        )
+        regressions += regressed
+
+    if regressions:
+        print(f"{regressions} benchmark(s) regressed more than {args.threshold}%")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
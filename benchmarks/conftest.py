@@ -0,0 +1,13 @@
+"""基准测试公共配置与 fixture"""
+
+import asyncio
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def event_loop_runner():
+    """复用同一个事件循环执行协程，避免每轮重复创建循环的开销"""
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
@@ -0,0 +1,134 @@
+"""合成的中文客服数据，用于基准测试与压测"""
+
+import random
+import zlib
+
+import numpy as np
+
+from app.services.qa_generation.enum import Intent, ProductType
+
+PRODUCTS = ProductType.get_product_types_values()
+
+PREFIXES = ["", "请问", "想问一下", "你好,", "麻烦问下"]
+
+QA_TEMPLATES = [
+    (
+        "{product}支持NFC吗?",
+        "支持NFC功能,可以刷公交卡和门禁卡。",
+        Intent.PRODUCT_FUNCTION,
+    ),
+    (
+        "{product}的电池续航怎么样?",
+        "配备5000mAh电池,正常使用一整天没问题。",
+        Intent.PRODUCT_FUNCTION,
+    ),
+    (
+        "{product}拍照效果好吗?",
+        "后置5000万AI双摄,支持双重防抖。",
+        Intent.PRODUCT_FUNCTION,
+    ),
+    (
+        "{product}有哪些颜色?",
+        "提供曜石黑、冰川银、星云蓝三种配色。",
+        Intent.PRODUCT_CATEGORY,
+    ),
+    (
+        "{product}多少钱?",
+        "{product}售价7999元起,目前有新品优惠。",
+        Intent.PRICE_DISCOUNT,
+    ),
+    ("{product}支持5G吗?", "支持5G网络,双模全网通。", Intent.PRODUCT_FUNCTION),
+    (
+        "{product}屏幕尺寸多大?",
+        "采用6.7英寸AMOLED屏幕,支持120Hz刷新率。",
+        Intent.PRODUCT_FUNCTION,
+    ),
+    (
+        "{product}保修多久?",
+        "整机保修一年,享受专属管家服务。",
+        Intent.AFTER_SALE_SERVICE,
+    ),
+    ("{product}什么时候发货?", "下单后48小时内顺丰发货。", Intent.LOGISTICS_TIME),
+    ("北京有{product}的门店吗?", "北京SKP和国贸商城都有门店。", Intent.STORE_CHANNEL),
+    ("{product}是正品吗?", "官方渠道销售,均为正品并提供防伪验证。", Intent.BRAND_AUTH),
+    (
+        "{product}可以刻字吗?",
+        "支持定制刻字服务,需要额外7个工作日。",
+        Intent.GIFT_CUSTOMIZATION,
+    ),
+    ("{product}支持花呗分期吗?", "支持花呗和信用卡分期付款。", Intent.PAYMENT_ORDER),
+    (
+        "{product}外观设计怎么样?",
+        "采用小牛皮机身与宝石按键,质感高端。[{product}外观图]",
+        Intent.PRODUCT_FUNCTION,
+    ),
+    (
+        "{product}怎么设置指纹?",
+        "进入设置-安全-指纹,按提示录入即可。",
+        Intent.USE_ACCESSORY,
+    ),
+]
+
+GREETINGS = [
+    "你好",
+    "在吗",
+    "您好,请问有什么可以帮您?",
+    "好的,谢谢",
+    "请稍等,正在为您查询",
+]
+
+
+def make_qa_pairs(n: int, seed: int = 0) -> list[dict]:
+    """生成 n 个QA对，包含大量措辞略有差异的近似重复问题"""
+    rng = random.Random(seed)
+    qas = []
+    for _ in range(n):
+        question, answer, intent = rng.choice(QA_TEMPLATES)
+        product = rng.choice(PRODUCTS)
+        qas.append(
+            {
+                "question": rng.choice(PREFIXES) + question.format(product=product),
+                "answer": answer.format(product=product),
+                "intent": intent.value,
+            }
+        )
+    return qas
+
+
+def make_records(n: int, turns: int = 6, seed: int = 0) -> list[dict]:
+    """生成 n 条对话记录，结构与客服系统导出的 RECORDS 一致"""
+    rng = random.Random(seed)
+    records = []
+    for _ in range(n):
+        contents = [{"sender": "用户", "content": rng.choice(GREETINGS[:2])}]
+        for qa in make_qa_pairs(turns // 2, seed=rng.random()):
+            contents.append({"sender": "用户", "content": qa["question"]})
+            contents.append({"sender": "客服", "content": qa["answer"]})
+        contents.append({"sender": "客服", "content": rng.choice(GREETINGS[2:])})
+        records.append({"消息内容": contents})
+    return records
+
+
+def make_enhancement_items(n: int, seed: int = 0) -> list[dict]:
+    """生成 n 个答案增强请求体"""
+    return [
+        {"question": qa["question"], "answer": qa["answer"]}
+        for qa in make_qa_pairs(n, seed)
+    ]
+
+
+class HashingEncoder:
+    """基于字符 bigram 哈希的确定性向量编码器
+
+    代替 SentenceTransformer，使语义去重等 CPU 路径的测试不依赖模型文件
+    """
+
+    def __init__(self, dimension: int = 256):
+        self.dimension = dimension
+
+    def encode(self, sentences: list[str], convert_to_numpy: bool = True, **kwargs):
+        embeddings = np.zeros((len(sentences), self.dimension), dtype=np.float32)
+        for i, sentence in enumerate(sentences):
+            for a, b in zip(sentence, sentence[1:]):
+                embeddings[i, zlib.crc32((a + b).encode("utf-8")) % self.dimension] += 1
+        return embeddings
@@ -0,0 +1,173 @@
+"""任务列表查询压测
+
+逐级扩大 jobs 表，分别在无索引与有索引时测量任务列表的查询耗时：首页、按状态过滤的首页、
+深翻页(偏移分页与游标分页)以及未缓存的总数查询。
+
+    uv run python -m benchmarks.job_listing --rows 10000,100000,1000000
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import orjson
+
+from benchmarks.loadtest import git_commit
+
+os.environ.setdefault(
+    "DATABASE_URL", "sqlite+aiosqlite:///.benchmarks/job_listing.sqlite3"
+)
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+async def populate(total: int, start: int, seed: int) -> None:
+    """追加任务记录至 total 条，创建时间递增"""
+    from app.core.database import Job, async_engine
+    from app.core.enum import JobStatus, JobType
+
+    rng = random.Random(seed + start)
+    base = datetime(2025, 1, 1)
+    statuses = [JobStatus.COMPLETED] * 8 + [JobStatus.FAILED, JobStatus.RUNNING]
+    job_types = [JobType.QA_GENERATION, JobType.ANSWER_ENHANCEMENT]
+    for offset in range(start, total, 10000):
+        rows = [
+            {
+                "job_id": f"job-{idx}",
+                "job_type": rng.choice(job_types),
+                "status": rng.choice(statuses),
+                "progress": 100,
+                "created_at": base + timedelta(seconds=idx),
+                "updated_at": base + timedelta(seconds=idx),
+            }
+            for idx in range(offset, min(offset + 10000, total))
+        ]
+        async with async_engine.begin() as conn:
+            await conn.execute(Job.__table__.insert(), rows)
+
+
+async def set_indexes(enabled: bool) -> None:
+    from app.core.database import Job, async_engine
+
+    async with async_engine.begin() as conn:
+        for index in Job.__table__.indexes:
+            if index.name.startswith("ix_jobs_") and index.name != "ix_jobs_job_id":
+                if enabled:
+                    await conn.run_sync(index.create, checkfirst=True)
+                else:
+                    await conn.run_sync(index.drop, checkfirst=True)
+
+
+async def measure(call, repeat: int) -> float:
+    """多次执行取中位数，单位毫秒"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await call()
+        durations.append(time.perf_counter() - start)
+    return round(statistics.median(durations) * 1000, 3)
+
+
+async def run_level(rows: int, indexed: bool, args) -> dict:
+    from app.core.enum import JobStatus
+    from app.core.managers import async_job_manager, encode_cursor
+
+    size = args.page_size
+    deep_page = int(rows / size * 0.9)
+    # 第 deep_page 页之前最后一条记录的游标，与偏移分页取到同一页
+    last_idx = rows - (deep_page - 1) * size
+    deep_cursor = encode_cursor(
+        datetime(2025, 1, 1) + timedelta(seconds=last_idx), last_idx + 1
+    )
+
+    async def _uncached(**kwargs):
+        async_job_manager._count_cache.clear()
+        return await async_job_manager.get_async_jobs(1, size, False, **kwargs)
+
+    async def _cached(**kwargs):
+        return await async_job_manager.get_async_jobs(1, size, False, **kwargs)
+
+    await _uncached()
+    return {
+        "rows": rows,
+        "indexed": indexed,
+        "first_page_ms": await measure(_cached, args.repeat),
+        "first_page_status_ms": await measure(
+            lambda: _cached(status=JobStatus.FAILED), args.repeat
+        ),
+        "deep_offset_page_ms": await measure(
+            lambda: async_job_manager.get_async_jobs(deep_page, size, False),
+            args.repeat,
+        ),
+        "deep_cursor_page_ms": await measure(
+            lambda: _cached(cursor=deep_cursor), args.repeat
+        ),
+        "uncached_count_ms": await measure(_uncached, args.repeat),
+    }
+
+
+async def run(args) -> dict:
+    from app.core.database import Base, async_engine
+
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    levels = []
+    populated = 0
+    for rows in args.rows:
+        await populate(rows, populated, args.seed)
+        populated = rows
+        for indexed in (False, True):
+            await set_indexes(indexed)
+            result = await run_level(rows, indexed, args)
+            print(orjson.dumps(result).decode("utf-8"), flush=True)
+            levels.append(result)
+
+    await async_engine.dispose()
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "datetime": datetime.now().isoformat(),
+            "database_url": os.environ["DATABASE_URL"],
+            "args": {k: v for k, v in vars(args).items() if k != "output"},
+        },
+        "levels": levels,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="任务列表查询压测")
+    parser.add_argument(
+        "--rows",
+        type=lambda s: [int(r) for r in s.split(",")],
+        default=[10000, 100000],
+        help="逐级表大小，逗号分隔",
+    )
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20, help="每项查询重复次数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output", type=Path, default=None, help="结果 JSON 路径，默认 .benchmarks/"
+    )
+    args = parser.parse_args(argv)
+
+    Path(".benchmarks").mkdir(exist_ok=True)
+    report = asyncio.run(run(args))
+
+    output = args.output or Path(
+        f".benchmarks/job_listing_{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+    print(f"Report written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""任务进度写入压测
+
+模拟多个并发任务逐步上报进度后完成，分别以立即写入(--flush-interval 0)与合并写入模式运行，
+对比任务状态提交次数、每秒提交数、update_async_job 调用耗时与任务总耗时。
+
+    uv run python -m benchmarks.job_updates --jobs 50 --ticks 100 --job-duration 2 --flush-interval 0,0.5
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+import orjson
+
+from benchmarks.loadtest import EventLoopLagMonitor, git_commit, percentiles
+
+os.environ.setdefault(
+    "DATABASE_URL", "sqlite+aiosqlite:///.benchmarks/job_updates.sqlite3"
+)
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+def _commits() -> float:
+    from prometheus_client import REGISTRY
+
+    return sum(
+        REGISTRY.get_sample_value("job_state_commits_total", {"mode": mode}) or 0
+        for mode in ("write_through", "buffered")
+    )
+
+
+async def run_mode(flush_interval: float, args) -> dict:
+    from app.config import settings
+    from app.core.enum import JobStatus, JobType
+    from app.core.managers import async_job_manager
+    from app.core.scheduler import job_handler
+
+    async_job_manager._flush_interval = flush_interval
+    # 所有任务同时运行，与调度前直接创建协程的行为一致
+    settings.job_max_concurrency = {JobType.UNKNOWN.value: args.jobs}
+    latencies = []
+    finished = asyncio.Event()
+    remaining = args.jobs
+
+    async def _update(job_id: str, **kwargs) -> None:
+        start = time.perf_counter()
+        await async_job_manager.update_async_job(job_id, **kwargs)
+        latencies.append(time.perf_counter() - start)
+
+    @job_handler("benchmarks.job_updates")
+    async def _job(job_id: str, context) -> None:
+        nonlocal remaining
+        for progress in range(1, args.ticks):
+            await asyncio.sleep(args.job_duration / args.ticks)
+            await _update(job_id, progress=int(progress / args.ticks * 100))
+        await _update(job_id, status=JobStatus.COMPLETED, progress=100)
+        remaining -= 1
+        if remaining == 0:
+            finished.set()
+
+    monitor = EventLoopLagMonitor()
+    monitor.start()
+    commits = _commits()
+    start = time.perf_counter()
+
+    await async_job_manager.start(None)
+    for _ in range(args.jobs):
+        await async_job_manager.create_async_job(
+            JobType.UNKNOWN, "benchmarks.job_updates"
+        )
+    await finished.wait()
+    await async_job_manager.stop()
+    await async_job_manager.flush()
+
+    elapsed = time.perf_counter() - start
+    commits = _commits() - commits
+    return {
+        "flush_interval": flush_interval,
+        "jobs": args.jobs,
+        "updates": len(latencies),
+        "state_commits": int(commits),
+        "commits_per_s": round(commits / elapsed, 1),
+        "elapsed_s": round(elapsed, 3),
+        "update_latency_ms": percentiles(latencies),
+        "update_total_ms": round(sum(latencies) * 1000, 1),
+        "event_loop_lag_ms": await monitor.stop(),
+    }
+
+
+async def run(args) -> dict:
+    from app.core.database import Base, async_engine
+
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    modes = []
+    for flush_interval in args.flush_interval:
+        result = await run_mode(flush_interval, args)
+        print(orjson.dumps(result).decode("utf-8"), flush=True)
+        modes.append(result)
+
+    await async_engine.dispose()
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "datetime": datetime.now().isoformat(),
+            "database_url": os.environ["DATABASE_URL"],
+            "args": {k: v for k, v in vars(args).items() if k != "output"},
+        },
+        "modes": modes,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="任务进度写入压测")
+    parser.add_argument("--jobs", type=int, default=50, help="并发任务数")
+    parser.add_argument("--ticks", type=int, default=100, help="每个任务的进度更新次数")
+    parser.add_argument(
+        "--job-duration", type=float, default=2.0, help="每个任务的理想耗时(秒)"
+    )
+    parser.add_argument(
+        "--flush-interval",
+        type=lambda s: [float(i) for i in s.split(",")],
+        default=[0.0, 0.5],
+        help="合并写入间隔，逗号分隔，0 表示立即写入",
+    )
+    parser.add_argument(
+        "--output", type=Path, default=None, help="结果 JSON 路径，默认 .benchmarks/"
+    )
+    args = parser.parse_args(argv)
+
+    Path(".benchmarks").mkdir(exist_ok=True)
+    report = asyncio.run(run(args))
+
+    output = args.output or Path(
+        f".benchmarks/job_updates_{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+    print(f"Report written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,368 @@
+"""端到端吞吐与延迟压测
+
+默认在进程内驱动真实 ASGI 应用，LLM 请求转发至进程内模拟服务；
+指定 --base-url 时通过 HTTP 压测已启动的实例(此时 LLM 后端由实例自身配置，
+事件循环延迟与内存仅反映压测客户端进程)。
+
+    # 同步答案增强，逐级提升并发
+    uv run python -m benchmarks.loadtest enhance --concurrency 1,4,16,64 --duration 20
+
+    # 异步 QA 生成任务，提交后轮询 /jobs/{job_id}
+    uv run python -m benchmarks.loadtest qa --concurrency 1,2,4 --records 200
+
+    # 流式答案增强，额外统计首个片段延迟(TTFT)；进程内传输会缓冲完整响应，TTFT 需配合 --base-url 测量
+    uv run python -m benchmarks.loadtest enhance_stream --base-url http://127.0.0.1:8000
+
+    # 压测已部署实例
+    uv run python -m benchmarks.loadtest enhance --base-url http://127.0.0.1:8000
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import resource
+import subprocess
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncGenerator
+
+import httpx
+import numpy as np
+import orjson
+
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    """计算 p50/p95/p99/max，单位毫秒"""
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    array = np.array(values) * 1000
+    return {
+        "p50": round(float(np.percentile(array, 50)), 3),
+        "p95": round(float(np.percentile(array, 95)), 3),
+        "p99": round(float(np.percentile(array, 99)), 3),
+        "max": round(float(array.max()), 3),
+    }
+
+
+def max_rss_mb() -> float:
+    """进程内存峰值(MB)"""
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class EventLoopLagMonitor:
+    """事件循环延迟监控：周期性休眠并记录实际唤醒的滞后时间"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.lags: list[float] = []
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, loop.time() - start - self.interval))
+
+    def start(self) -> None:
+        self.lags = []
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> dict[str, float]:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        return percentiles(self.lags)
+
+
+@asynccontextmanager
+async def in_process_client(args) -> AsyncGenerator[httpx.AsyncClient, None]:
+    """启动进程内应用，LLM 客户端指向进程内模拟服务"""
+    from openai import AsyncOpenAI
+
+    import app.app as app_module
+    import app.core.resources as resources_module
+    from app.core.batch import LocalBatchBackend
+    from app.mock.config import MockLLMSettings
+    from app.mock.server import create_mock_app
+    from benchmarks.data import HashingEncoder
+
+    if not args.real_embeddings:
+        # 使用哈希编码器代替模型，避免压测依赖本地模型文件
+        resources_module.SentenceTransformer = lambda *_, **__: HashingEncoder()
+
+    mock_app = create_mock_app(
+        MockLLMSettings(
+            latency_distribution=args.llm_latency_distribution,
+            latency_mean=args.llm_latency_mean,
+            latency_std=args.llm_latency_std,
+            error_rate=args.llm_error_rate,
+            rate_limit_rate=args.llm_rate_limit_rate,
+            retry_after=0.1,
+            stream_interval=args.llm_stream_interval,
+            seed=args.seed,
+        )
+    )
+    app = app_module.create_app()
+
+    async with app.router.lifespan_context(app):
+        await app.state.openai_client.close()
+        app.state.openai_client = AsyncOpenAI(
+            api_key="mock",
+            base_url="http://mock-llm/v1",
+            http_client=httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=mock_app), timeout=None
+            ),
+        )
+        app.state.batch_backend = LocalBatchBackend.from_openai_client(
+            args.batch_dir, app.state.openai_client
+        )
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://loadtest",
+            timeout=None,
+        ) as client:
+            yield client
+
+
+@asynccontextmanager
+async def http_client(args) -> AsyncGenerator[httpx.AsyncClient, None]:
+    async with httpx.AsyncClient(
+        base_url=args.base_url,
+        timeout=None,
+        limits=httpx.Limits(max_connections=None, max_keepalive_connections=None),
+    ) as client:
+        yield client
+
+
+async def run_enhance_level(client: httpx.AsyncClient, concurrency: int, args) -> dict:
+    """闭环压测同步答案增强接口(含流式接口)"""
+    from benchmarks.data import make_enhancement_items
+
+    items = make_enhancement_items(1000, seed=args.seed)
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + args.duration
+
+    first_chunk_latencies: list[float] = []
+    stream = args.scenario == "enhance_stream"
+
+    async def request(item: dict) -> bool:
+        if not stream:
+            response = await client.post("/api/v1/answer/sync/enhance", json=item)
+            return response.status_code == 200
+
+        start = time.perf_counter()
+        async with client.stream(
+            "POST", "/api/v1/answer/sync/enhance_stream", json=item
+        ) as response:
+            if response.status_code != 200:
+                return False
+            ok, first_chunk = False, True
+            async for line in response.aiter_lines():
+                if line == "event: delta" and first_chunk:
+                    first_chunk_latencies.append(time.perf_counter() - start)
+                    first_chunk = False
+                ok = ok or line == "event: done"
+                if line == "event: error":
+                    return False
+            return ok
+
+    async def worker(worker_id: int) -> None:
+        nonlocal errors
+        rng = random.Random(args.seed + worker_id)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                ok = await request(rng.choice(items))
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker(i) for i in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 3),
+        "latency_ms": percentiles(latencies),
+    }
+    if stream:
+        result["first_chunk_latency_ms"] = percentiles(first_chunk_latencies)
+    return result
+
+
+async def run_qa_level(client: httpx.AsyncClient, concurrency: int, args) -> dict:
+    """并发提交异步 QA 生成任务并轮询至结束"""
+    from benchmarks.data import make_records
+
+    job_latencies: list[float] = []
+    poll_latencies: list[float] = []
+    errors = 0
+
+    async def submit_and_wait(job_index: int) -> None:
+        nonlocal errors
+        body = {
+            "data": {"RECORDS": make_records(args.records, seed=args.seed + job_index)},
+            "metadata": {"source": "loadtest"},
+        }
+        start = time.perf_counter()
+        response = await client.post(
+            "/api/v1/qa/async/generate_from_body",
+            json=body,
+            params={"batch": "true"} if args.batch else None,
+        )
+        if response.status_code != 200:
+            errors += 1
+            return
+        job_id = response.json()["data"]["job_id"]
+
+        while True:
+            await asyncio.sleep(args.poll_interval)
+            poll_start = time.perf_counter()
+            response = await client.get(f"/jobs/{job_id}")
+            poll_latencies.append(time.perf_counter() - poll_start)
+            status = response.json()["data"]["status"]
+            if status in ("completed", "failed", "cancelled"):
+                break
+
+        if status == "completed":
+            job_latencies.append(time.perf_counter() - start)
+        else:
+            errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[submit_and_wait(i) for i in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    contexts = len(job_latencies) * args.records
+
+    return {
+        "jobs": concurrency,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "contexts_per_minute": round(contexts / elapsed * 60, 3),
+        "job_latency_ms": percentiles(job_latencies),
+        "poll_latency_ms": percentiles(poll_latencies),
+    }
+
+
+async def run(args) -> dict:
+    client_factory = http_client if args.base_url else in_process_client
+    run_level = run_qa_level if args.scenario == "qa" else run_enhance_level
+    monitor = EventLoopLagMonitor()
+
+    levels = []
+    async with client_factory(args) as client:
+        for concurrency in args.concurrency:
+            monitor.start()
+            result = await run_level(client, concurrency, args)
+            result["event_loop_lag_ms"] = await monitor.stop()
+            result["max_rss_mb"] = max_rss_mb()
+            levels.append({"concurrency": concurrency, **result})
+            print(orjson.dumps(levels[-1]).decode("utf-8"), flush=True)
+
+    return {
+        "meta": {
+            "scenario": args.scenario,
+            "mode": "http" if args.base_url else "in_process",
+            "base_url": args.base_url,
+            "commit": git_commit(),
+            "datetime": datetime.now().isoformat(),
+            "args": {
+                k: v for k, v in vars(args).items() if k not in ("output", "func")
+            },
+        },
+        "levels": levels,
+    }
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="端到端吞吐与延迟压测")
+    parser.add_argument(
+        "scenario", choices=["enhance", "enhance_stream", "qa"], help="压测场景"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=lambda s: [int(c) for c in s.split(",")],
+        default=[1, 4, 16],
+        help="逐级并发数，逗号分隔",
+    )
+    parser.add_argument(
+        "--duration", type=float, default=10.0, help="每级持续秒数(enhance)"
+    )
+    parser.add_argument("--records", type=int, default=50, help="每个任务的对话数(qa)")
+    parser.add_argument("--batch", action="store_true", help="使用批量推理模式(qa)")
+    parser.add_argument("--poll-interval", type=float, default=0.2, help="任务轮询间隔")
+    parser.add_argument("--base-url", default=None, help="压测已启动的实例")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output", type=Path, default=None, help="结果 JSON 路径，默认 .benchmarks/"
+    )
+
+    group = parser.add_argument_group("进程内模式")
+    group.add_argument("--llm-latency-distribution", default="lognormal")
+    group.add_argument("--llm-latency-mean", type=float, default=0.5)
+    group.add_argument("--llm-latency-std", type=float, default=0.2)
+    group.add_argument(
+        "--llm-stream-interval", type=float, default=0.02, help="流式片段间隔(秒)"
+    )
+    group.add_argument("--llm-error-rate", type=float, default=0.0)
+    group.add_argument("--llm-rate-limit-rate", type=float, default=0.0)
+    group.add_argument(
+        "--real-embeddings", action="store_true", help="加载真实 SentenceTransformer"
+    )
+    group.add_argument(
+        "--database-url",
+        default="sqlite+aiosqlite:///.benchmarks/loadtest.sqlite3",
+        help="进程内应用使用的数据库",
+    )
+    group.add_argument("--batch-dir", default=".benchmarks/batches")
+    group.add_argument(
+        "--batch-poll-interval", type=float, default=1.0, help="批量任务轮询间隔(秒)"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+
+    # 应用配置在导入时读取，需在导入 app 之前设置
+    Path(".benchmarks").mkdir(exist_ok=True)
+    os.environ.setdefault("DATABASE_URL", args.database_url)
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("BATCH_POLL_INTERVAL", str(args.batch_poll_interval))
+
+    report = asyncio.run(run(args))
+
+    output = args.output or Path(
+        f".benchmarks/loadtest_{args.scenario}_{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+    print(f"Report written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
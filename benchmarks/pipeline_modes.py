@@ -0,0 +1,124 @@
+"""答案增强执行模式对比
+
+使用进程内模拟 LLM 分别以分步(staged)与融合(fused)模式处理同一批问答，
+对比单条延迟、LLM 调用次数与 token 用量。
+
+    uv run python -m benchmarks.pipeline_modes --items 200 --concurrency 16 --llm-latency-mean 0.5
+"""
+
+import sys
+import time
+import asyncio
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+import orjson
+from openai import AsyncOpenAI
+
+from app.mock.config import MockLLMSettings
+from app.mock.server import create_mock_app
+from app.services.answer_enhancement.enum import PipelineMode
+from app.services.answer_enhancement.service import AnswerEnhancementService
+from benchmarks.data import make_enhancement_items
+from benchmarks.loadtest import git_commit, percentiles
+
+
+async def run_mode(mode: PipelineMode, items: list[dict], args) -> dict:
+    """以指定模式处理全部问答，返回延迟与 token 统计"""
+    mock_app = create_mock_app(
+        MockLLMSettings(
+            latency_distribution=args.llm_latency_distribution,
+            latency_mean=args.llm_latency_mean,
+            latency_std=args.llm_latency_std,
+            seed=args.seed,
+        )
+    )
+    openai_client = AsyncOpenAI(
+        api_key="mock",
+        base_url="http://mock-llm/v1",
+        http_client=httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=mock_app), timeout=None
+        ),
+    )
+    service = AnswerEnhancementService(
+        openai_client, "mock", 0.01, 0.3, 0.01, pipeline_mode=mode.value
+    )
+    # 仅对比 LLM 调用，不使用规则检查器
+    service.check_pipeline = service.check_pipeline[-1:]
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def _run(item: dict) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await service.execute(item["question"], item["answer"])
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[_run(item) for item in items])
+    elapsed = time.perf_counter() - start
+    await openai_client.close()
+
+    stats = mock_app.state.mock.stats
+    calls = sum(s["requests"] for s in stats.values())
+    prompt_tokens = sum(s["prompt_tokens"] for s in stats.values())
+    completion_tokens = sum(s["completion_tokens"] for s in stats.values())
+    return {
+        "mode": mode.value,
+        "items": len(items),
+        "elapsed_s": round(elapsed, 3),
+        "latency_ms": percentiles(latencies),
+        "llm_calls_per_item": round(calls / len(items), 3),
+        "prompt_tokens_per_item": round(prompt_tokens / len(items), 1),
+        "completion_tokens_per_item": round(completion_tokens / len(items), 1),
+        "calls_by_type": {name: s["requests"] for name, s in stats.items()},
+    }
+
+
+async def run(args) -> dict:
+    items = make_enhancement_items(args.items, seed=args.seed)
+    modes = []
+    for mode in PipelineMode:
+        result = await run_mode(mode, items, args)
+        print(orjson.dumps(result).decode("utf-8"), flush=True)
+        modes.append(result)
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "datetime": datetime.now().isoformat(),
+            "args": {k: v for k, v in vars(args).items() if k != "output"},
+        },
+        "modes": modes,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="对比答案增强执行模式")
+    parser.add_argument("--items", type=int, default=200, help="问答数量")
+    parser.add_argument("--concurrency", type=int, default=16, help="并发数")
+    parser.add_argument("--llm-latency-distribution", default="lognormal")
+    parser.add_argument("--llm-latency-mean", type=float, default=0.5)
+    parser.add_argument("--llm-latency-std", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output", type=Path, default=None, help="结果 JSON 路径，默认 .benchmarks/"
+    )
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+
+    output = args.output or Path(
+        f".benchmarks/pipeline_modes_{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+    print(f"Report written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
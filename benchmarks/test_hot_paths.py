@@ -0,0 +1,159 @@
+"""CPU 热路径基准测试
+
+运行: uv run pytest benchmarks --benchmark-json=.benchmarks/current.json
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from app.core.database import Job, OrJSON
+from app.core.enum import JobStatus, JobType
+from app.core.middlewares import RequestLoggingMiddleware
+from app.services.qa_generation.config import qa_generation_service_settings
+from app.services.qa_generation.filters import RuleFilter
+from app.services.qa_generation.processors import SemanticProcessor
+from app.services.qa_generation.utils import build_contexts
+from benchmarks.data import HashingEncoder, make_qa_pairs, make_records
+
+# 数据规模与对应轮数，大规模用例耗时较长，减少轮数
+SIZES = [1_000, 10_000, 50_000]
+ROUNDS = {1_000: 5, 10_000: 3, 50_000: 1}
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_build_contexts(benchmark, size):
+    records = make_records(size)
+
+    contexts = benchmark.pedantic(
+        build_contexts, args=(records,), rounds=ROUNDS[size], iterations=1
+    )
+
+    assert len(contexts) == size
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_rule_filter(benchmark, event_loop_runner, size):
+    rule_filter = RuleFilter(qa_generation_service_settings.filter_rules)
+    qas = make_qa_pairs(size)
+
+    async def _filter():
+        return [qa_pair for qa_pair in qas if await rule_filter.filter(qa_pair)]
+
+    kept = benchmark.pedantic(
+        lambda: event_loop_runner(_filter()), rounds=ROUNDS[size], iterations=1
+    )
+
+    assert 0 < len(kept) < size
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_semantic_processor(benchmark, event_loop_runner, size):
+    processor = SemanticProcessor(
+        HashingEncoder(), qa_generation_service_settings.semantic_threshold
+    )
+    qas = make_qa_pairs(size)
+
+    kept = benchmark.pedantic(
+        lambda: event_loop_runner(processor.process(qas)),
+        rounds=ROUNDS[size],
+        iterations=1,
+    )
+
+    assert 0 < len(kept) < size
+
+
+def _asgi_app(with_middleware: bool) -> FastAPI:
+    app = FastAPI()
+    if with_middleware:
+        app.add_middleware(RequestLoggingMiddleware, log_request_body=False)
+
+    @app.get("/ping")
+    async def ping():
+        return JSONResponse({"code": 200})
+
+    return app
+
+
+async def _asgi_request(app: FastAPI) -> None:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/ping",
+        "raw_path": b"/ping",
+        "query_string": b"a=1",
+        "root_path": "",
+        "headers": [(b"host", b"bench"), (b"user-agent", b"bench")],
+        "client": ("127.0.0.1", 12345),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+@pytest.mark.parametrize("with_middleware", [False, True], ids=["bare", "logging"])
+def test_request_logging_middleware_dispatch(
+    benchmark, event_loop_runner, with_middleware
+):
+    app = _asgi_app(with_middleware)
+
+    async def _requests():
+        for _ in range(100):
+            await _asgi_request(app)
+
+    benchmark(lambda: event_loop_runner(_requests()))
+
+
+@pytest.mark.parametrize("size", SIZES[:2])
+def test_job_to_dict(benchmark, size):
+    jobs = [
+        Job(
+            id=idx,
+            job_id=f"job-{idx}",
+            job_type=JobType.QA_GENERATION,
+            status=JobStatus.COMPLETED,
+            progress=100,
+            result=None,
+            error=None,
+            created_at="2026-01-01 00:00:00",
+            updated_at="2026-01-01 00:00:00",
+        )
+        for idx in range(size)
+    ]
+
+    items = benchmark.pedantic(
+        lambda: [job.to_dict() for job in jobs], rounds=ROUNDS[size], iterations=1
+    )
+
+    assert len(items) == size
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_job_result_serialization(benchmark, size):
+    """任务结果写入与读取的序列化路径"""
+    column_type = OrJSON()
+    qas = make_qa_pairs(size)
+    result = {
+        "generated_count": size,
+        "filtered_count": size,
+        "post_processed_count": size,
+        "total": size,
+        "qas": qas,
+    }
+
+    def _round_trip():
+        value = column_type.process_bind_param(result, None)
+        return column_type.process_result_value(value, None)
+
+    loaded = benchmark.pedantic(_round_trip, rounds=ROUNDS[size], iterations=1)
+
+    assert loaded["total"] == size
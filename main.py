@@ -10,6 +10,7 @@ if __name__ == "__main__":
         "main:app",
         host=settings.host,
         port=settings.port,
+        workers=settings.workers,
         reload=settings.debug,
         log_level=settings.log_level.lower(),
     )
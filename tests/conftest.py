@@ -1,9 +1,17 @@
 """pytest 公共配置与 fixture"""
 
+import asyncio
+
+import httpx
 import pytest
 from fastapi.testclient import TestClient
+from openai import AsyncOpenAI
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
 from main import app
+from app.core.database import Base, create_database_engine
+from app.mock.config import MockLLMSettings
+from app.mock.server import create_mock_app
 
 
 @pytest.fixture(scope="session")
@@ -13,3 +21,32 @@ def client() -> TestClient:
     """
     with TestClient(app) as client:
         yield client
+
+
+@pytest.fixture
+def mock_llm_client() -> AsyncOpenAI:
+    """
+    进程内连接模拟 LLM 服务的 OpenAI 客户端，无延迟、无故障注入，结果可复现。
+    """
+    mock_app = create_mock_app(MockLLMSettings(seed=0))
+    return AsyncOpenAI(
+        api_key="mock",
+        base_url="http://mock-llm/v1",
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=mock_app)),
+    )
+
+
+@pytest.fixture
+def sqlite_session_factory(tmp_path) -> async_sessionmaker:
+    """
+    临时 SQLite 数据库的会话工厂，已创建全部数据表，各测试模块自行替换所用模块的 async_session。
+    """
+    engine = create_database_engine(f"sqlite+aiosqlite:///{tmp_path}/test.sqlite3")
+
+    async def _setup():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(_setup())
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    asyncio.run(engine.dispose())
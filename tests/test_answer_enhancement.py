@@ -0,0 +1,755 @@
+"""答案增强服务测试"""
+
+import asyncio
+import threading
+
+import numpy as np
+
+from app.services.answer_enhancement.caches import SemanticCache
+from app.services.answer_enhancement.checkers import (
+    CheckerDecisionLogger,
+    LLMBatchChecker,
+    MLChecker,
+    RuleChecker,
+)
+from app.services.answer_enhancement.classifiers import (
+    LogisticRegressionClassifier,
+    build_features,
+)
+from app.services.answer_enhancement.config import enhancement_service_settings
+from app.services.answer_enhancement.enhancers import LLMFusedEnhancer
+from app.services.answer_enhancement.enum import PipelineMode
+from app.services.answer_enhancement.service import (
+    CHECKER_DECISIONS,
+    AnswerEnhancementService,
+)
+from app.services.answer_enhancement.training import load_decisions, train
+
+
+class FakeService(AnswerEnhancementService):
+    """以固定延迟代替 LLM 调用，记录并发峰值"""
+
+    def __init__(self, max_concurrency, global_semaphore=None, counter=None):
+        super().__init__(None, "mock", 0.0, 0.0, 0.0, max_concurrency, global_semaphore)
+        # 多个实例可共享计数器以统计全局并发
+        self.counter = counter if counter is not None else {"running": 0, "peak": 0}
+
+    @property
+    def peak(self) -> int:
+        return self.counter["peak"]
+
+    async def execute(self, question: str, answer: str) -> str:
+        self.counter["running"] += 1
+        self.counter["peak"] = max(self.counter["peak"], self.counter["running"])
+        try:
+            # 序号越小耗时越长，使完成顺序与输入顺序相反
+            await asyncio.sleep(0.001 * (20 - int(question)))
+            if question == "3":
+                raise ValueError("bad item")
+            return f"enhanced-{answer}"
+        finally:
+            self.counter["running"] -= 1
+
+
+def test_execute_many_preserves_order_and_isolates_failures():
+    service = FakeService(max_concurrency=4)
+    items = [(str(idx), str(idx)) for idx in range(10)]
+    progress = []
+
+    async def _on_progress(completed, total):
+        progress.append((completed, total))
+
+    enhanced_answers, errors = asyncio.run(
+        service.execute_many(items, on_progress=_on_progress)
+    )
+
+    assert enhanced_answers[3] == "3"
+    assert [a for idx, a in enumerate(enhanced_answers) if idx != 3] == [
+        f"enhanced-{idx}" for idx in range(10) if idx != 3
+    ]
+    assert errors == [{"index": 3, "error": "bad item"}]
+    assert progress == [(idx, 10) for idx in range(1, 11)]
+    assert service.peak == 4
+
+
+def test_execute_many_respects_global_limit():
+    async def _run():
+        global_semaphore = asyncio.Semaphore(3)
+        counter = {"running": 0, "peak": 0}
+        services = [FakeService(4, global_semaphore, counter) for _ in range(2)]
+        items = [(str(idx), str(idx)) for idx in range(8)]
+        await asyncio.gather(*[service.execute_many(items) for service in services])
+        return counter
+
+    counter = asyncio.run(_run())
+
+    # 两个请求的单请求上限之和为 8，受全局上限约束
+    assert counter["peak"] == 3
+
+
+class FakeStage:
+    """以固定延迟模拟检查器/增强器/提取器，记录调用与开始/结束事件"""
+
+    def __init__(self, result: str, delay: float = 0.05, events: list | None = None):
+        self.result = result
+        self.delay = delay
+        self.calls = []
+        # 多个阶段共享事件列表，按发生顺序记录 (事件, 阶段结果)
+        self.events = events if events is not None else []
+
+    async def _run(self, *args) -> str:
+        self.calls.append(args)
+        self.events.append(("start", self.result))
+        await asyncio.sleep(self.delay)
+        self.events.append(("end", self.result))
+        return self.result
+
+    check = enhance = extract = _run
+
+
+def _dag_service(strategy: str, speculative: bool = False):
+    service = AnswerEnhancementService(
+        None, "mock", 0.0, 0.0, 0.0, speculative=speculative
+    )
+    events = []
+    checker = FakeStage(strategy, events=events)
+    enhancer = FakeStage("enhanced", events=events)
+    extractor = FakeStage("description", events=events)
+    service.check_pipeline = [checker]
+    service.enhance_pipeline = [enhancer]
+    service.extract_pipeline = [extractor]
+    return service, enhancer, extractor
+
+
+def _execute(service) -> str:
+    return asyncio.run(service.execute("有什么颜色?", "黑色"))
+
+
+def test_execute_direct_skips_enhancer():
+    service, enhancer, extractor = _dag_service("direct")
+
+    result = _execute(service)
+
+    assert result == "黑色"
+    assert enhancer.calls == [] and extractor.calls == []
+
+
+def test_execute_guidance_runs_enhance_and_extract_concurrently():
+    service, enhancer, extractor = _dag_service("guidance")
+
+    result = _execute(service)
+
+    assert result == "enhanced[description]"
+    assert enhancer.calls[0][2] == "guidance"
+    # 检查完成后增强与提取同时开始，任一结束前两者均已开始
+    assert enhancer.events[:2] == [("start", "guidance"), ("end", "guidance")]
+    assert sorted(enhancer.events[2:4]) == [
+        ("start", "description"),
+        ("start", "enhanced"),
+    ]
+
+
+def test_execute_speculative_enhance():
+    service, enhancer, _ = _dag_service("enhance", speculative=True)
+
+    result = _execute(service)
+
+    assert result == "enhanced"
+    assert len(enhancer.calls) == 1
+    # 预测命中，增强在检查结束前开始，与检查重叠
+    assert enhancer.events.index(("start", "enhanced")) < enhancer.events.index(
+        ("end", "enhance")
+    )
+
+
+def test_execute_speculative_discarded_on_mismatch():
+    service, enhancer, _ = _dag_service("guidance", speculative=True)
+
+    result = _execute(service)
+
+    assert result == "enhanced[description]"
+    assert [call[2] for call in enhancer.calls] == ["enhance", "guidance"]
+
+
+def test_rule_checker_default_rules():
+    checker = RuleChecker(enhancement_service_settings.checker_rules)
+    cases = [
+        ("拍照怎么样?", "后置5000万双摄", "guidance"),
+        ("续航怎么样?", "[QuantumFlip实拍图]", "guidance"),
+        ("续航怎么样?", "参见 https://example.com/a.mp4", "guidance"),
+        ("续航怎么样?", "给您看看视频 https://example.com/a.mp4", ""),
+        ("价格多少?", "7999元起", ""),
+    ]
+
+    async def _run():
+        return [await checker.check(q, a) for q, a, _ in cases]
+
+    results = asyncio.run(_run())
+
+    assert results == [expected for _, _, expected in cases]
+
+
+def test_rule_checker_hit_skips_llm_checker():
+    service = AnswerEnhancementService(
+        None,
+        "mock",
+        0.0,
+        0.0,
+        0.0,
+        checker_rules=enhancement_service_settings.checker_rules,
+    )
+    llm_checker = FakeStage("enhance", delay=0)
+    service.check_pipeline[1] = llm_checker
+    hits = CHECKER_DECISIONS.labels("RuleChecker", "hit")._value.get()
+    abstains = CHECKER_DECISIONS.labels("RuleChecker", "abstain")._value.get()
+
+    async def _run():
+        return [
+            await service._check("外观怎么样?", "玻璃机身"),
+            await service._check("价格多少?", "7999元起"),
+        ]
+
+    strategies = asyncio.run(_run())
+
+    assert [strategy.value for strategy in strategies] == ["guidance", "enhance"]
+    assert len(llm_checker.calls) == 1
+    assert CHECKER_DECISIONS.labels("RuleChecker", "hit")._value.get() == hits + 1
+    assert (
+        CHECKER_DECISIONS.labels("RuleChecker", "abstain")._value.get() == abstains + 1
+    )
+
+
+class KeywordEncoder:
+    """按关键字生成向量，代替 SentenceTransformer"""
+
+    keywords = ["颜色", "外观", "价格", "续航", "图", "元", "mAh", "支持"]
+
+    def encode(self, sentences, convert_to_numpy=True, **kwargs):
+        return np.array(
+            [[float(k in s) for k in self.keywords] + [1.0] for s in sentences],
+            dtype=np.float32,
+        )
+
+
+def _decisions():
+    samples = [
+        ("有什么颜色?", "黑色和银色", "guidance"),
+        ("外观怎么样?", "[实拍图]", "guidance"),
+        ("价格多少?", "7999元", "enhance"),
+        ("续航怎么样?", "5000mAh", "enhance"),
+        ("支持5G吗?", "支持", "direct"),
+    ]
+    return [
+        {"question": q, "answer": a, "checker": "LLMChecker", "strategy": s}
+        for q, a, s in samples * 10
+    ]
+
+
+def test_decision_log_and_training(tmp_path):
+    decision_logger = CheckerDecisionLogger(tmp_path / "decisions.jsonl")
+
+    async def _record():
+        for decision in _decisions():
+            decision_logger.record(
+                decision["question"],
+                decision["answer"],
+                "LLMChecker",
+                decision["strategy"],
+            )
+        decision_logger.record("价格多少?", "7999元", "RuleChecker", "guidance")
+        # 记录缓存在内存中，写入前文件不存在
+        written = (tmp_path / "decisions.jsonl").exists()
+        await decision_logger.flush()
+        return written
+
+    assert asyncio.run(_record()) is False
+    decisions = load_decisions(tmp_path / "decisions.jsonl")
+    classifier, report = train(
+        decisions, KeywordEncoder(), threshold=0.5, test_size=0.4
+    )
+    classifier.save(tmp_path / "model.npz")
+    loaded = LogisticRegressionClassifier.load(tmp_path / "model.npz")
+
+    assert len(decisions) == 5
+    assert loaded.labels == ["direct", "enhance", "guidance"]
+    assert np.allclose(loaded.weights, classifier.weights)
+    assert report["samples"] == 5
+    # 训练得到的分类器预测出标注的策略
+    features = build_features(
+        KeywordEncoder(),
+        [decision["question"] for decision in decisions],
+        [decision["answer"] for decision in decisions],
+    )
+    assert [strategy for strategy, _ in loaded.predict(features)] == [
+        decision["strategy"] for decision in decisions
+    ]
+
+
+def test_ml_checker_abstains_below_threshold():
+    decisions = _decisions()
+    encoder = KeywordEncoder()
+    classifier, _ = train(decisions, encoder, threshold=0.5, test_size=0)
+
+    async def _run(threshold):
+        checker = MLChecker(encoder, classifier, threshold)
+        return [await checker.check("有什么颜色?", "黑色"), await checker.check("", "")]
+
+    assert asyncio.run(_run(0.5))[0] == "guidance"
+    assert asyncio.run(_run(1.0)) == ["", ""]
+
+
+class FakeFusedEnhancer:
+    def __init__(self, result):
+        self.result = result
+
+    async def check_and_enhance(self, question, answer):
+        return self.result
+
+
+def test_fused_mode_and_fallback_to_staged():
+    service, enhancer, _ = _dag_service("enhance")
+    service.pipeline_mode = PipelineMode.FUSED
+
+    service.fused_pipeline = [
+        FakeFusedEnhancer(
+            {"strategy": "guidance", "answer": "黑色,给您看看", "description": "外观图"}
+        )
+    ]
+    fused = _execute(service)
+
+    service.fused_pipeline = [FakeFusedEnhancer(None)]
+    fallback = _execute(service)
+
+    assert fused == "黑色,给您看看[外观图]"
+    assert fallback == "enhanced"
+    assert len(enhancer.calls) == 1
+
+
+def test_fused_enhancer_validation():
+    fused_enhancer = LLMFusedEnhancer(None, "mock")
+
+    assert fused_enhancer.parse_response("not json") is None
+    assert fused_enhancer.parse_response('{"strategy": "OTHER", "answer": "a"}') is None
+    assert (
+        fused_enhancer.parse_response('{"strategy": "ENHANCE", "answer": ""}') is None
+    )
+    assert fused_enhancer.parse_response(
+        '{"strategy": "ENHANCE", "answer": "好的", "description": null}'
+    ) == {"strategy": "enhance", "answer": "好的", "description": None}
+
+
+def test_semantic_cache_hit_requires_matching_answer():
+    cache = SemanticCache(KeywordEncoder(), threshold=0.99, max_size=10, ttl=60)
+
+    def embed(question: str, answer: str) -> np.ndarray:
+        return asyncio.run(cache.embed(question, answer))
+
+    cache.put(embed("有什么颜色?", "黑色"), "黑色", "黑色,给您看看[外观图]")
+
+    assert cache.get(embed("有哪些颜色?", "黑色"), "黑色") == "黑色,给您看看[外观图]"
+    assert cache.get(embed("有哪些颜色?", "白色"), "白色") is None
+    assert cache.get(embed("价格多少?", "黑色"), "黑色") is None
+
+
+def test_semantic_cache_eviction():
+    cache = SemanticCache(KeywordEncoder(), threshold=0.99, max_size=2, ttl=60)
+    pairs = [
+        ("有什么颜色?", "黑色"),
+        ("价格多少?", "7999元"),
+        ("续航怎么样?", "5000mAh"),
+    ]
+    embeddings = [asyncio.run(cache.embed(q, a)) for q, a in pairs]
+
+    cache.put(embeddings[0], "黑色", "a")
+    cache.put(embeddings[1], "7999元", "b")
+    cache.get(embeddings[0], "黑色")
+    cache.put(embeddings[2], "5000mAh", "c")
+
+    # 最久未访问的条目被淘汰
+    assert len(cache) == 2
+    assert cache.get(embeddings[1], "7999元") is None
+    assert cache.get(embeddings[0], "黑色") == "a"
+
+    cache.ttl = -1
+    cache.put(embeddings[1], "7999元", "b")
+    assert cache.get(embeddings[1], "7999元") is None
+
+
+def test_execute_uses_semantic_cache():
+    service, enhancer, _ = _dag_service("enhance")
+    service.semantic_cache = SemanticCache(
+        KeywordEncoder(), threshold=0.99, max_size=10, ttl=60
+    )
+
+    results = [_execute(service) for _ in range(3)]
+
+    assert results == ["enhanced"] * 3
+    assert len(enhancer.calls) == 1
+
+    async def _stream():
+        return [event async for event in service.execute_stream("有什么颜色?", "黑色")]
+
+    # 命中缓存时不产出策略事件
+    assert asyncio.run(_stream()) == [("delta", "enhanced"), ("done", "enhanced")]
+
+
+def test_guidance_cache_skips_extractor(sqlite_session_factory, monkeypatch):
+    from app.services.answer_enhancement import caches
+
+    monkeypatch.setattr(caches, "async_session", sqlite_session_factory)
+
+    async def _run():
+        topics = enhancement_service_settings.guidance_topics
+
+        service, _, extractor = _dag_service("guidance")
+        service.guidance_cache = caches.GuidanceCache(topics, 10, 10)
+        answer = "后置双摄[QuantumFlip实拍图]"
+        results = [
+            await service.execute("拍照怎么样?", answer),
+            await service.execute("相机拍得清楚吗?", answer),
+            await service.execute("外观怎么样?", answer),
+            await service.execute("拍照怎么样?", "后置双摄"),
+        ]
+
+        # 新实例从数据库预热
+        warmed = caches.GuidanceCache(topics, 10, 10)
+        key = warmed.key("拍照怎么样?", answer)
+        description = await warmed.get(key[0])
+        return results, extractor.calls, key, description
+
+    results, calls, key, description = asyncio.run(_run())
+
+    assert results[:2] == ["enhanced[description]"] * 2
+    # 同一主题与媒体只调用一次，不同主题或无媒体链接时调用提取器
+    assert len(calls) == 3
+    assert key[1:] == (["[QuantumFlip实拍图]"], "photo")
+    assert description == "description"
+
+
+def test_guidance_cache_retries_failed_extraction(sqlite_session_factory, monkeypatch):
+    from app.services.answer_enhancement import caches
+
+    monkeypatch.setattr(caches, "async_session", sqlite_session_factory)
+
+    class FlakyExtractor:
+        """第一次调用失败(返回空描述)，之后返回描述"""
+
+        def __init__(self):
+            self.calls = 0
+
+        async def extract(self, question, answer):
+            self.calls += 1
+            return "" if self.calls == 1 else "description"
+
+    async def _run():
+        service, _, _ = _dag_service("guidance")
+        extractor = FlakyExtractor()
+        service.extract_pipeline = [extractor]
+        service.guidance_cache = caches.GuidanceCache(
+            enhancement_service_settings.guidance_topics, 10, 10
+        )
+        answer = "后置双摄[QuantumFlip实拍图]"
+        results = [await service.execute("拍照怎么样?", answer) for _ in range(3)]
+        return results, extractor.calls
+
+    results, calls = asyncio.run(_run())
+
+    # 空描述不写入缓存，下次请求重新提取，成功后命中缓存
+    assert results == ["enhanced[]", "enhanced[description]", "enhanced[description]"]
+    assert calls == 2
+
+
+class PartialBatchChecker(LLMBatchChecker):
+    """批量输出只包含偶数序号的条目"""
+
+    async def check_batch(self, items):
+        self.batches.append(len(items))
+        return {index: "enhance" for index in range(0, len(items), 2)}
+
+
+def test_batch_checker_falls_back_per_item():
+    checker = PartialBatchChecker(None, "mock", window=0.01, max_batch_size=16)
+    checker.batches = []
+    checker.fallback = FakeStage("direct", delay=0)
+
+    async def _run():
+        return await asyncio.gather(
+            *[checker.check(str(idx), str(idx)) for idx in range(5)]
+        )
+
+    strategies = asyncio.run(_run())
+
+    assert checker.batches == [5]
+    assert strategies == ["enhance", "direct", "enhance", "direct", "enhance"]
+    assert [call[0] for call in checker.fallback.calls] == ["1", "3"]
+
+
+def test_enhance_stream_endpoint(mock_llm_client):
+    import httpx
+    import orjson
+    from fastapi import FastAPI
+
+    from app.services.answer_enhancement.deps import get_answer_enhancement_service
+    from app.services.answer_enhancement.router import router
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_answer_enhancement_service] = lambda: (
+        AnswerEnhancementService(mock_llm_client, "mock", 0.01, 0.3, 0.01)
+    )
+
+    async def _run():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            response = await client.post(
+                "/api/v1/answer/sync/enhance_stream",
+                json={
+                    "question": "有什么颜色?",
+                    "answer": "提供曜石黑、冰川银两种配色",
+                },
+            )
+        return response
+
+    response = asyncio.run(_run())
+    events = [
+        (block.split("\n")[0][7:], orjson.loads(block.split("\n")[1][6:])["content"])
+        for block in response.text.strip().split("\n\n")
+    ]
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert events[0] == ("strategy", "guidance")
+    assert events[-1][0] == "done"
+    deltas = [data for event, data in events if event == "delta"]
+    assert len(deltas) > 2
+    assert "".join(deltas) == events[-1][1]
+    assert events[-1][1].startswith("提供曜石黑、冰川银两种配色")
+    assert deltas[-1].startswith("[") and deltas[-1].endswith("]")
+
+
+def test_enhance_stream_close_cancels_extract():
+    service, _, _ = _dag_service("guidance")
+    cancelled = []
+
+    class SlowExtractor:
+        async def extract(self, question, answer):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+    async def _stream(question, answer, strategy):
+        for chunk in ["增强", "答案"]:
+            await asyncio.sleep(0.01)
+            yield chunk
+
+    service.extract_pipeline = [SlowExtractor()]
+    service.enhance_pipeline[0].enhance_stream = _stream
+
+    async def _run():
+        stream = service.execute_stream("有什么颜色?", "黑色")
+        events = [await anext(stream), await anext(stream)]
+        # 模拟客户端断开，提前关闭生成器
+        await stream.aclose()
+        return events
+
+    events = asyncio.run(_run())
+
+    assert events == [("strategy", "guidance"), ("delta", "增强")]
+    assert cancelled == [True]
+
+
+def test_iter_file_items():
+    import io
+
+    import pytest
+
+    from app.services.answer_enhancement.enum import FileFormat
+    from app.services.answer_enhancement.utils import iter_file_items
+
+    jsonl = (
+        b'{"question": "q1", "answer": "a1"}\n\n{"question": "q2", "answer": "a2"}\n'
+    )
+    csv = '﻿id,question,answer\r\n1,q1,a1\r\n2,q2,"第一行\r\n第二行"\r\n'
+    assert list(iter_file_items(io.BytesIO(jsonl), FileFormat.JSONL)) == [
+        ("q1", "a1"),
+        ("q2", "a2"),
+    ]
+    assert list(iter_file_items(io.BytesIO(csv.encode()), FileFormat.CSV)) == [
+        ("q1", "a1"),
+        ("q2", "第一行\r\n第二行"),
+    ]
+
+    # 行号包含空行
+    invalid = jsonl + b'{"question": "q"}\n'
+    with pytest.raises(ValueError, match="Line 4: answer: Field required"):
+        list(iter_file_items(io.BytesIO(invalid), FileFormat.JSONL))
+    with pytest.raises(ValueError, match="question and answer"):
+        list(iter_file_items(io.BytesIO(b"q,a\n1,2\n"), FileFormat.CSV))
+
+    # 指定 on_error 时跳过格式错误的行
+    errors = []
+    assert list(
+        iter_file_items(io.BytesIO(invalid), FileFormat.JSONL, on_error=errors.append)
+    ) == [("q1", "a1"), ("q2", "a2")]
+    assert [str(e) for e in errors] == ["Line 4: answer: Field required"]
+
+
+def test_execute_iter_preserves_order_with_bounded_window():
+    service = FakeService(max_concurrency=2)
+    read = []
+
+    def _items():
+        for idx in range(10):
+            read.append(idx)
+            yield str(idx), str(idx)
+
+    async def _run():
+        results = []
+        async for question, answer, enhanced_answer, error in service.execute_iter(
+            _items()
+        ):
+            # 已读取未产出的项数不超过并发上限的两倍
+            assert len(read) - len(results) <= 4
+            results.append((question, enhanced_answer, error))
+        return results
+
+    results = asyncio.run(_run())
+
+    assert [question for question, _, _ in results] == [str(i) for i in range(10)]
+    assert results[3] == ("3", "3", "bad item")
+    assert results[4] == ("4", "enhanced-4", None)
+    assert service.peak == 2
+
+
+def test_enhance_answer_from_file_job(tmp_path, monkeypatch):
+    import orjson
+
+    from app.config import settings
+    from app.core.enum import JobStatus
+    from app.services.answer_enhancement import jobs
+    from app.services.answer_enhancement.enum import FileFormat
+
+    monkeypatch.setattr(settings, "artifact_dir", str(tmp_path))
+    updates = []
+
+    async def _update(job_id, **kwargs):
+        updates.append(kwargs)
+
+    monkeypatch.setattr(jobs.async_job_manager, "update_async_job", _update)
+    # 分多批读取与写入
+    monkeypatch.setattr(jobs, "FILE_BATCH_SIZE", 3)
+    reader_threads = set()
+    iter_file_items = jobs.iter_file_items
+
+    def _iter_file_items(*args, **kwargs):
+        for item in iter_file_items(*args, **kwargs):
+            reader_threads.add(threading.current_thread())
+            yield item
+
+    monkeypatch.setattr(jobs, "iter_file_items", _iter_file_items)
+
+    upload_path = tmp_path / "upload.jsonl"
+    upload_path.write_bytes(
+        b"".join(
+            orjson.dumps({"question": str(idx), "answer": str(idx)}) + b"\n"
+            for idx in range(10)
+        )
+    )
+    asyncio.run(
+        jobs.enhance_answer_from_file(
+            "job", upload_path, FileFormat.JSONL, FakeService(max_concurrency=2)
+        )
+    )
+
+    lines = [
+        orjson.loads(line)
+        for line in (tmp_path / "job.jsonl").read_bytes().splitlines()
+    ]
+    assert [line["enhanced_answer"] for line in lines[:4]] == [
+        "enhanced-0",
+        "enhanced-1",
+        "enhanced-2",
+        "3",
+    ]
+    assert lines[3]["error"] == "bad item"
+    assert [line["index"] for line in lines] == list(range(10))
+    assert updates[-1] == {
+        "status": JobStatus.COMPLETED,
+        "progress": 100,
+        "result": {"total": 10, "failed": 1, "artifact": "job.jsonl"},
+    }
+    progress = [update["progress"] for update in updates[:-1]]
+    assert progress == sorted(progress) and progress[-1] < 100
+    # 上传文件在线程中读取解析
+    assert threading.main_thread() not in reader_threads
+    assert not upload_path.exists()
+    assert not (tmp_path / "job.jsonl.part").exists()
+
+
+def test_enhance_answer_from_file_job_invalid_rows(tmp_path, monkeypatch):
+    import orjson
+
+    from app.config import settings
+    from app.core.enum import JobStatus
+    from app.services.answer_enhancement import jobs
+    from app.services.answer_enhancement.enum import FileFormat
+
+    monkeypatch.setattr(settings, "artifact_dir", str(tmp_path))
+    updates = []
+
+    async def _update(job_id, **kwargs):
+        updates.append(kwargs)
+
+    monkeypatch.setattr(jobs.async_job_manager, "update_async_job", _update)
+
+    # 格式错误的行记录到结果文件后继续处理
+    upload_path = tmp_path / "upload.jsonl"
+    upload_path.write_bytes(
+        b'{"question": "0", "answer": "0"}\n'
+        b"not json\n"
+        b'{"question": "2", "answer": "2"}\n'
+        b"\xff\n"
+    )
+    asyncio.run(
+        jobs.enhance_answer_from_file(
+            "job", upload_path, FileFormat.JSONL, FakeService(max_concurrency=2)
+        )
+    )
+
+    lines = [
+        orjson.loads(line)
+        for line in (tmp_path / "job.jsonl").read_bytes().splitlines()
+    ]
+    assert [(line["index"], line["enhanced_answer"]) for line in lines] == [
+        (0, "enhanced-0"),
+        (1, None),
+        (2, "enhanced-2"),
+        (3, None),
+    ]
+    assert lines[1]["error"].startswith("Line 2: ")
+    assert lines[3]["error"] == "Line 4: file must be UTF-8 encoded"
+    assert updates[-1] == {
+        "status": JobStatus.COMPLETED,
+        "progress": 100,
+        "result": {"total": 4, "failed": 2, "artifact": "job.jsonl"},
+    }
+
+    # 表头缺少所需列时任务失败
+    updates.clear()
+    upload_path = tmp_path / "upload.csv"
+    upload_path.write_bytes(b"q,a\n1,1\n")
+    asyncio.run(
+        jobs.enhance_answer_from_file(
+            "job2", upload_path, FileFormat.CSV, FakeService(max_concurrency=2)
+        )
+    )
+
+    assert updates == [
+        {
+            "status": JobStatus.FAILED,
+            "error": "CSV header must contain question and answer columns",
+        }
+    ]
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["job.jsonl"]
@@ -0,0 +1,91 @@
+"""批量推理模式测试：使用本地文件后端，无需网络"""
+
+import asyncio
+
+import orjson
+from openai import AsyncOpenAI
+
+from app.core.batch import LocalBatchBackend, build_batch_request
+from app.services.qa_generation.filters import LLMFilter
+from app.services.qa_generation.service import QAGenerationService
+
+
+def _completion(content: str) -> dict:
+    return {
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}]
+    }
+
+
+async def _handler(body: dict) -> dict:
+    """生成请求返回固定QA对，过滤请求仅保留包含 VERTU AGENT Q 的QA对"""
+    system_prompt = body["messages"][0]["content"]
+    user_prompt = body["messages"][1]["content"]
+    if system_prompt == LLMFilter.system_prompt:
+        keep = "VERTU AGENT Q" in user_prompt
+        return _completion(orjson.dumps({"keep": keep, "reason": "test"}).decode())
+    if "失败" in user_prompt:
+        raise RuntimeError("upstream error")
+    return _completion(
+        orjson.dumps(
+            [
+                {
+                    "question": "VERTU AGENT Q支持NFC吗?",
+                    "answer": "支持NFC功能。",
+                    "intent": "产品&功能咨询",
+                },
+                {
+                    "question": "VERTU QUANTUM有几种颜色?",
+                    "answer": "有三种配色。",
+                    "intent": "产品&功能咨询",
+                },
+            ]
+        ).decode()
+    )
+
+
+def _service() -> QAGenerationService:
+    return QAGenerationService(
+        AsyncOpenAI(api_key="test", base_url="http://127.0.0.1:1"),
+        None,
+        "test-model",
+        0.3,
+        0.01,
+        0.88,
+        [{"question_condition": "VERTU"}],
+    )
+
+
+def test_local_batch_backend_run(tmp_path):
+    """本地批量后端按 custom_id 返回结果，失败请求返回 None"""
+    backend = LocalBatchBackend(tmp_path, _handler)
+    requests = [
+        build_batch_request("ok", {"messages": [{"content": ""}, {"content": "ok"}]}),
+        build_batch_request(
+            "bad", {"messages": [{"content": ""}, {"content": "失败"}]}
+        ),
+    ]
+
+    results = asyncio.run(backend.run(requests, poll_interval=0.01))
+
+    assert set(results) == {"ok", "bad"}
+    assert results["bad"] is None
+    assert "VERTU AGENT Q" in results["ok"]
+
+
+def test_generate_and_filter_batch(tmp_path):
+    """批量生成与过滤结果映射回对应 context"""
+    backend = LocalBatchBackend(tmp_path, _handler)
+    service = _service()
+
+    async def _run():
+        generated = await service._generate_batch(
+            ["1. 用户: 你好", "1. 用户: 失败"], backend, 0.01
+        )
+        qas = [qa_pair for qa_pairs in generated for qa_pair in qa_pairs]
+        return generated, await service._filter_batch(qas, backend, 0.01)
+
+    generated, filtered = asyncio.run(_run())
+
+    assert len(generated[0]) == 2
+    assert generated[1] == []
+    assert [qa["question"] for qa in filtered] == ["VERTU AGENT Q支持NFC吗?"]
@@ -0,0 +1,414 @@
+"""异步任务管理器测试"""
+
+import os
+import asyncio
+
+import orjson
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core import managers
+from app.core.database import Base, Job
+from app.core.enum import JobStatus, JobType
+from app.core.stores import DatabaseJobStore, MemoryJobStore
+
+
+@pytest.fixture
+def manager(sqlite_session_factory, monkeypatch):
+    """使用临时数据库的任务管理器，记录提交次数"""
+    session_factory = sqlite_session_factory
+    commits = []
+
+    def _session():
+        session = session_factory()
+        commit = session.commit
+
+        async def _commit():
+            commits.append(True)
+            await commit()
+
+        session.commit = _commit
+        return session
+
+    async def _setup():
+        async with session_factory() as session:
+            session.add_all(
+                [
+                    Job(job_id=job_id, job_type=JobType.ANSWER_ENHANCEMENT)
+                    for job_id in ["a", "b"]
+                ]
+            )
+            await session.commit()
+
+    asyncio.run(_setup())
+    manager = managers.async_job_manager
+    monkeypatch.setattr(manager, "_store", DatabaseJobStore(_session))
+    monkeypatch.setattr(manager, "_flush_interval", 0.05)
+    monkeypatch.setattr(manager, "_pending_updates", {})
+    manager.commits = commits
+    manager.session_factory = session_factory
+    return manager
+
+
+async def _stored(manager, job_id: str) -> tuple[JobStatus, int]:
+    async with manager.session_factory() as session:
+        job = await session.scalar(select(Job).where(Job.job_id == job_id))
+        return job.status, job.progress
+
+
+def test_progress_updates_are_coalesced(manager):
+    async def _run():
+        await manager.update_async_job("a", status=JobStatus.RUNNING)
+        await manager.update_async_job("b", status=JobStatus.RUNNING)
+        for progress in range(1, 100):
+            await manager.update_async_job("a", progress=progress)
+            await manager.update_async_job("b", progress=progress // 2)
+        before_flush = await _stored(manager, "a")
+        visible = await manager.get_async_job("a")
+        await asyncio.sleep(0.1)
+        return before_flush, visible, await _stored(manager, "a")
+
+    before_flush, visible, after_flush = asyncio.run(_run())
+
+    # 刷新前读取到缓存中的最新进度
+    assert before_flush == (JobStatus.PENDING, 0)
+    assert (visible["status"], visible["progress"]) == (JobStatus.RUNNING, 99)
+    assert after_flush == (JobStatus.RUNNING, 99)
+    assert asyncio.run(_stored(manager, "b")) == (JobStatus.RUNNING, 49)
+    assert len(manager.commits) == 1
+
+
+def test_terminal_status_is_written_through(manager):
+    async def _run():
+        await manager.update_async_job("a", progress=50)
+        await manager.update_async_job(
+            "a", status=JobStatus.COMPLETED, result={"total": 1}
+        )
+        completed = await _stored(manager, "a")
+        commits = len(manager.commits)
+
+        # 终态写入后到达的进度更新不覆盖终态
+        await manager.update_async_job("a", progress=60)
+        await manager.flush()
+        return completed, commits, await _stored(manager, "a")
+
+    completed, commits, after_flush = asyncio.run(_run())
+
+    assert completed == (JobStatus.COMPLETED, 50)
+    assert commits == 1
+    assert after_flush == (JobStatus.COMPLETED, 50)
+
+
+def test_write_through_when_buffering_disabled(manager, monkeypatch):
+    monkeypatch.setattr(manager, "_flush_interval", 0)
+
+    async def _run():
+        for progress in range(1, 4):
+            await manager.update_async_job("a", progress=progress)
+        return await _stored(manager, "a")
+
+    assert asyncio.run(_run()) == (JobStatus.PENDING, 3)
+    assert len(manager.commits) == 3
+
+
+def test_keyset_pagination_and_filters(manager, monkeypatch):
+    from datetime import datetime, timedelta
+
+    monkeypatch.setattr(manager, "_count_cache", {})
+    base = datetime(2026, 1, 1)
+
+    async def _run():
+        async with manager.session_factory() as session:
+            # 每两个任务的创建时间相同，游标需按 id 区分
+            session.add_all(
+                [
+                    Job(
+                        job_id=f"job-{idx}",
+                        job_type=JobType.QA_GENERATION,
+                        status=JobStatus.COMPLETED if idx % 3 else JobStatus.FAILED,
+                        created_at=base + timedelta(seconds=idx // 2),
+                    )
+                    for idx in range(25)
+                ]
+            )
+            await session.commit()
+
+        pages, cursor = [], None
+        while True:
+            page = await manager.get_async_jobs(
+                1, 4, False, cursor=cursor, job_type=JobType.QA_GENERATION
+            )
+            pages.append(page)
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        failed = await manager.get_async_jobs(
+            1, 100, False, status=JobStatus.FAILED, job_type=None
+        )
+        offset = await manager.get_async_jobs(
+            2, 4, False, job_type=JobType.QA_GENERATION
+        )
+        return pages, failed, offset
+
+    pages, failed, offset = asyncio.run(_run())
+
+    job_ids = [job["job_id"] for page in pages for job in page["items"]]
+    assert job_ids == [f"job-{idx}" for idx in reversed(range(25))]
+    assert len(pages) == 7 and pages[0]["total"] == 25
+    assert [job["job_id"] for job in failed["items"]] == [
+        f"job-{idx}" for idx in reversed(range(0, 25, 3))
+    ]
+    # 不传游标时保留偏移分页
+    assert [job["job_id"] for job in offset["items"]] == job_ids[4:8]
+
+
+def test_job_count_is_cached(manager, monkeypatch):
+    monkeypatch.setattr(manager, "_count_cache", {})
+
+    async def _run():
+        first = await manager.get_async_jobs(1, 10, False)
+        async with manager.session_factory() as session:
+            session.add(Job(job_id="c", job_type=JobType.UNKNOWN))
+            await session.commit()
+        cached = await manager.get_async_jobs(1, 10, False)
+        manager._count_cache.clear()
+        refreshed = await manager.get_async_jobs(1, 10, False)
+        return first, cached, refreshed
+
+    first, cached, refreshed = asyncio.run(_run())
+
+    assert (first["total"], cached["total"], refreshed["total"]) == (2, 2, 3)
+    assert len(cached["items"]) == 3
+
+
+def test_invalid_cursor(manager):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        asyncio.run(manager.get_async_jobs(1, 10, False, cursor="not-a-cursor"))
+
+
+def test_large_result_is_stored_compressed(manager, tmp_path, monkeypatch):
+    from app.core import artifacts
+
+    monkeypatch.setattr(artifacts.settings, "artifact_dir", str(tmp_path / "artifacts"))
+    result = {
+        "total": 200,
+        "qas": [
+            {"question": f"问题{idx}", "answer": "回答" * 20} for idx in range(200)
+        ],
+    }
+
+    async def _run():
+        await manager.update_async_job("a", status=JobStatus.COMPLETED, result=result)
+        await manager.update_async_job("b", status=JobStatus.COMPLETED, result=result)
+        return await manager.get_async_job("a"), await manager.get_async_job("b")
+
+    job_a, job_b = asyncio.run(_run())
+
+    ref = job_a["result"]["result_ref"]
+    assert job_a["result"] == {"total": 200, "result_ref": ref}
+    # 相同结果只存储一份
+    assert job_b["result"]["result_ref"] == ref
+    assert len(list((tmp_path / "artifacts" / "results").rglob("*.zz"))) == 1
+    assert ref["compressed_size"] < ref["size"]
+
+    content = b"".join(artifacts.iter_result(ref["digest"]))
+    assert len(content) == ref["size"]
+    assert orjson.loads(content) == result
+
+
+def test_small_result_is_kept_inline(manager, tmp_path, monkeypatch):
+    from app.core import artifacts
+
+    monkeypatch.setattr(artifacts.settings, "artifact_dir", str(tmp_path / "artifacts"))
+
+    async def _run():
+        await manager.update_async_job(
+            "a", status=JobStatus.COMPLETED, result={"total": 1, "artifact": "a.jsonl"}
+        )
+        return await manager.get_async_job("a")
+
+    job = asyncio.run(_run())
+
+    assert job["result"] == {"total": 1, "artifact": "a.jsonl"}
+    assert not (tmp_path / "artifacts").exists()
+
+
+async def _exercise_store(store) -> list:
+    """对任务存储执行相同的操作序列，返回去除时间字段的结果"""
+    for job_id, job_type in [
+        ("a", JobType.QA_GENERATION),
+        ("b", JobType.ANSWER_ENHANCEMENT),
+        ("c", JobType.QA_GENERATION),
+    ]:
+        await store.create(job_id, job_type)
+    await store.update("a", {"status": JobStatus.RUNNING, "result": {"total": 1}})
+    await store.update_many(
+        {"a": {"progress": 10}, "b": {"status": JobStatus.COMPLETED, "progress": 100}}
+    )
+    # 已处于终态的任务不接受合并写入的更新
+    await store.update_many({"a": {"progress": 20}, "b": {"progress": 50}})
+
+    def _strip(job: dict | None) -> dict | None:
+        if job is None:
+            return None
+        return {k: v for k, v in job.items() if k not in ("created_at", "updated_at")}
+
+    first = await store.list(2, False, {})
+    last_job, last_created_at = first[-1]
+    return [
+        _strip(await store.get("a")),
+        _strip(await store.get("missing")),
+        [_strip(job) for job, _ in first],
+        [
+            _strip(job)
+            for job, _ in await store.list(
+                2, True, {}, cursor=(last_created_at, last_job["id"])
+            )
+        ],
+        [_strip(job) for job, _ in await store.list(10, True, {}, offset=1)],
+        [
+            job["job_id"]
+            for job, _ in await store.list(
+                10, False, {"job_type": JobType.QA_GENERATION}
+            )
+        ],
+        await store.count({}),
+        await store.count({"status": JobStatus.COMPLETED}),
+    ]
+
+
+def test_memory_store_matches_database_store(sqlite_session_factory):
+    async def _run():
+        database = await _exercise_store(DatabaseJobStore(sqlite_session_factory))
+        return database, await _exercise_store(MemoryJobStore())
+
+    database, memory = asyncio.run(_run())
+
+    assert memory == database
+    assert memory[0] == {
+        "id": 1,
+        "job_id": "a",
+        "job_type": JobType.QA_GENERATION,
+        "status": JobStatus.RUNNING,
+        "progress": 20,
+        "result": {"total": 1},
+        "error": None,
+        "priority": 1,
+        "started_at": None,
+        "lease_owner": None,
+        "lease_expires_at": None,
+        "cancel_requested": False,
+    }
+    assert [job["job_id"] for job in memory[2] + memory[3]] == ["c", "b", "a"]
+    assert memory[-2:] == [3, 1]
+
+
+@pytest.mark.skipif(
+    not os.environ.get("TEST_POSTGRES_URL"), reason="未设置 TEST_POSTGRES_URL"
+)
+def test_database_store_on_postgres():
+    """PostgreSQL 上的任务存储与内存存储结果一致，测试会重建数据表"""
+    pytest.importorskip("asyncpg")
+    from app.core.database import create_database_engine, create_missing_columns
+
+    engine = create_database_engine(os.environ["TEST_POSTGRES_URL"])
+
+    async def _run():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+            # 模拟升级前缺少取消请求列的任务表
+            await conn.exec_driver_sql("ALTER TABLE jobs DROP COLUMN cancel_requested")
+            await conn.run_sync(create_missing_columns)
+        database = await _exercise_store(
+            DatabaseJobStore(async_sessionmaker(engine, expire_on_commit=False))
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+        return database, await _exercise_store(MemoryJobStore())
+
+    database, memory = asyncio.run(_run())
+
+    assert memory == database
+
+
+def test_manager_with_memory_store(manager, monkeypatch):
+    monkeypatch.setattr(manager, "_store", MemoryJobStore())
+    monkeypatch.setattr(manager, "_count_cache", {})
+
+    async def _run():
+        job_id = await manager.create_async_job(JobType.UNKNOWN, "tests.noop")
+        for progress in range(1, 10):
+            await manager.update_async_job(job_id, progress=progress)
+        await manager.update_async_job(job_id, status=JobStatus.COMPLETED)
+        return await manager.get_async_job(job_id), await manager.get_async_jobs(
+            1, 10, False
+        )
+
+    job, jobs = asyncio.run(_run())
+
+    assert (job["status"], job["progress"]) == (JobStatus.COMPLETED, 9)
+    assert jobs["total"] == 1 and jobs["items"][0]["job_id"] == job["job_id"]
+    assert len(manager.commits) == 0
+
+
+def test_create_missing_columns(tmp_path):
+    from sqlalchemy import MetaData, Table, inspect
+    from sqlalchemy.dialects import postgresql
+    from sqlalchemy.schema import CreateColumn
+
+    from app.core.database import create_missing_columns
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/jobs.sqlite3")
+    added = {"priority", "lease_owner", "lease_expires_at", "cancel_requested"}
+
+    async def _run():
+        async with engine.begin() as conn:
+            # 升级前的任务表，缺少优先级、租约与取消请求列
+            old_table = Table(
+                "jobs",
+                MetaData(),
+                *(
+                    column._copy()
+                    for column in Job.__table__.columns
+                    if column.name not in added
+                ),
+            )
+            await conn.run_sync(old_table.create)
+            await conn.execute(
+                old_table.insert().values(
+                    job_id="old",
+                    job_type=JobType.QA_GENERATION,
+                    status=JobStatus.PENDING,
+                )
+            )
+            await conn.run_sync(create_missing_columns)
+            columns = await conn.run_sync(
+                lambda sync_conn: {
+                    column["name"] for column in inspect(sync_conn).get_columns("jobs")
+                }
+            )
+            row = (
+                await conn.exec_driver_sql(
+                    "SELECT priority, cancel_requested FROM jobs"
+                )
+            ).one()
+        await engine.dispose()
+        return columns, tuple(row)
+
+    columns, row = asyncio.run(_run())
+
+    assert columns == set(Job.__table__.columns.keys())
+    assert row == (1, 0)
+    # PostgreSQL 的布尔默认值渲染为 false
+    assert (
+        str(
+            CreateColumn(Job.__table__.c.cancel_requested).compile(
+                dialect=postgresql.dialect()
+            )
+        )
+        == "cancel_requested BOOLEAN DEFAULT false NOT NULL"
+    )
@@ -0,0 +1,138 @@
+"""模拟 LLM 服务测试：各类请求的固定响应能被对应组件正确解析"""
+
+import asyncio
+
+import httpx
+from openai import AsyncOpenAI, RateLimitError
+
+from app.core.batch import OpenAIBatchBackend, build_batch_request
+from app.mock.config import MockLLMSettings
+from app.mock.server import create_mock_app
+from app.services.answer_enhancement.checkers import LLMBatchChecker, LLMChecker
+from app.services.answer_enhancement.enhancers import LLMEnhancer, LLMFusedEnhancer
+from app.services.answer_enhancement.enum import EnhancementStrategy
+from app.services.answer_enhancement.extractors import LLMExtractor
+from app.services.qa_generation.filters import LLMFilter
+from app.services.qa_generation.generators import LLMQAGenerator
+
+
+def test_answer_enhancement_prompts(mock_llm_client):
+    """检查器、增强器、提取器响应符合解析格式"""
+
+    async def _run():
+        strategy = await LLMChecker(mock_llm_client, "mock").check(
+            "有什么颜色?", "提供曜石黑、冰川银两种配色"
+        )
+        enhanced = await LLMEnhancer(mock_llm_client, "mock").enhance(
+            "有什么颜色?", "提供曜石黑、冰川银两种配色", strategy
+        )
+        description = await LLMExtractor(mock_llm_client, "mock").extract(
+            "有什么颜色?", enhanced
+        )
+        return strategy, enhanced, description
+
+    strategy, enhanced, description = asyncio.run(_run())
+
+    assert EnhancementStrategy.get_strategy(strategy) == EnhancementStrategy.GUIDANCE
+    assert enhanced.startswith("提供曜石黑、冰川银两种配色")
+    assert description
+
+
+def test_fused_prompt(mock_llm_client):
+    """融合增强器响应通过校验"""
+    result = asyncio.run(
+        LLMFusedEnhancer(mock_llm_client, "mock").check_and_enhance(
+            "有什么颜色?", "提供曜石黑、冰川银两种配色"
+        )
+    )
+
+    assert result["strategy"] == "guidance"
+    assert result["answer"].startswith("提供曜石黑、冰川银两种配色")
+    assert result["description"]
+
+
+def test_batch_checker_merges_concurrent_checks():
+    """窗口内的并发检查合并为一次调用"""
+    mock_app = create_mock_app(MockLLMSettings(seed=0))
+    openai_client = AsyncOpenAI(
+        api_key="mock",
+        base_url="http://mock-llm/v1",
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=mock_app)),
+    )
+    checker = LLMBatchChecker(openai_client, "mock", window=0.05, max_batch_size=8)
+    items = [("拍照怎么样?", f"后置{idx}千万双摄") for idx in range(10)]
+
+    async def _run():
+        return await asyncio.gather(*[checker.check(q, a) for q, a in items])
+
+    strategies = asyncio.run(_run())
+    stats = mock_app.state.mock.stats
+
+    assert strategies == ["GUIDANCE"] * 10
+    # 8 条达到上限立即发送，剩余 2 条在窗口结束时发送
+    assert stats["batch_checker"]["requests"] == 2
+    assert "checker" not in stats
+
+
+def test_qa_generation_prompts(mock_llm_client):
+    """生成器返回QA对列表，过滤器返回布尔值"""
+    context = "1. 用户: 支持NFC吗\n2. 客服: 支持NFC功能"
+
+    async def _run():
+        qa_pairs = await LLMQAGenerator(mock_llm_client, "mock", 0.3).generate(context)
+        keep = await LLMFilter(mock_llm_client, "mock", 0.01).filter(qa_pairs[0])
+        return qa_pairs, keep
+
+    qa_pairs, keep = asyncio.run(_run())
+
+    assert qa_pairs[0]["answer"] == "支持NFC功能"
+    assert {"question", "answer", "intent"} <= set(qa_pairs[0])
+    assert isinstance(keep, bool)
+
+
+def test_usage_and_rate_limit_injection():
+    """响应携带 token 用量，429 注入可被客户端识别"""
+    mock_app = create_mock_app(MockLLMSettings(seed=0, rate_limit_rate=1.0))
+    openai_client = AsyncOpenAI(
+        api_key="mock",
+        base_url="http://mock-llm/v1",
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=mock_app)),
+    )
+
+    async def _run():
+        try:
+            await openai_client.chat.completions.create(
+                model="mock", messages=[{"role": "user", "content": "你好"}]
+            )
+        except RateLimitError as e:
+            return e.response.headers.get("retry-after")
+
+    assert asyncio.run(_run()) == "1.0"
+
+    mock_app.state.mock.settings.rate_limit_rate = 0.0
+    response = asyncio.run(
+        openai_client.chat.completions.create(
+            model="mock", messages=[{"role": "user", "content": "你好"}]
+        )
+    )
+    assert response.usage.total_tokens > 0
+
+
+def test_openai_batch_backend(mock_llm_client):
+    """Batch 接口后端可通过模拟服务完成提交、轮询与结果映射"""
+    generator = LLMQAGenerator(mock_llm_client, "mock", 0.3)
+    requests = [
+        build_batch_request(
+            f"generate-{idx}",
+            generator.build_request(f"1. 用户: 问题{idx}\n2. 客服: 答案{idx}"),
+        )
+        for idx in range(3)
+    ]
+
+    results = asyncio.run(
+        OpenAIBatchBackend(mock_llm_client).run(requests, poll_interval=0.01)
+    )
+
+    assert set(results) == {"generate-0", "generate-1", "generate-2"}
+    assert generator.parse_response(results["generate-1"])[0]["answer"] == "答案1"
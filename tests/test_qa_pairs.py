@@ -0,0 +1,110 @@
+"""QA对存储测试"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.qa_generation import stores
+from app.services.qa_generation.enum import Intent, ProductType
+
+
+@pytest.fixture
+def store(sqlite_session_factory, monkeypatch):
+    """使用临时数据库的QA对存储"""
+    monkeypatch.setattr(stores, "async_session", sqlite_session_factory)
+    return stores.QAPairStore()
+
+
+def _qa(question: str, intent: Intent) -> dict:
+    return {
+        "question": question,
+        "answer": f"{question}的回答",
+        "intent": intent.value,
+        "metadata": {"source": "test"},
+    }
+
+
+def test_extract_product():
+    assert stores.extract_product("metavertu 2 有几种颜色?") == "METAVERTU 2"
+    assert stores.extract_product("METAVERTU 续航多久?") == "METAVERTU"
+    assert stores.extract_product("VERTU AGENT Q 多少钱?") == "VERTU AGENT Q"
+    assert stores.extract_product("手机多少钱?") is None
+
+
+def test_save_and_query_qa_pairs(store):
+    async def _run():
+        await store.save(
+            "job-1",
+            [
+                _qa(f"VERTU AGENT Q 功能{idx}?", Intent.PRODUCT_FUNCTION)
+                for idx in range(5)
+            ]
+            + [_qa("VERTU AGENT Q 多少钱?", Intent.PRICE_DISCOUNT)],
+        )
+        await store.save(
+            "job-2",
+            [
+                _qa("METAVERTU 2 功能?", Intent.PRODUCT_FUNCTION),
+                _qa("vertu agent q  功能0?", Intent.PRODUCT_FUNCTION),
+            ],
+        )
+
+        pages, cursor = [], None
+        while True:
+            page = await store.query(
+                2,
+                cursor=cursor,
+                intent=Intent.PRODUCT_FUNCTION.value,
+                product=ProductType.VERTU_AGENT_Q.value,
+                created_after=datetime.now() - timedelta(days=30),
+            )
+            pages.append(page)
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        by_question = await store.query(10, question="VERTU AGENT Q 功能0?")
+        by_job = await store.query(10, job_id="job-2")
+        future = await store.query(10, created_after=datetime.now() + timedelta(1))
+        return pages, by_question, by_job, future
+
+    pages, by_question, by_job, future = asyncio.run(_run())
+
+    questions = [item["question"] for page in pages for item in page["items"]]
+    assert questions == ["vertu agent q  功能0?"] + [
+        f"VERTU AGENT Q 功能{idx}?" for idx in reversed(range(5))
+    ]
+    assert len(pages) == 3
+    assert pages[0]["items"][0]["metadata"] == {"source": "test"}
+    # 问题摘要忽略大小写与空白差异
+    assert {item["job_id"] for item in by_question["items"]} == {"job-1", "job-2"}
+    assert [item["product"] for item in by_job["items"]] == [
+        "VERTU AGENT Q",
+        "METAVERTU 2",
+    ]
+    assert future["items"] == []
+
+
+def test_query_invalid_cursor(store):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        asyncio.run(store.query(10, cursor="not-a-cursor"))
+
+
+def test_save_replaces_rerun_job(store):
+    async def _run():
+        await store.save("job-1", [_qa("颜色?", Intent.PRODUCT_FUNCTION)] * 2)
+        # 任务重新执行时替换此前写入的QA对
+        saved = await store.save(
+            "job-1",
+            [
+                _qa("颜色?", Intent.PRODUCT_FUNCTION),
+                _qa("价格?", Intent.PRICE_DISCOUNT),
+            ],
+        )
+        return saved, await store.query(10, job_id="job-1")
+
+    saved, page = asyncio.run(_run())
+
+    assert saved == 2
+    assert sorted(item["question"] for item in page["items"]) == ["价格?", "颜色?"]
@@ -0,0 +1,298 @@
+"""QA 生成与答案增强流水线测试"""
+
+import asyncio
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from app.core.enum import JobStatus
+from app.services.answer_enhancement.service import AnswerEnhancementService
+from app.services.qa_generation.config import qa_generation_service_settings
+from app.services.qa_generation.processors import SemanticProcessor
+from app.services.qa_generation.service import QAGenerationService
+from app.services.qa_pipeline import jobs
+
+
+class KeywordEncoder:
+    """按关键词编码，包含相同关键词的问题相似度为 1"""
+
+    keywords = ["颜色", "价格", "续航", "屏幕"]
+
+    def __init__(self):
+        self.threads = set()
+
+    def encode(self, texts, convert_to_numpy=True):
+        self.threads.add(threading.current_thread())
+        return np.array(
+            [[float(k in text) for k in self.keywords] + [0.1] for text in texts]
+        )
+
+
+def _qa(question: str) -> dict:
+    return {"question": question, "answer": f"{question}的回答"}
+
+
+def test_incremental_dedup_matches_batch():
+    qas = [_qa(q) for q in ["颜色?", "价格?", "什么颜色?", "续航?", "价格多少?"]]
+    encoder = KeywordEncoder()
+    processor = SemanticProcessor(encoder, 0.99)
+
+    async def _run():
+        deduplicator = processor.incremental()
+        incremental = []
+        for idx in range(0, len(qas), 2):
+            incremental += await deduplicator.process(qas[idx : idx + 2])
+        return await processor.process(qas), incremental
+
+    batch, incremental = asyncio.run(_run())
+
+    assert [qa["question"] for qa in batch] == ["颜色?", "价格?", "续航?"]
+    assert incremental == batch
+    # 编码在线程中执行，不阻塞事件循环
+    assert threading.main_thread() not in encoder.threads
+
+
+class FakeQAGenerationService(QAGenerationService):
+    """每个 context 生成两个QA对，记录各 context 生成完成的时间"""
+
+    def __init__(self):
+        super().__init__(
+            None,
+            KeywordEncoder(),
+            "mock",
+            0.0,
+            0.0,
+            0.99,
+            qa_generation_service_settings.filter_rules,
+        )
+        self.generated_at = []
+
+    async def _generate(self, context: str) -> list[dict]:
+        await asyncio.sleep(0.02)
+        self.generated_at.append(asyncio.get_running_loop().time())
+        return [_qa(f"{context}颜色?"), _qa(f"{context}续航?")]
+
+    async def _filter(self, qa_pair: dict) -> bool:
+        return True
+
+
+class FakeEnhancementService(AnswerEnhancementService):
+    """记录各答案开始增强的时间"""
+
+    def __init__(self):
+        super().__init__(None, "mock", 0.0, 0.0, 0.0)
+        self.started_at = []
+
+    async def execute(self, question: str, answer: str) -> str:
+        self.started_at.append(asyncio.get_running_loop().time())
+        await asyncio.sleep(0.01)
+        if "续航" in question:
+            raise ValueError("bad item")
+        return f"enhanced-{answer}"
+
+
+def test_generate_and_enhance_qa_job(monkeypatch):
+    updates = []
+    saved = []
+
+    async def _update(job_id, **kwargs):
+        updates.append(kwargs)
+
+    async def _save(job_id, qas):
+        saved.extend(qas)
+        return len(qas)
+
+    monkeypatch.setattr(jobs.async_job_manager, "update_async_job", _update)
+    monkeypatch.setattr(jobs.qa_pair_store, "save", _save)
+    monkeypatch.setattr(
+        jobs, "build_contexts", lambda records: [r["context"] for r in records]
+    )
+
+    qa_generation_service = FakeQAGenerationService()
+    enhancement_service = FakeEnhancementService()
+    records = [{"context": f"c{idx}"} for idx in range(4)]
+    asyncio.run(
+        jobs.generate_and_enhance_qa(
+            "job",
+            records,
+            {"source": "test"},
+            qa_generation_service,
+            enhancement_service,
+        )
+    )
+
+    # 第一个 context 的QA对在生成结束前开始增强
+    assert enhancement_service.started_at[0] < qa_generation_service.generated_at[-1]
+
+    # 不同 context 的同类问题被语义去重，只保留第一个 context 的结果
+    result = updates[-1].pop("result")
+    assert updates[-1] == {"status": JobStatus.COMPLETED, "progress": 100}
+    assert result["generated_count"] == 8
+    assert result["filtered_count"] == 8
+    assert result["total"] == 2
+    assert result["qas"] == [
+        {
+            "question": "c0颜色?",
+            "answer": "c0颜色?的回答",
+            "metadata": {"source": "test"},
+            "enhanced_answer": "enhanced-c0颜色?的回答",
+        },
+        {
+            "question": "c0续航?",
+            "answer": "c0续航?的回答",
+            "metadata": {"source": "test"},
+            "enhanced_answer": "c0续航?的回答",
+        },
+    ]
+    assert result["errors"] == [{"index": 1, "error": "bad item"}]
+    # 最终的QA对写入QA对表
+    assert saved == result["qas"]
+
+    progress = [update["progress"] for update in updates[:-1]]
+    assert progress == sorted(progress) and 0 < progress[-1] < 100
+
+
+def test_generate_and_enhance_qa_job_with_mock_llm(mock_llm_client, monkeypatch):
+    updates = []
+
+    async def _update(job_id, **kwargs):
+        updates.append(kwargs)
+
+    async def _save(job_id, qas):
+        return len(qas)
+
+    monkeypatch.setattr(jobs.async_job_manager, "update_async_job", _update)
+    monkeypatch.setattr(jobs.qa_pair_store, "save", _save)
+
+    qa_generation_service = QAGenerationService(
+        mock_llm_client,
+        KeywordEncoder(),
+        "mock",
+        0.0,
+        0.0,
+        2.0,
+        qa_generation_service_settings.filter_rules,
+    )
+    records = [
+        {
+            "消息内容": [
+                {"sender": "客户", "content": f"VERTU 手机第{idx}款有什么颜色?"},
+                {"sender": "客服", "content": "提供曜石黑、冰川银两种配色"},
+            ]
+        }
+        for idx in range(3)
+    ]
+    asyncio.run(
+        jobs.generate_and_enhance_qa(
+            "job",
+            records,
+            {"source": "test"},
+            qa_generation_service,
+            AnswerEnhancementService(mock_llm_client, "mock", 0.0, 0.0, 0.0),
+        )
+    )
+
+    result = updates[-1]["result"]
+    assert updates[-1]["status"] == JobStatus.COMPLETED
+    assert result["total"] > 0
+    assert result["errors"] == []
+    for qa_pair in result["qas"]:
+        assert qa_pair["enhanced_answer"].startswith(qa_pair["answer"])
+
+
+def test_records_stored_as_upload(tmp_path, monkeypatch):
+    import httpx
+    from fastapi import FastAPI
+
+    from app.config import settings
+    from app.services.qa_pipeline.router import router
+
+    created = []
+    received = []
+
+    async def _create_async_job(job_type, handler, priority, **kwargs):
+        created.append(kwargs)
+        return "job"
+
+    async def _generate_and_enhance_qa(job_id, records, metadata, *services):
+        received.append(records)
+
+    monkeypatch.setattr(settings, "artifact_dir", str(tmp_path))
+    monkeypatch.setattr(jobs.async_job_manager, "create_async_job", _create_async_job)
+    monkeypatch.setattr(jobs, "generate_and_enhance_qa", _generate_and_enhance_qa)
+    monkeypatch.setattr(jobs, "build_qa_generation_service", lambda context: None)
+    monkeypatch.setattr(jobs, "build_answer_enhancement_service", lambda context: None)
+
+    app = FastAPI()
+    app.include_router(router)
+    records = [{"消息内容": [{"sender": "客户", "content": "有什么颜色?"}]}]
+
+    async def _run():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            response = await client.post(
+                "/api/v1/qa_pipeline/async/generate_from_body",
+                json={"data": {"RECORDS": records}, "metadata": {"source": "test"}},
+            )
+        assert response.json()["data"] == {"job_id": "job"}
+        await jobs.run_generate_and_enhance_qa("job", None, **created[0])
+
+    asyncio.run(_run())
+
+    # 任务参数只记录上传文件路径，任务结束后删除上传文件
+    assert set(created[0]) == {"records_path", "metadata"}
+    assert received == [records]
+    assert list((tmp_path / "uploads").iterdir()) == []
+
+
+def test_cancelled_job_removes_upload(tmp_path, monkeypatch):
+    import orjson
+    import pytest
+
+    from app.config import settings
+    from app.core.artifacts import write_upload
+
+    async def _generate_and_enhance_qa(job_id, records, metadata, *services):
+        raise asyncio.CancelledError
+
+    monkeypatch.setattr(settings, "artifact_dir", str(tmp_path))
+    monkeypatch.setattr(jobs, "generate_and_enhance_qa", _generate_and_enhance_qa)
+    monkeypatch.setattr(jobs, "build_qa_generation_service", lambda context: None)
+    monkeypatch.setattr(jobs, "build_answer_enhancement_service", lambda context: None)
+
+    def _run(stopping: bool):
+        monkeypatch.setattr(jobs.async_job_manager, "_stopping", stopping)
+        records_path = str(write_upload(orjson.dumps({"RECORDS": []}), ".json"))
+        with pytest.raises(asyncio.CancelledError):
+            asyncio.run(
+                jobs.run_generate_and_enhance_qa(
+                    "job", None, {}, records_path=records_path
+                )
+            )
+        return Path(records_path)
+
+    # 任务取消后删除上传文件；进程停止时任务放回队列，保留上传文件
+    assert not _run(stopping=False).exists()
+    assert _run(stopping=True).exists()
+
+
+def test_incremental_processor_is_abstract():
+    import pytest
+
+    from app.services.qa_generation.processors import Processor
+
+    class BatchOnlyProcessor(Processor):
+        async def process(self, qas):
+            return qas
+
+    # 未实现增量处理的处理器不能实例化，不会在流水线运行时才失败
+    with pytest.raises(TypeError, match="incremental"):
+        BatchOnlyProcessor()
+
+    deduplicator = SemanticProcessor(KeywordEncoder(), 0.99).incremental()
+    asyncio.run(deduplicator.process([_qa("颜色?")]))
+    assert asyncio.run(deduplicator.incremental().process([_qa("颜色?")])) == [
+        _qa("颜色?")
+    ]
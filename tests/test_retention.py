@@ -0,0 +1,249 @@
+"""任务保留期清理测试"""
+
+import os
+import time
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, text
+
+from app.config import settings
+from app.core import retention
+from app.core.artifacts import artifact_path, result_path, store_result
+from app.core.database import Job, JobShard, create_database_engine
+from app.core.enum import JobStatus, JobType
+from app.core.retention import RetentionSweeper, retention_days
+
+
+@pytest.fixture
+def session_factory(sqlite_session_factory, tmp_path, monkeypatch):
+    monkeypatch.setattr(retention, "async_session", sqlite_session_factory)
+    monkeypatch.setattr(settings, "artifact_dir", str(tmp_path / "artifacts"))
+    monkeypatch.setattr(settings, "job_retention_batch_size", 1)
+    monkeypatch.setattr(settings, "artifact_orphan_grace", 3600)
+    return sqlite_session_factory
+
+
+def _age(path, days: float = 1) -> None:
+    """将文件修改时间提前 days 天"""
+    mtime = time.time() - days * 86400
+    os.utime(path, (mtime, mtime))
+
+
+def _file(path, content: bytes = b"{}"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return path
+
+
+def test_retention_days_rules():
+    rules = {"qa_generation": 90, "qa_generation:failed": 7}
+
+    assert [
+        retention_days(rules, 30, JobType.QA_GENERATION, JobStatus.FAILED),
+        retention_days(rules, 30, JobType.QA_GENERATION, JobStatus.COMPLETED),
+        retention_days(rules, 30, JobType.ANSWER_ENHANCEMENT, JobStatus.FAILED),
+    ] == [7, 90, 30]
+
+
+def test_sweep(session_factory, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "job_default_result_retention_days", 30)
+    monkeypatch.setattr(
+        settings, "job_result_retention_days", {"answer_enhancement": 5}
+    )
+    monkeypatch.setattr(settings, "job_default_retention_days", 180)
+    monkeypatch.setattr(settings, "job_retention_days", {"qa_generation:cancelled": 1})
+
+    now = datetime.now()
+    expired_result = store_result({"total": 1, "qas": [{"question": "q1"}]})
+    kept_result = store_result({"total": 1, "qas": [{"question": "q2"}]})
+    artifact = _file(artifact_path("artifact.jsonl"))
+    upload = _file(tmp_path / "artifacts" / "uploads" / "pending.csv")
+    orphan_upload = _file(tmp_path / "artifacts" / "uploads" / "orphan.csv")
+    fresh_upload = _file(tmp_path / "artifacts" / "uploads" / "fresh.csv")
+    for path in (
+        result_path(expired_result["result_ref"]["digest"]),
+        result_path(kept_result["result_ref"]["digest"]),
+        artifact,
+        upload,
+        orphan_upload,
+    ):
+        _age(path)
+
+    jobs = [
+        # (job_id, 任务类型, 状态, 创建天数, 结果)
+        ("expired", JobType.QA_GENERATION, JobStatus.COMPLETED, 40, expired_result),
+        ("kept", JobType.QA_GENERATION, JobStatus.COMPLETED, 10, kept_result),
+        (
+            "artifact",
+            JobType.ANSWER_ENHANCEMENT,
+            JobStatus.COMPLETED,
+            10,
+            {"total": 2, "failed": 0, "artifact": "artifact.jsonl"},
+        ),
+        ("cancelled", JobType.QA_GENERATION, JobStatus.CANCELLED, 2, None),
+        ("failed", JobType.QA_GENERATION, JobStatus.FAILED, 40, None),
+        ("old", JobType.ANSWER_ENHANCEMENT, JobStatus.FAILED, 200, None),
+        ("running", JobType.QA_GENERATION, JobStatus.RUNNING, 200, None),
+    ]
+
+    async def _run():
+        async with session_factory() as session:
+            session.add_all(
+                Job(
+                    job_id=job_id,
+                    job_type=job_type,
+                    status=status,
+                    result=result,
+                    payload={"handler": "h", "kwargs": {}},
+                    created_at=now - timedelta(days=days),
+                )
+                for job_id, job_type, status, days, result in jobs
+            )
+            session.add(
+                Job(
+                    job_id="pending",
+                    job_type=JobType.ANSWER_ENHANCEMENT,
+                    payload={"handler": "h", "kwargs": {"upload_path": str(upload)}},
+                )
+            )
+            session.add_all(
+                JobShard(
+                    job_id=job_id,
+                    job_type=JobType.QA_GENERATION,
+                    shard_index=0,
+                    handler="h",
+                )
+                for job_id in ("cancelled", "running")
+            )
+            await session.commit()
+
+        swept = await RetentionSweeper().sweep()
+        async with session_factory() as session:
+            jobs_left = list(await session.scalars(select(Job)))
+            remaining = {job.job_id: job.result for job in jobs_left}
+            payloads = {job.job_id: job.payload is not None for job in jobs_left}
+            shards = list(await session.scalars(select(JobShard.job_id)))
+        return swept, remaining, payloads, shards
+
+    swept, remaining, payloads, shards = asyncio.run(_run())
+
+    assert swept == {"results": 2, "jobs": 2, "shards": 1, "files": 3}
+    assert remaining == {
+        "expired": {"total": 1, "expired": True},
+        "kept": kept_result,
+        "artifact": {"total": 2, "failed": 0, "expired": True},
+        "failed": None,
+        "running": None,
+        "pending": None,
+    }
+    # 超过结果保留期的任务参数被清空，未执行完的任务保留参数
+    assert payloads == {
+        "expired": False,
+        "kept": True,
+        "artifact": False,
+        "failed": False,
+        "running": True,
+        "pending": True,
+    }
+    assert shards == ["running"]
+    assert not result_path(expired_result["result_ref"]["digest"]).exists()
+    assert result_path(kept_result["result_ref"]["digest"]).exists()
+    assert not artifact.exists() and not orphan_upload.exists()
+    assert upload.exists() and fresh_upload.exists()
+
+
+def test_incremental_vacuum(session_factory, monkeypatch):
+    monkeypatch.setattr(settings, "job_retention_batch_size", 100)
+    monkeypatch.setattr(settings, "job_default_retention_days", 180)
+    monkeypatch.setattr(settings, "sqlite_incremental_vacuum_pages", 10)
+    created_at = datetime.now() - timedelta(days=365)
+
+    async def _pragma(name: str) -> int:
+        async with session_factory() as session:
+            return await session.scalar(text(f"PRAGMA {name}"))
+
+    async def _run():
+        async with session_factory() as session:
+            session.add_all(
+                Job(
+                    job_id=str(idx),
+                    status=JobStatus.FAILED,
+                    error="x" * 4096,
+                    created_at=created_at,
+                )
+                for idx in range(200)
+            )
+            await session.commit()
+        pages = await _pragma("page_count")
+
+        swept = await RetentionSweeper().sweep()
+        return (
+            swept["jobs"],
+            pages,
+            await _pragma("page_count"),
+            await _pragma("freelist_count"),
+        )
+
+    deleted, pages_before, pages_after, free = asyncio.run(_run())
+
+    assert deleted == 200
+    assert pages_after < pages_before / 2
+    assert free == 0
+
+
+def test_retention_disabled_by_default(session_factory):
+    async def _run():
+        async with session_factory() as session:
+            session.add(
+                Job(
+                    job_id="old",
+                    status=JobStatus.COMPLETED,
+                    result={"total": 1, "qas": []},
+                    created_at=datetime.now() - timedelta(days=3650),
+                )
+            )
+            await session.commit()
+        swept = await RetentionSweeper().sweep()
+        async with session_factory() as session:
+            return swept, await session.scalar(select(Job.result))
+
+    swept, result = asyncio.run(_run())
+
+    # 未配置保留天数时不删除任务结果与记录
+    assert (swept["results"], swept["jobs"]) == (0, 0)
+    assert result == {"total": 1, "qas": []}
+
+
+def test_incremental_vacuum_conversion_is_manual(tmp_path, monkeypatch):
+    import sqlite3
+
+    from app.core import resources
+    from app.maintenance import run_enable_incremental_vacuum
+
+    path = tmp_path / "legacy.sqlite3"
+    engine = create_database_engine(f"sqlite+aiosqlite:///{path}")
+    monkeypatch.setattr(resources, "async_engine", engine)
+
+    def _auto_vacuum() -> int:
+        with sqlite3.connect(path) as conn:
+            return conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+
+    # 已有的数据库在连接前创建，auto_vacuum 为 0
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE legacy (id INTEGER)")
+
+    async def _init():
+        await resources.init_database()
+
+    asyncio.run(_init())
+    # 启动时不重建数据库
+    assert _auto_vacuum() == 0
+
+    async def _convert():
+        await run_enable_incremental_vacuum(engine)
+        await engine.dispose()
+
+    asyncio.run(_convert())
+    assert _auto_vacuum() == 2
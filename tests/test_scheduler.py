@@ -0,0 +1,375 @@
+"""任务调度测试"""
+
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.core import managers
+from app.core.enum import JobPriority, JobStatus, JobType
+from app.core.scheduler import (
+    FairSemaphore,
+    cancel_requested_jobs,
+    job_handler,
+    llm_semaphore,
+    llm_slot,
+)
+from app.core.stores import DatabaseJobStore, MemoryJobStore
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    """使用内存存储的任务管理器，每种任务类型最多并发 1 个"""
+    manager = managers.async_job_manager
+    monkeypatch.setattr(manager, "_store", MemoryJobStore())
+    monkeypatch.setattr(manager, "_shards", None)
+    monkeypatch.setattr(manager, "_flush_interval", 0)
+    monkeypatch.setattr(manager, "_pending_updates", {})
+    monkeypatch.setattr(manager, "_async_tasks", {})
+    monkeypatch.setattr(manager, "_shard_tasks", {})
+    monkeypatch.setattr(manager, "_running", {})
+    monkeypatch.setattr(settings, "job_default_max_concurrency", 1)
+    monkeypatch.setattr(settings, "job_max_concurrency", {})
+    monkeypatch.setattr(settings, "job_poll_interval", 0.05)
+    monkeypatch.setattr(settings, "job_cancel_poll_interval", 0.05)
+    return manager
+
+
+# 执行记录：(job_id, 标签)
+events: list[tuple[str, str]] = []
+
+
+@job_handler("tests.record")
+async def _record(job_id: str, context, label: str, delay: float = 0.01) -> None:
+    events.append((job_id, label))
+    await asyncio.sleep(delay)
+    await managers.async_job_manager.update_async_job(
+        job_id, status=JobStatus.COMPLETED, result={"label": label}
+    )
+
+
+@job_handler("tests.items")
+async def _items(job_id: str, context, count: int) -> None:
+    try:
+        for idx in range(count):
+            async with llm_slot():
+                events.append((job_id, f"item{idx}"))
+                await asyncio.sleep(0.02)
+        await managers.async_job_manager.update_async_job(
+            job_id, status=JobStatus.COMPLETED
+        )
+    except Exception as e:
+        await managers.async_job_manager.update_async_job(
+            job_id, status=JobStatus.FAILED, error=str(e)
+        )
+
+
+async def _wait(manager, job_ids: list[str], timeout: float = 2) -> list[dict]:
+    async def _poll():
+        while True:
+            jobs = [await manager.get_async_job(job_id) for job_id in job_ids]
+            if all(job["status"] != JobStatus.PENDING for job in jobs) and not (
+                manager._async_tasks
+            ):
+                return jobs
+            await asyncio.sleep(0.01)
+
+    return await asyncio.wait_for(_poll(), timeout)
+
+
+async def _wait_status(manager, job_id: str, status: JobStatus) -> dict:
+    async def _poll():
+        while (job := await manager.get_async_job(job_id))["status"] != status:
+            await asyncio.sleep(0.01)
+        return job
+
+    return await asyncio.wait_for(_poll(), 2)
+
+
+def test_fair_semaphore_round_robin():
+    async def _run():
+        semaphore = FairSemaphore(1)
+        order = []
+
+        async def _call(owner: str, i: int):
+            async with semaphore.slot(owner):
+                order.append(f"{owner}{i}")
+                await asyncio.sleep(0)
+
+        # a 先排入大量等待项，b 仍能交替获得名额
+        tasks = [asyncio.create_task(_call("a", i)) for i in range(3)]
+        tasks += [asyncio.create_task(_call("b", i)) for i in range(3)]
+        await asyncio.gather(*tasks)
+        return order, semaphore.waiting
+
+    order, waiting = asyncio.run(_run())
+
+    assert order == ["a0", "a1", "b0", "a2", "b1", "b2"]
+    assert waiting == 0
+
+
+def test_fair_semaphore_cancelled_waiter():
+    async def _run():
+        semaphore = FairSemaphore(1)
+        await semaphore.acquire("a")
+        waiter = asyncio.create_task(semaphore.acquire("b"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        semaphore.release()
+        # 名额已归还，可以立即获取
+        await asyncio.wait_for(semaphore.acquire("c"), 0.1)
+        return semaphore.waiting
+
+    assert asyncio.run(_run()) == 0
+
+
+def test_llm_slot_outside_job_is_unlimited():
+    async def _run():
+        async with llm_slot():
+            return llm_semaphore.waiting
+
+    assert asyncio.run(_run()) == 0
+
+
+def test_jobs_run_by_priority_within_limit(manager):
+    events.clear()
+
+    async def _run():
+        # 调度启动前入队的任务在启动后执行
+        job_ids = [
+            await manager.create_async_job(
+                JobType.QA_GENERATION, "tests.record", priority, label=label
+            )
+            for label, priority in [
+                ("low", JobPriority.LOW),
+                ("normal", JobPriority.NORMAL),
+                ("high", JobPriority.HIGH),
+            ]
+        ]
+        job_ids.append(
+            await manager.create_async_job(
+                JobType.ANSWER_ENHANCEMENT, "tests.record", label="other"
+            )
+        )
+        await manager.start(None)
+        try:
+            return await _wait(manager, job_ids)
+        finally:
+            await manager.stop()
+
+    jobs = asyncio.run(_run())
+
+    assert all(job["status"] == JobStatus.COMPLETED for job in jobs)
+    assert all(job["started_at"] is not None for job in jobs)
+    qa_labels = [label for _, label in events if label != "other"]
+    assert qa_labels == ["high", "normal", "low"]
+    # 不同类型的任务各自计算并发上限，互不阻塞
+    assert [label for _, label in events].index("other") <= 1
+
+
+def test_cancel_pending_job(manager):
+    events.clear()
+
+    async def _run():
+        await manager.start(None)
+        try:
+            running = await manager.create_async_job(
+                JobType.QA_GENERATION, "tests.record", label="running", delay=0.2
+            )
+            pending = await manager.create_async_job(
+                JobType.QA_GENERATION, "tests.record", label="pending"
+            )
+            await asyncio.sleep(0.05)
+            cancelled = await manager.cancel_async_job(pending)
+            jobs = await _wait(manager, [running, pending])
+            return cancelled, jobs, await manager.cancel_async_job(pending)
+        finally:
+            await manager.stop()
+
+    cancelled, jobs, cancelled_again = asyncio.run(_run())
+
+    assert cancelled and not cancelled_again
+    assert [job["status"] for job in jobs] == [
+        JobStatus.COMPLETED,
+        JobStatus.CANCELLED,
+    ]
+    assert [label for _, label in events] == ["running"]
+
+
+def test_unknown_handler_fails(manager):
+    async def _run():
+        await manager.start(None)
+        try:
+            job_id = await manager.create_async_job(JobType.UNKNOWN, "tests.missing")
+            return (await _wait(manager, [job_id]))[0]
+        finally:
+            await manager.stop()
+
+    job = asyncio.run(_run())
+
+    assert job["status"] == JobStatus.FAILED
+    assert "tests.missing" in job["error"]
+
+
+def test_running_job_is_requeued_on_stop(manager):
+    events.clear()
+
+    async def _run():
+        await manager.start(None)
+        job_id = await manager.create_async_job(
+            JobType.QA_GENERATION, "tests.record", label="slow", delay=10
+        )
+        await asyncio.sleep(0.05)
+        await manager.stop()
+        interrupted = await manager.get_async_job(job_id)
+
+        # 重新启动后任务再次执行
+        await manager.start(None)
+        await asyncio.sleep(0.05)
+        await manager.stop()
+        return interrupted, await manager.get_async_job(job_id)
+
+    interrupted, restarted = asyncio.run(_run())
+
+    assert (interrupted["status"], interrupted["started_at"]) == (
+        JobStatus.PENDING,
+        None,
+    )
+    assert restarted["status"] == JobStatus.PENDING
+    assert [label for _, label in events] == ["slow", "slow"]
+
+
+async def _exercise_leases(store) -> list:
+    """对任务存储执行相同的租约操作序列，返回领取者与续约结果"""
+    await store.create("a", JobType.QA_GENERATION, {"handler": "tests.record"})
+    await store.create("b", JobType.QA_GENERATION, {"handler": "tests.record"})
+    first, _ = await store.claim([JobType.QA_GENERATION], "w1", 0.1)
+    second, _ = await store.claim([JobType.QA_GENERATION], "w2", 60)
+    nothing = await store.claim([JobType.QA_GENERATION], "w2", 60)
+    renewed = await store.renew_leases("w2", ["a", "b"], 60)
+
+    # w1 失联，租约过期后 a 由 w2 重新领取，w1 无法再续约
+    await asyncio.sleep(0.15)
+    reclaimed, _ = await store.claim([JobType.QA_GENERATION], "w2", 60)
+    return [
+        (first["job_id"], first["lease_owner"], first["payload"]),
+        (second["job_id"], second["lease_owner"]),
+        nothing,
+        renewed,
+        (reclaimed["job_id"], reclaimed["lease_owner"], reclaimed["status"]),
+        await store.renew_leases("w1", ["a"], 60),
+        await store.renew_leases("w2", ["a", "b"], 60),
+        await store.claim([JobType.QA_GENERATION], "w3", 60),
+    ]
+
+
+def test_lease_claim_and_reclaim(sqlite_session_factory):
+    async def _run():
+        database = await _exercise_leases(DatabaseJobStore(sqlite_session_factory))
+        return database, await _exercise_leases(MemoryJobStore())
+
+    database, memory = asyncio.run(_run())
+
+    assert memory == database
+    assert memory == [
+        ("a", "w1", {"handler": "tests.record"}),
+        ("b", "w2"),
+        None,
+        {"b"},
+        ("a", "w2", JobStatus.RUNNING),
+        set(),
+        {"a", "b"},
+        None,
+    ]
+
+
+def test_lost_lease_stops_job(manager):
+    events.clear()
+
+    async def _run():
+        await manager.start(None)
+        try:
+            job_id = await manager.create_async_job(
+                JobType.QA_GENERATION, "tests.record", label="slow", delay=10
+            )
+            await asyncio.sleep(0.05)
+            # 其他进程取消了任务，续约失败后停止执行
+            await manager._store.update(job_id, {"status": JobStatus.CANCELLED})
+            await manager._renew_leases()
+            await asyncio.sleep(0.01)
+            return manager._async_tasks, await manager.get_async_job(job_id)
+        finally:
+            await manager.stop()
+
+    tasks, job = asyncio.run(_run())
+
+    assert tasks == {}
+    assert job["status"] == JobStatus.CANCELLED
+
+
+def test_cancel_job_running_elsewhere(manager):
+    async def _run():
+        job_id = await manager.create_async_job(JobType.QA_GENERATION, "tests.record")
+        await manager._store.claim([JobType.QA_GENERATION], "other", 60)
+        return await manager.cancel_async_job(job_id), await manager.get_async_job(
+            job_id
+        )
+
+    cancelled, job = asyncio.run(_run())
+
+    # 执行进程轮询到取消请求后停止并标记为取消
+    assert cancelled
+    assert (job["status"], job["cancel_requested"]) == (JobStatus.RUNNING, True)
+
+
+def test_cancel_request_stops_job_at_boundary(manager):
+    events.clear()
+
+    async def _run():
+        await manager.start(None)
+        try:
+            job_id = await manager.create_async_job(
+                JobType.QA_GENERATION, "tests.items", count=100
+            )
+            while not events:
+                await asyncio.sleep(0.01)
+            # 模拟其他进程收到的取消请求：本进程没有该任务时只记录取消请求
+            await manager._store.update(
+                job_id, {"cancel_requested": True}, expected_status=JobStatus.RUNNING
+            )
+            job = await _wait_status(manager, job_id, JobStatus.CANCELLED)
+            return job, dict(manager._running), set(cancel_requested_jobs)
+        finally:
+            await manager.stop()
+
+    job, running, requested = asyncio.run(_run())
+
+    assert job["status"] == JobStatus.CANCELLED
+    assert job["error"] is None
+    assert 0 < len(events) < 100
+    # 并发名额已释放
+    assert running == {JobType.QA_GENERATION: 0}
+    assert requested == set()
+
+
+def test_cancel_requested_job_is_not_resumed(manager):
+    events.clear()
+
+    async def _run():
+        job_id = await manager.create_async_job(
+            JobType.QA_GENERATION, "tests.items", count=1
+        )
+        # 执行进程取消前退出，租约过期后被本进程重新领取
+        await manager._store.claim([JobType.QA_GENERATION], "other", 0)
+        await manager._store.update(job_id, {"cancel_requested": True})
+        await manager.start(None)
+        try:
+            return await _wait_status(manager, job_id, JobStatus.CANCELLED)
+        finally:
+            await manager.stop()
+
+    job = asyncio.run(_run())
+
+    assert job["status"] == JobStatus.CANCELLED
+    assert events == []
@@ -0,0 +1,318 @@
+"""任务分片测试"""
+
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from sqlalchemy import func, select
+
+from app.config import settings
+from app.core import managers, shards
+from app.core.database import JobShard
+from app.core.enum import JobStatus, JobType
+from app.core.scheduler import job_handler, shard_handler
+from app.core.stores import DatabaseJobStore
+from app.services.qa_generation import jobs as qa_jobs
+from app.services.qa_generation.deps import build_qa_generation_service
+from app.services.qa_generation.utils import build_contexts
+
+
+@pytest.fixture
+def session_factory(sqlite_session_factory, monkeypatch):
+    monkeypatch.setattr(shards, "async_session", sqlite_session_factory)
+    return sqlite_session_factory
+
+
+@pytest.fixture
+def manager(session_factory, monkeypatch):
+    """使用临时数据库的任务管理器与分片存储"""
+    manager = managers.async_job_manager
+    monkeypatch.setattr(manager, "_store", DatabaseJobStore(session_factory))
+    monkeypatch.setattr(manager, "_shards", shards.ShardStore())
+    monkeypatch.setattr(manager, "_flush_interval", 0)
+    # 结果原样写入任务记录，便于断言
+    monkeypatch.setattr(managers, "store_result", lambda result: result)
+    monkeypatch.setattr(manager, "_pending_updates", {})
+    monkeypatch.setattr(manager, "_async_tasks", {})
+    monkeypatch.setattr(manager, "_shard_tasks", {})
+    monkeypatch.setattr(manager, "_running", {})
+    monkeypatch.setattr(settings, "job_default_max_concurrency", 3)
+    monkeypatch.setattr(settings, "job_max_concurrency", {})
+    monkeypatch.setattr(settings, "job_poll_interval", 0.05)
+    monkeypatch.setattr(settings, "job_shard_steal_after", 300)
+    monkeypatch.setattr(settings, "job_cancel_poll_interval", 0.05)
+    return manager
+
+
+# 分片执行记录：分片输入
+executed: list[list[int]] = []
+
+
+@shard_handler("tests.sum")
+async def _sum(context, inputs: list[int]) -> dict:
+    executed.append(inputs)
+    await asyncio.sleep(0.01)
+    if "fail" in inputs:
+        raise ValueError("bad shard")
+    return {"sum": sum(inputs)}
+
+
+@job_handler("tests.sharded")
+async def _sharded(job_id: str, context, inputs: list[list]) -> None:
+    try:
+        results = await managers.async_job_manager.run_shards(
+            job_id, JobType.UNKNOWN, "tests.sum", inputs
+        )
+        await managers.async_job_manager.update_async_job(
+            job_id,
+            status=JobStatus.COMPLETED,
+            result={"sums": [result["sum"] for result in results]},
+        )
+    except Exception as e:
+        await managers.async_job_manager.update_async_job(
+            job_id, status=JobStatus.FAILED, error=str(e)
+        )
+
+
+async def _wait(manager, job_id: str, timeout: float = 5) -> dict:
+    async def _poll():
+        while (job := await manager.get_async_job(job_id))["status"] in (
+            JobStatus.PENDING,
+            JobStatus.RUNNING,
+        ):
+            await asyncio.sleep(0.02)
+        return job
+
+    return await asyncio.wait_for(_poll(), timeout)
+
+
+async def _shard_count(session_factory) -> int:
+    async with session_factory() as session:
+        return await session.scalar(select(func.count(JobShard.id)))
+
+
+def test_shard_store_lifecycle(manager, session_factory):
+    store = manager._shards
+
+    async def _run():
+        await manager._store.create("a", JobType.UNKNOWN)
+        created = await store.create("a", JobType.UNKNOWN, "tests.sum", [[1], [2]])
+        # 任务未运行时不领取其分片
+        before_running = await store.claim([JobType.UNKNOWN], "w1", 60, 2)
+        await manager._store.update("a", {"status": JobStatus.RUNNING})
+        # 任务被重新领取时沿用已有分片
+        recreated = await store.create("a", JobType.UNKNOWN, "tests.sum", [[9]])
+
+        first = await store.claim([JobType.UNKNOWN], "w1", 60, 2)
+        second = await store.claim([JobType.UNKNOWN], "w2", 0.05, 2)
+        nothing = await store.claim([JobType.UNKNOWN], "w3", 60, 2)
+
+        # w2 的租约已过期，由 w3 重新领取后执行失败，领取次数达到上限后分片失败
+        await asyncio.sleep(0.1)
+        reclaimed = await store.claim([JobType.UNKNOWN], "w3", 60, 2)
+        await store.fail(reclaimed["id"], "w3", "bad shard", 2)
+        exhausted = await store.claim([JobType.UNKNOWN], "w3", 60, 2)
+
+        await store.complete(first["id"], {"sum": 1})
+        completed_again = await store.complete(first["id"], {"sum": 0})
+        return [
+            created,
+            before_running,
+            recreated,
+            (first["shard_index"], first["inputs"], first["attempts"]),
+            (second["shard_index"], second["lease_owner"]),
+            nothing,
+            (reclaimed["shard_index"], reclaimed["attempts"]),
+            exhausted,
+            completed_again,
+            await store.progress("a", 2),
+            await store.results("a"),
+        ]
+
+    assert asyncio.run(_run()) == [
+        2,
+        None,
+        2,
+        (0, [1], 1),
+        (1, "w2"),
+        None,
+        (1, 2),
+        None,
+        False,
+        {"total": 2, "completed": 1, "failed": 1},
+        [{"sum": 1}, None],
+    ]
+
+
+def test_release_does_not_count_attempt(manager):
+    store = manager._shards
+
+    async def _run():
+        await manager._store.create("a", JobType.UNKNOWN)
+        await manager._store.update("a", {"status": JobStatus.RUNNING})
+        await store.create("a", JobType.UNKNOWN, "tests.sum", [[1]])
+        await store.claim([JobType.UNKNOWN], "w1", 60, 1)
+        released = await store.release("w1")
+        return released, await store.claim([JobType.UNKNOWN], "w2", 60, 1)
+
+    released, shard = asyncio.run(_run())
+
+    assert released == 1
+    assert (shard["attempts"], shard["lease_owner"]) == (1, "w2")
+
+
+def test_sharded_job(manager, session_factory):
+    executed.clear()
+
+    async def _run():
+        await manager.start(None)
+        try:
+            job_id = await manager.create_async_job(
+                JobType.UNKNOWN,
+                "tests.sharded",
+                inputs=[[idx, idx] for idx in range(6)],
+            )
+            return await _wait(manager, job_id), await _shard_count(session_factory)
+        finally:
+            await manager.stop()
+
+    job, remaining = asyncio.run(_run())
+
+    assert job["status"] == JobStatus.COMPLETED
+    assert job["result"] == {"sums": [0, 2, 4, 6, 8, 10]}
+    assert sorted(executed) == [[idx, idx] for idx in range(6)]
+    assert remaining == 0
+
+
+def test_straggler_shard_is_stolen(manager, monkeypatch):
+    executed.clear()
+    monkeypatch.setattr(settings, "job_shard_steal_after", 0)
+    # 只运行协调者，分片由协调者自己执行
+    monkeypatch.setattr(settings, "job_default_max_concurrency", 1)
+
+    async def _run():
+        job_id = await manager.create_async_job(
+            JobType.UNKNOWN, "tests.sharded", inputs=[[1], [2]]
+        )
+        await manager.start(None)
+        try:
+            # 其他节点领取了第一个分片后停滞，租约仍有效
+            while not await manager._shards.claim([JobType.UNKNOWN], "other", 60, 3):
+                await asyncio.sleep(0.01)
+            return await _wait(manager, job_id)
+        finally:
+            await manager.stop()
+
+    job = asyncio.run(_run())
+
+    assert job["status"] == JobStatus.COMPLETED
+    assert job["result"] == {"sums": [1, 2]}
+
+
+def test_failed_shard_fails_job(manager, session_factory, monkeypatch):
+    executed.clear()
+    monkeypatch.setattr(settings, "job_shard_max_attempts", 2)
+
+    async def _run():
+        await manager.start(None)
+        try:
+            job_id = await manager.create_async_job(
+                JobType.UNKNOWN, "tests.sharded", inputs=[[1], ["fail"]]
+            )
+            return await _wait(manager, job_id), await _shard_count(session_factory)
+        finally:
+            await manager.stop()
+
+    job, remaining = asyncio.run(_run())
+
+    assert job["status"] == JobStatus.FAILED
+    assert "1 shards" in job["error"]
+    assert executed.count(["fail"]) == 2
+    assert remaining == 0
+
+
+def test_cancel_request_stops_sharded_job(manager, session_factory, monkeypatch):
+    executed.clear()
+    # 只运行协调者，分片由协调者依次执行
+    monkeypatch.setattr(settings, "job_default_max_concurrency", 1)
+
+    async def _run():
+        await manager.start(None)
+        try:
+            job_id = await manager.create_async_job(
+                JobType.UNKNOWN, "tests.sharded", inputs=[[idx] for idx in range(100)]
+            )
+            while not executed:
+                await asyncio.sleep(0.01)
+            # 其他进程收到的取消请求
+            await manager._store.update(
+                job_id, {"cancel_requested": True}, expected_status=JobStatus.RUNNING
+            )
+            return await _wait(manager, job_id), await _shard_count(session_factory)
+        finally:
+            await manager.stop()
+
+    job, remaining = asyncio.run(_run())
+
+    assert job["status"] == JobStatus.CANCELLED
+    assert len(executed) < 100
+    assert remaining == 0
+
+
+class _KeywordEncoder:
+    keywords = ["颜色", "价格", "续航"]
+
+    def encode(self, texts, convert_to_numpy=True):
+        return np.array(
+            [[float(k in text) for k in self.keywords] + [0.1] for text in texts]
+        )
+
+
+def test_sharded_qa_generation_matches_sequential(
+    manager, mock_llm_client, monkeypatch
+):
+    context = SimpleNamespace(
+        openai_client=mock_llm_client, sentence_transformer=_KeywordEncoder()
+    )
+    updates = {}
+
+    async def _update(job_id, **kwargs):
+        updates.setdefault(job_id, []).append(kwargs)
+
+    async def _save(job_id, qas):
+        return len(qas)
+
+    monkeypatch.setattr(manager, "update_async_job", _update)
+    monkeypatch.setattr(qa_jobs.qa_pair_store, "save", _save)
+    records = [
+        {
+            "消息内容": [
+                {"sender": "客户", "content": f"VERTU 手机第{idx}款有什么{topic}?"},
+                {"sender": "客服", "content": f"第{idx}款的{topic}请咨询门店"},
+            ]
+        }
+        for idx, topic in enumerate(["颜色", "价格", "续航", "颜色", "价格"])
+    ]
+
+    async def _run():
+        # 协调者的任务记录处于运行中，分片才可被领取
+        await manager._store.create("sharded", JobType.QA_GENERATION)
+        await manager._store.update("sharded", {"status": JobStatus.RUNNING})
+        await manager.start(context)
+        try:
+            service = build_qa_generation_service(context)
+            await qa_jobs.generate_qa("sequential", records, {}, service)
+            await qa_jobs.generate_qa_sharded(
+                "sharded", build_contexts(records), {}, service, 2
+            )
+        finally:
+            await manager.stop()
+
+    asyncio.run(_run())
+
+    sequential, sharded = updates["sequential"][-1], updates["sharded"][-1]
+    assert sharded["status"] == JobStatus.COMPLETED
+    assert sharded["result"] == sequential["result"]
+    progress = [update["progress"] for update in updates["sharded"]]
+    assert progress == sorted(progress) and progress[-1] == 100